@@ -0,0 +1,50 @@
+"""
+Export throughput: the chunked, parallel export layer against plain pandas writers.
+
+    python -m benchmarks.bench_export [--rows 200000] [--workers 4]
+
+Each run writes a synthetic channel frame (with derived columns) to a temporary
+directory and reports best-of-3 wall time and output size. The pandas baselines are
+what save_csv used to do (to_csv) and the single-threaded compressed equivalents.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Callable
+
+from benchmarks.synthetic import make_video_items
+from src.data.io import add_derived_columns, export_frame, items_to_df, parquet_available
+
+def _time(write: Callable[[str], None], path: str, repeat: int = 3) -> dict:
+    seconds = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        write(path)
+        seconds = min(seconds, time.perf_counter() - t0)
+    return {"seconds": round(seconds, 3), "mb": round(os.path.getsize(path) / 2**20, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    df = add_derived_columns(items_to_df(make_video_items(args.rows)))
+    cases = {
+        "pandas_csv": ("videos.csv", lambda p: df.to_csv(p, index=False)),
+        "pandas_csv_gzip": ("videos.csv.gz", lambda p: df.to_csv(p, index=False, compression="gzip")),
+        "pandas_jsonl_gzip": ("videos.jsonl.gz", lambda p: df.to_json(
+            p, orient="records", lines=True, date_format="iso", compression="gzip")),
+    }
+    for suffix in (".csv", ".csv.gz", ".jsonl.gz") + ((".parquet",) if parquet_available() else ()):
+        cases["export" + suffix.replace(".", "_")] = (
+            "videos" + suffix, lambda p: export_frame(df, p, workers=args.workers))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (file_name, write) in cases.items():
+            res = _time(write, os.path.join(tmp, file_name))
+            print(json.dumps({"bench": "export", "case": name, "rows": args.rows, **res}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+End-to-end fetch_channel_df benchmark against the local API stand-in.
+
+    python -m benchmarks.bench_fetch --sizes 100 1000 10000 100000 --out bench.json
+    python -m benchmarks.bench_fetch --sizes 1000 --latency-ms 30 --compare bench.json
+
+Each channel size runs in a fresh subprocess (clean cache dir, clean RSS) and
+reports cold-crawl wall time, requests and requests/sec (client and server side),
+bytes on the wire, peak RSS, and cache-hit load times from the in-memory and disk
+tiers. Results are written as JSON; --compare flags regressions beyond
+--tolerance against a previous results file and exits non-zero.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.standin import start_server
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+def run_worker(size: int, rate: float) -> Dict:
+    """
+    Runs inside the subprocess; YT_BASE_URL / YT_CACHE_DIR are already set.
+    """
+    from src.data import cache
+    from src.services.videos import fetch_channel_df
+    from src.youtube_api.client import get_scheduler, get_transport
+    from src.config.settings import settings
+
+    sched = get_scheduler()
+    sched.bucket.rate = sched.bucket.capacity = rate
+    handle = f"@synth_{size}"
+
+    t0 = time.perf_counter()
+    df = fetch_channel_df(handle)
+    cold_s = time.perf_counter() - t0
+    assert len(df) == size, f"expected {size} rows, got {len(df)}"
+    stats = get_transport().stats.snapshot()
+
+    t0 = time.perf_counter()
+    fetch_channel_df(handle)
+    memory_hit_s = time.perf_counter() - t0
+
+    cache._memory.clear()
+    t0 = time.perf_counter()
+    fetch_channel_df(handle)
+    disk_hit_s = time.perf_counter() - t0
+
+    return {
+        "videos": size,
+        "cold_s": round(cold_s, 4),
+        "requests": stats["requests"],
+        "requests_per_s": round(stats["requests"] / cold_s, 1) if cold_s else 0.0,
+        "videos_per_s": round(size / cold_s, 1) if cold_s else 0.0,
+        "wire_bytes": stats["wire_bytes"],
+        "body_bytes": stats["body_bytes"],
+        "retries": sched.retries,
+        "peak_rss_mb": _peak_rss_mb(),
+        "memory_hit_s": round(memory_hit_s, 5),
+        "disk_hit_s": round(disk_hit_s, 5),
+        "max_workers": settings.max_workers,
+    }
+
+def _run_size(size: int, base_url: str, args) -> Dict:
+    with tempfile.TemporaryDirectory(prefix="yt-bench-") as cache_dir:
+        env = dict(os.environ, YT_BASE_URL=base_url, YT_CACHE_DIR=cache_dir,
+                   YT_API_KEY=os.getenv("YT_API_KEY") or "bench-key")
+        cmd = [sys.executable, "-m", "benchmarks.bench_fetch", "--worker", str(size), "--rate", str(args.rate)]
+        proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"worker for {size} videos failed:\n{proc.stderr}")
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+# Lower is better for every compared metric
+_COMPARED = ("cold_s", "peak_rss_mb", "memory_hit_s", "disk_hit_s", "wire_bytes")
+
+def compare(current: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    base = {r["videos"]: r for r in baseline}
+    regressions = []
+    for r in current:
+        b = base.get(r["videos"])
+        if not b:
+            continue
+        for key in _COMPARED:
+            old, new = b.get(key), r.get(key)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            line = f"{r['videos']:>7} videos  {key:<13} {old:>12} -> {new:<12} ({change:+.1%})"
+            print(line)
+            if change > tolerance:
+                regressions.append(line)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline fetch_channel_df benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Stand-in per-request latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Stand-in transient 503 rate")
+    parser.add_argument("--rate", type=float, default=10000.0, help="Client token-bucket rate (req/s)")
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(run_worker(args.worker, args.rate)))
+        return
+
+    server, state, base_url = start_server(latency_ms=args.latency_ms, error_rate=args.error_rate)
+    results = []
+    try:
+        for size in args.sizes:
+            before = state.snapshot()
+            res = _run_size(size, base_url, args)
+            after = state.snapshot()
+            res["server_requests"] = after["total_requests"] - before["total_requests"]
+            res["server_errors"] = after["errors"] - before["errors"]
+            print(json.dumps({"bench": "fetch", **res}))
+            results.append(res)
+    finally:
+        server.shutdown()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_ms": args.latency_ms,
+            "error_rate": args.error_rate,
+            "rate": args.rate,
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Retained memory of parsed Video objects: the slotted, interning model against the
+previous plain-dataclass layout.
+
+    python -m benchmarks.bench_memory [--items 100000] [--channels 20]
+
+Items are round-tripped through JSON, as API responses are, so repeated strings
+(channel titles, categories, tags) start out as separate objects per video. The
+items are dropped after parsing; what is reported is what the Video list keeps
+alive (tracemalloc), plus best-of-3 parse wall time (measured untraced).
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from benchmarks.synthetic import make_video_items
+from src.youtube_api import parsers
+
+@dataclass
+class LegacyVideo:
+    video_id: str
+    title: str
+    published_at: str
+    view_count: int
+    like_count: Optional[int] = None
+    comment_count: Optional[int] = None
+    duration: Optional[str] = None
+    category_id: Optional[str] = None
+    tags: Optional[List[str]] = None
+    definition: Optional[str] = None
+    caption: Optional[str] = None
+    channel_title: Optional[str] = None
+    description: Optional[str] = None
+
+@contextmanager
+def _model(cls):
+    saved, parsers.Video = parsers.Video, cls
+    try:
+        yield
+    finally:
+        parsers.Video = saved
+
+def _payload(n: int, channels: int) -> bytes:
+    per = max(1, n // channels)
+    items = []
+    for c in range(channels):
+        items.extend(make_video_items(per, seed=c, channel_title=f"Synthetic Channel {c}"))
+    return json.dumps(items[:n]).encode("utf-8")
+
+def _measure(payload: bytes, repeat: int = 3) -> Dict[str, float]:
+    items = json.loads(payload)
+    seconds = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        parsers.parse_video_items(items)
+        seconds = min(seconds, time.perf_counter() - t0)
+    del items
+
+    gc.collect()
+    tracemalloc.start()
+    items = json.loads(payload)
+    videos = parsers.parse_video_items(items)
+    del items
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n = len(videos)
+    del videos
+    return {"retained_mb": round(retained / 2**20, 1), "bytes_per_video": round(retained / n),
+            "parse_seconds": round(seconds, 3)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--channels", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = _payload(args.items, args.channels)
+    results = {}
+    for name, cls in (("dataclass", LegacyVideo), ("slotted_interned", parsers.Video)):
+        with _model(cls):
+            results[name] = _measure(payload)
+    base = results["dataclass"]["retained_mb"]
+    for name, res in results.items():
+        print(json.dumps({"bench": "memory", "model": name, "items": args.items, **res,
+                          "vs_dataclass": round(res["retained_mb"] / base, 2)}))
+
+if __name__ == "__main__":
+    main()
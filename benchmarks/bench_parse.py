@@ -0,0 +1,55 @@
+"""
+Compare the Video-object parse path with the column-builder path.
+
+    python -m benchmarks.bench_parse [--sizes 10000 100000] [--repeat 3]
+
+Prints one JSON object per (path, size) with best-of-N wall time and peak
+Python heap allocation (tracemalloc).
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from benchmarks.synthetic import make_video_items
+from src.data.io import items_to_df, videos_to_df
+from src.youtube_api.parsers import parse_video_items
+
+PATHS: Dict[str, Callable[[List[Dict]], object]] = {
+    "video_objects": lambda items: videos_to_df(parse_video_items(items)),
+    "column_builder": items_to_df,
+}
+
+def _measure(fn: Callable, items: List[Dict], repeat: int) -> Dict[str, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn(items)
+        best = min(best, time.perf_counter() - t0)
+    gc.collect()
+    tracemalloc.start()
+    fn(items)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(best, 4), "peak_alloc_mb": round(peak / 2**20, 2)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        items = make_video_items(n)
+        base = None
+        for name, fn in PATHS.items():
+            res = _measure(fn, items, args.repeat)
+            base = base or res["seconds"]
+            print(json.dumps({"bench": "parse", "path": name, "items": n, **res,
+                              "speedup": round(base / res["seconds"], 2)}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Local stand-in for the YouTube Data API v3 list endpoints used by the client.
+
+Serves channels (forHandle / id), playlistItems (paginated uploads), videos and
+commentThreads for synthetic channels named "@synth_<N>", which have N uploads.
+Each video has a fixed number of comment threads (its statistics.commentCount),
+plus `new_comments` newer ones that a test can raise to simulate activity; every
+11th video has comments disabled. Responses carry etags and honour
+If-None-Match / Accept-Encoding: gzip. Latency and a transient error rate are
+configurable so retry and concurrency behaviour can be exercised without
+burning real quota.
+
+    python -m benchmarks.standin --port 8765 --latency-ms 40 --error-rate 0.01
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic import make_video_item
+
+_HANDLE_RE = re.compile(r"^@synth_(\d+)$")
+_VIDEO_RE = re.compile(r"^s(\d+)v(\d+)$")
+PAGE_SIZE = 50
+COMMENT_PAGE_SIZE = 100
+_COMMENT_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+def channel_id(n: int) -> str:
+    return f"UC{n:022d}"
+
+def uploads_id(n: int) -> str:
+    return f"UU{n:022d}"
+
+def video_id(n: int, i: int) -> str:
+    # Index 0 is the newest upload, like the real uploads playlist
+    return f"s{n}v{i:08d}"
+
+class StandinState:
+    def __init__(self, latency_ms: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency_s = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.errors = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self.new_comments = 0  # extra, newer comment threads on every video
+
+    def count(self, endpoint: str, nbytes: int, not_modified: bool = False) -> None:
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.bytes_sent += nbytes
+            self.not_modified += not_modified
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            fail = self._rng.random() < self.error_rate
+            self.errors += fail
+            return fail
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {"requests": dict(self.requests), "total_requests": sum(self.requests.values()),
+                    "errors": self.errors, "not_modified": self.not_modified,
+                    "bytes_sent": self.bytes_sent}
+
+class ApiError(Exception):
+    def __init__(self, status: int, reason: str):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+
+def comments_disabled(i: int) -> bool:
+    return i % 11 == 3
+
+def comment_threads(i: int, state: StandinState) -> int:
+    return 0 if comments_disabled(i) else (i * 37) % 251 + state.new_comments
+
+def _channel_item(n: int) -> Dict:
+    return {"kind": "youtube#channel", "etag": f"ch{n}", "id": channel_id(n),
+            "contentDetails": {"relatedPlaylists": {"uploads": uploads_id(n)}}}
+
+def _channels(q: Dict[str, str], state: StandinState) -> Dict:
+    items: List[Dict] = []
+    m = _HANDLE_RE.match(q.get("forHandle", ""))
+    if m:
+        items.append(_channel_item(int(m.group(1))))
+    for cid in filter(None, q.get("id", "").split(",")):
+        if cid.startswith("UC") and cid[2:].isdigit():
+            items.append(_channel_item(int(cid[2:])))
+    return {"kind": "youtube#channelListResponse", "items": items}
+
+def _playlist_items(q: Dict[str, str], state: StandinState) -> Dict:
+    pid = q.get("playlistId", "")
+    n = int(pid[2:]) if pid.startswith("UU") and pid[2:].isdigit() else 0
+    size = min(int(q.get("maxResults", PAGE_SIZE)), PAGE_SIZE)
+    start = int(q.get("pageToken") or 0)
+    stop = min(n, start + size)
+    body = {
+        "kind": "youtube#playlistItemListResponse",
+        "items": [{"contentDetails": {"videoId": video_id(n, i)}} for i in range(start, stop)],
+        "pageInfo": {"totalResults": n, "resultsPerPage": size},
+    }
+    if stop < n:
+        body["nextPageToken"] = str(stop)
+    return body
+
+_MASK_RE = re.compile(r"(\w+)(?:\(([^()]*)\))?")
+
+def _item_mask(fields: str) -> Optional[Dict[str, Optional[set]]]:
+    """
+    Parse the items(...) selector of a partial-response `fields` mask into
+    {top-level key: set of sub-keys, or None for the whole value}. Only the
+    one-level nesting the client sends is understood.
+    """
+    if not fields.startswith("items(") or not fields.endswith(")"):
+        return None
+    return {k: (set(sub.split(",")) if sub else None) for k, sub in _MASK_RE.findall(fields[6:-1])}
+
+def _apply_mask(item: Dict, mask: Dict[str, Optional[set]]) -> Dict:
+    out = {}
+    for key, sub in mask.items():
+        if key in item:
+            out[key] = item[key] if sub is None else {k: v for k, v in item[key].items() if k in sub}
+    return out
+
+def _videos(q: Dict[str, str], state: StandinState) -> Dict:
+    items = []
+    parts = set(q.get("part", "").split(","))
+    mask = _item_mask(q.get("fields", ""))
+    for vid in filter(None, q.get("id", "").split(",")):
+        m = _VIDEO_RE.match(vid)
+        if not m:
+            continue
+        n, i = int(m.group(1)), int(m.group(2))
+        item = make_video_item(i, random.Random(n * 1_000_003 + i), channel_title=f"Synthetic {n}")
+        item["id"] = vid
+        if comments_disabled(i):
+            item["statistics"].pop("commentCount", None)
+        else:
+            item["statistics"]["commentCount"] = str(comment_threads(i, state))
+        for part in ("snippet", "statistics", "contentDetails"):
+            if part not in parts:
+                item.pop(part, None)
+        items.append(item if mask is None else _apply_mask(item, mask))
+    if mask is not None:
+        return {"items": items}
+    return {"kind": "youtube#videoListResponse", "items": items}
+
+def _comment_thread(vid: str, age: int) -> Dict:
+    # `age` 0 is the oldest thread; a thread's ID and timestamp never change
+    ts = (_COMMENT_EPOCH + timedelta(hours=age)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return {
+        "kind": "youtube#commentThread",
+        "id": f"{vid}c{age:06d}",
+        "snippet": {
+            "videoId": vid,
+            "totalReplyCount": age % 4,
+            "topLevelComment": {"kind": "youtube#comment", "id": f"{vid}c{age:06d}", "snippet": {
+                "authorDisplayName": f"viewer{age % 97}",
+                "authorChannelId": {"value": f"UCviewer{age % 97:016d}"},
+                "textDisplay": f"Comment {age} on {vid}, with a comma",
+                "likeCount": (age * 7) % 50,
+                "publishedAt": ts,
+                "updatedAt": ts,
+            }},
+        },
+    }
+
+def _comment_threads(q: Dict[str, str], state: StandinState) -> Dict:
+    vid = q.get("videoId", "")
+    m = _VIDEO_RE.match(vid)
+    if not m:
+        raise ApiError(404, "videoNotFound")
+    i = int(m.group(2))
+    if comments_disabled(i):
+        raise ApiError(403, "commentsDisabled")
+    total = comment_threads(i, state)
+    size = min(int(q.get("maxResults", 20)), COMMENT_PAGE_SIZE)
+    start = int(q.get("pageToken") or 0)
+    stop = min(total, start + size)
+    # order=time: newest (highest age) first
+    body = {"kind": "youtube#commentThreadListResponse",
+            "items": [_comment_thread(vid, total - 1 - k) for k in range(start, stop)]}
+    if stop < total:
+        body["nextPageToken"] = str(stop)
+    return body
+
+ROUTES = {"channels": _channels, "playlistItems": _playlist_items, "videos": _videos,
+          "commentThreads": _comment_threads}
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like googleapis.com
+    state: StandinState
+
+    def log_message(self, fmt, *args):  # quiet
+        pass
+
+    def _send(self, status: int, payload: Optional[bytes], headers: Dict[str, str]) -> None:
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(payload or b"")))
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        endpoint = url.path.rstrip("/").rsplit("/", 1)[-1]
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if self.state.latency_s:
+            time.sleep(self.state.latency_s)
+        route = ROUTES.get(endpoint)
+        if route is None:
+            self._send(404, b'{"error": {"code": 404}}', {"Content-Type": "application/json"})
+            return
+        if self.state.should_fail():
+            self.state.count(endpoint, 0)
+            self._send(503, b'{"error": {"code": 503, "errors": [{"reason": "backendError"}]}}',
+                       {"Content-Type": "application/json", "Retry-After": "0"})
+            return
+
+        try:
+            body = route(q, self.state)
+        except ApiError as e:
+            self.state.count(endpoint, 0)
+            err = {"error": {"code": e.status, "errors": [{"reason": e.reason}]}}
+            self._send(e.status, json.dumps(err).encode("utf-8"), {"Content-Type": "application/json"})
+            return
+        raw = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        etag = hashlib.md5(raw).hexdigest()
+        body["etag"] = etag
+        if self.headers.get("If-None-Match") == etag:
+            self.state.count(endpoint, 0, not_modified=True)
+            self._send(304, None, {"ETag": etag})
+            return
+        payload = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        headers = {"Content-Type": "application/json; charset=UTF-8", "ETag": etag}
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            payload = gzip.compress(payload, 5)
+            headers["Content-Encoding"] = "gzip"
+        self.state.count(endpoint, len(payload))
+        self._send(200, payload, headers)
+
+def start_server(
+    port: int = 0,
+    latency_ms: float = 0.0,
+    error_rate: float = 0.0,
+) -> Tuple[ThreadingHTTPServer, StandinState, str]:
+    """
+    Start the stand-in on a daemon thread; returns (server, state, base_url).
+    Call server.shutdown() when done.
+    """
+    state = StandinState(latency_ms=latency_ms, error_rate=error_rate)
+    handler = type("StandinHandler", (_Handler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="yt-standin", daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}/youtube/v3"
+
+def main():
+    parser = argparse.ArgumentParser(description="Local YouTube Data API stand-in")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server, _, base_url = start_server(args.port, args.latency_ms, args.error_rate)
+    print(f"Serving stand-in API at {base_url} (YT_BASE_URL); Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Deterministic synthetic videos.list items for benchmarks.
+"""
+import random
+from typing import Dict, List
+
+_CATEGORIES = ["1", "10", "20", "22", "24", "27"]
+_TAGS = ["kids", "song", "nursery", "rhymes", "music", "learning", "abc", "colors", "animals"]
+
+def make_video_item(i: int, rng: random.Random, channel_title: str = "Synthetic Channel") -> Dict:
+    year, day = 2010 + i % 14, 1 + i % 28
+    stats = {"viewCount": str(rng.randint(0, 10**9))}
+    if rng.random() > 0.05:
+        stats["likeCount"] = str(rng.randint(0, 10**6))
+    if rng.random() > 0.1:
+        stats["commentCount"] = str(rng.randint(0, 10**5))
+    snippet = {
+        "title": f"Synthetic video {i}",
+        "publishedAt": f"{year}-{1 + i % 12:02d}-{day:02d}T{i % 24:02d}:00:00Z",
+        "categoryId": rng.choice(_CATEGORIES),
+        "channelTitle": channel_title,
+        "description": f"Description for video {i} " + "lorem ipsum " * rng.randint(1, 20),
+    }
+    if rng.random() > 0.2:
+        snippet["tags"] = rng.sample(_TAGS, rng.randint(1, 5))
+    return {
+        "kind": "youtube#video",
+        "etag": f"etag{i}",
+        "id": f"vid{i:08d}",
+        "snippet": snippet,
+        "statistics": stats,
+        "contentDetails": {
+            "duration": f"PT{rng.randint(0, 2)}H{rng.randint(0, 59)}M{rng.randint(0, 59)}S",
+            "definition": rng.choice(["hd", "sd"]),
+            "caption": rng.choice(["true", "false"]),
+        },
+    }
+
+def make_video_items(n: int, seed: int = 0, channel_title: str = "Synthetic Channel") -> List[Dict]:
+    rng = random.Random(seed)
+    return [make_video_item(i, rng, channel_title) for i in range(n)]
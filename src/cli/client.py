@@ -0,0 +1,89 @@
+"""
+Thin client for the local fetch daemon (see daemon.py). Standard library only: a
+client run never imports pandas, requests or streamlit.
+"""
+import http.client
+import json
+import os
+import socket
+from typing import Any, Dict, Optional, Tuple
+
+# Same location as src.data.cache.DEFAULT_DIR, without importing the cache module
+_CACHE_DIR = os.getenv("YT_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "cache"))
+DEFAULT_ADDRESS = os.getenv("YT_DAEMON") or (
+    "unix:" + os.path.abspath(os.path.join(_CACHE_DIR, "ytfetch.sock"))
+    if hasattr(socket, "AF_UNIX") else "127.0.0.1:8765"
+)
+
+def parse_address(address: str) -> Tuple[str, Any]:
+    """
+    'unix:/path/to.sock' -> ("unix", path); 'host:port' -> ("tcp", (host, port)).
+    """
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+def _connection(address: str, timeout: Optional[float]) -> http.client.HTTPConnection:
+    kind, where = parse_address(address)
+    if kind == "unix":
+        return _UnixHTTPConnection(where, timeout=timeout)
+    return http.client.HTTPConnection(*where, timeout=timeout)
+
+def call(path: str, payload: Optional[Dict] = None, address: str = DEFAULT_ADDRESS,
+         timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    POST (or GET without a payload) a JSON request to the daemon and return its JSON reply.
+    Raises OSError (e.g. ConnectionRefusedError, FileNotFoundError) when no daemon listens.
+    """
+    conn = _connection(address, timeout)
+    try:
+        if payload is None:
+            conn.request("GET", path)
+        else:
+            body = json.dumps(payload).encode("utf-8")
+            conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        data = json.loads(resp.read().decode("utf-8") or "{}")
+        if resp.status >= 400:
+            raise RuntimeError(data.get("error", f"daemon returned HTTP {resp.status}"))
+        return data
+    finally:
+        conn.close()
+
+def is_running(address: str = DEFAULT_ADDRESS) -> bool:
+    try:
+        call("/health", address=address, timeout=2)
+        return True
+    except (OSError, RuntimeError, ValueError):
+        return False
+
+# Arguments naming local files; sent as absolute paths since the daemon has its own cwd
+PATH_ARGS = ("out", "out_dir", "handles_file", "metrics_file")
+
+def run_remote(args, address: str = DEFAULT_ADDRESS) -> int:
+    """
+    Run parsed CLI arguments in the daemon and print its output. Returns the exit status.
+    """
+    params = dict(vars(args))
+    for name in PATH_ARGS:
+        if params.get(name):
+            params[name] = os.path.abspath(params[name])
+    reply = call("/run", {"args": params}, address=address)
+    if reply.get("output"):
+        print(reply["output"], end="")
+    if reply.get("error"):
+        print(f"Error: {reply['error']}")
+        return 1
+    return 0
@@ -0,0 +1,202 @@
+"""
+Long-running local fetch service. Cron jobs and scripts pay interpreter and import
+startup (pandas, requests), a cold connection pool and cold caches on every CLI run.
+The daemon keeps all of that in one process: the keep-alive pool, the in-memory cache
+tier, the resolved channel map, the scheduler's quota budget and the ETag store.
+
+Clients (python -m src.cli.main --use-daemon ...) send their parsed arguments as JSON
+over a Unix socket (loopback TCP where Unix sockets are unavailable). The daemon runs
+them through the same code path as a local run and returns the printed output.
+Only the CLI's own options are accepted, and TCP is bound to loopback addresses only:
+anyone who can reach the daemon can make it read and write files as its user.
+Requests run concurrently, one thread each.
+"""
+import argparse
+import io
+import ipaddress
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, Optional
+
+from src.cli.client import DEFAULT_ADDRESS, is_running, parse_address
+from src.metrics import delta, metrics
+
+class _ThreadOutput(io.TextIOBase):
+    """
+    sys.stdout replacement that sends each request thread's prints to that request's
+    buffer; other threads write to the real stdout.
+    """
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def start(self) -> None:
+        self._local.buf = io.StringIO()
+
+    def stop(self) -> str:
+        buf, self._local.buf = self._local.buf, None
+        return buf.getvalue()
+
+    def write(self, s: str) -> int:
+        buf = getattr(self._local, "buf", None)
+        return (buf if buf is not None else self._stream).write(s)
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "ytfetch-daemon"
+
+    def _reply(self, status: int, body: object, content_type: str = "application/json") -> None:
+        data = body.encode("utf-8") if isinstance(body, str) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._reply(200, {"pid": os.getpid(), "uptime_s": round(time.time() - self.server.started_at, 1),
+                              "requests": self.server.requests})
+        elif self.path == "/metrics":
+            self._reply(200, metrics.prometheus(), "text/plain; version=0.0.4")
+        else:
+            self._reply(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length).decode("utf-8") or "{}")
+        except ValueError:
+            self._reply(400, {"error": "invalid JSON"})
+            return
+        if self.path == "/run":
+            self._reply(200, self.server.run(payload.get("args") or {}))
+        elif self.path == "/shutdown":
+            self._reply(200, {"ok": True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        else:
+            self._reply(404, {"error": f"unknown path {self.path}"})
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "local"
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+class _Service:
+    """
+    Mixin for both server flavours: request execution and bookkeeping.
+    """
+    daemon_threads = True
+    started_at = 0.0
+    requests = 0
+    output: Optional[_ThreadOutput] = None
+
+    def run(self, params: dict) -> dict:
+        from src.cli.main import build_parser, run
+
+        # Start from the CLI defaults so a request can only set options the CLI has
+        defaults = vars(build_parser().parse_args([]))
+        unknown = sorted(set(params) - set(defaults))
+        args = argparse.Namespace(**{**defaults, **{k: v for k, v in params.items() if k in defaults}})
+        self.requests += 1
+        before = metrics.snapshot()
+        t0 = time.perf_counter()
+        error = None
+        self.output.start()
+        try:
+            if unknown:
+                raise ValueError(f"unknown arguments: {', '.join(unknown)}")
+            run(args)
+        except Exception as e:  # reported to the client; the daemon keeps serving
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            wall_s = time.perf_counter() - t0
+            if getattr(args, "profile", False):
+                # Only this request's share of the process-wide metrics
+                print(metrics.report(wall_s=wall_s, snap=delta(before, metrics.snapshot())))
+            if getattr(args, "metrics_file", None):
+                metrics.write_textfile(args.metrics_file)
+            output = self.output.stop()
+        return {"output": output, "error": error, "seconds": round(wall_s, 3)}
+
+class _TCPServer(_Service, ThreadingHTTPServer):
+    pass
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixServer(_Service, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        pass
+
+def _warm_up() -> None:
+    # Pay the imports and cache loads once, before the first request
+    from src.services import channels, search, videos  # noqa: F401
+    from src.youtube_api.client import get_scheduler, get_transport
+
+    get_transport()
+    get_scheduler()
+    channels._load()
+
+def _is_loopback(host: str) -> bool:
+    try:
+        infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+    except socket.gaierror:
+        return False
+    return all(ipaddress.ip_address(info[4][0]).is_loopback for info in infos)
+
+def make_server(address: str):
+    """
+    Bind (but do not start) a daemon server on `address`. Call serve_forever() on it.
+    TCP addresses must resolve to loopback only; the daemon has no authentication.
+    """
+    kind, where = parse_address(address)
+    if kind == "unix":
+        if os.path.exists(where):
+            if is_running(address):
+                raise SystemExit(f"A daemon is already listening on {address}")
+            os.remove(where)  # left behind by a daemon that did not shut down cleanly
+        os.makedirs(os.path.dirname(where) or ".", exist_ok=True)
+        server = _UnixServer(where, _Handler)
+        os.chmod(where, 0o600)  # only this user may ask the daemon to read and write files
+    else:
+        if not _is_loopback(where[0]):
+            raise SystemExit(f"Refusing to serve on {address}: TCP daemons bind to loopback addresses only")
+        server = _TCPServer(where, _Handler)
+    server.started_at = time.time()
+    server.output = _ThreadOutput(sys.stdout)
+    return server
+
+def serve(address: str = DEFAULT_ADDRESS, watch: Iterable[str] = ()) -> None:
+    """
+    Serve CLI requests on `address` until interrupted or asked to shut down. Channels
+    in `watch` (plus settings.watchlist) are kept fresh by a background prewarmer.
+    """
+    t0 = time.perf_counter()
+    from src.config.settings import settings
+    from src.services.prewarm import Prewarmer
+
+    server = make_server(address)
+    _warm_up()
+    sys.stdout = server.output
+    warmer = Prewarmer([*watch, *settings.watchlist]).start()
+    print(f"Serving on {address} (pid {os.getpid()}, ready in {time.perf_counter() - t0:.2f}s)"
+          + (f", prewarming {len(warmer.handles)} channels" if warmer.handles else ""), flush=True)
+    try:
+        server.serve_forever(poll_interval=0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        warmer.stop()
+        server.server_close()
+        sys.stdout = server.output._stream
+        kind, where = parse_address(address)
+        if kind == "unix" and os.path.exists(where):
+            os.remove(where)
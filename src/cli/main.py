@@ -1,20 +1,431 @@
 import argparse
-from src.services.videos import fetch_channel_df
-from src.data.io import save_csv
+import os
+import sys
+import time
+from typing import List, Optional, Tuple
+from src.metrics import metrics
+
+# pandas, requests and the services are imported where they are used, so that the thin
+# daemon client (--use-daemon) starts in a few tens of milliseconds
+
+def read_handles(path: str) -> List[str]:
+    """
+    One handle per line; blank lines and '#' comments are ignored, duplicates dropped.
+    """
+    handles: List[str] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            h = line.split("#", 1)[0].strip()
+            if h and h not in handles:
+                handles.append(h)
+    return handles
+
+def _out_name(handle: str, suffix: str = ".csv") -> str:
+    return f"{handle.strip('@')}_videos{suffix}"
+
+def _export_opts(args) -> Tuple[str, Optional[str]]:
+    # --format/--compress, else whatever the --out file name implies
+    from src.data.io import export_format
+
+    fmt, compression = export_format(args.out)
+    return args.format or fmt, args.compress or compression
+
+def _written(args, *extra: str) -> Optional[List[str]]:
+    # Output columns: --columns plus `extra` (e.g. handle); None writes everything
+    return None if args.columns is None else [*args.columns, *extra]
+
+def _export(df, args, path: str, *extra: str) -> str:
+    """
+    Write df's --columns (plus `extra`) to `path` (or, with --partition-by, into the
+    --out-dir tree); returns where. Partition keys are read from df before projecting,
+    so month partitions work when --columns leaves out published_at.
+    """
+    from src.data.io import export_frame
+
+    fmt, compression = _export_opts(args)
+    if args.partition_by:
+        export_frame(df, args.out_dir, fmt, compression, partition_by=args.partition_by,
+                     columns=_written(args, *extra))
+        return f"{args.out_dir} (by {args.partition_by})"
+    export_frame(df, path, fmt, compression, columns=_written(args, *extra))
+    return path
+
+def _column_list(value: str) -> List[str]:
+    return [c.strip() for c in value.split(",") if c.strip()]
+
+def _with_sort_key(columns: Optional[List[str]]) -> Optional[List[str]]:
+    # Output is sorted by publish time, which is always fetched, so asking for it is free
+    return None if columns is None else list(dict.fromkeys([*columns, "published_at"]))
+
+def run_stream(args, handles: List[str]) -> None:
+    """
+    Streaming mode: channels are crawled one after another and written chunk by chunk,
+    so memory stays flat regardless of channel size. Output keeps playlist order
+    (newest first) and bypasses the snapshot cache.
+    """
+    from src.data.io import ChunkWriter, PartitionedWriter, export_suffix
+    from src.services.videos import STREAM_CHUNK_VIDEOS, iter_channel_frames
+
+    fmt, compression = _export_opts(args)
+    # Combined batch output says which channel each row came from
+    shared = bool(args.partition_by) or not args.out_dir
+    tag = shared and (bool(args.handles_file) or args.partition_by == "channel")
+    columns = args.columns
+    if args.partition_by:
+        if args.partition_by == "month":
+            columns = _with_sort_key(columns)  # the key; dropped again by the writer
+        combined = PartitionedWriter(args.out_dir, args.partition_by, fmt, compression,
+                                     columns=_written(args, *(["handle"] if tag else [])))
+    else:
+        combined = None if args.out_dir else ChunkWriter(args.out, fmt, compression)
+    try:
+        for h in handles:
+            t0 = time.perf_counter()
+            if combined is None:
+                os.makedirs(args.out_dir, exist_ok=True)
+                path = os.path.join(args.out_dir, _out_name(h, export_suffix(fmt, compression)))
+                writer = ChunkWriter(path, fmt, compression)
+            else:
+                path, writer = args.out_dir if args.partition_by else args.out, combined
+            start = writer.rows
+            try:
+                chunks = iter_channel_frames(h, chunk_size=args.chunk_size or STREAM_CHUNK_VIDEOS, columns=columns)
+                for chunk in chunks:
+                    writer.write(chunk.assign(handle=h) if tag else chunk)
+            except Exception as e:
+                print(f"{h}: failed after {writer.rows - start} rows: {e}")
+                continue
+            finally:
+                if writer is not combined:
+                    writer.close()
+            print(f"{h}: wrote {writer.rows - start} rows to {path} in {time.perf_counter() - t0:.2f}s")
+    finally:
+        if combined is not None:
+            combined.close()
+
+def print_summary(handle: str, top_tags: int = 10) -> None:
+    """
+    Channel dashboard from the pre-aggregated analytics (no row scan).
+    """
+    from src.services.analytics import get_channel_analytics, summarize
+
+    state = get_channel_analytics(handle)
+    if state is None:
+        print(f"{handle}: no cached data to summarize")
+        return
+    s = summarize(state, top_tags=top_tags)
+    t = s["totals"]
+    print(f"\n== {handle}: {t['videos']} videos, {t['views']:,} views, {t['likes']:,} likes, {t['comments']:,} comments")
+    if t["uploads_per_week"] is not None:
+        print(f"Uploads/week: {t['uploads_per_week']:.2f}   median gap: {t['median_gap_days']:.1f} days   "
+              f"first {t['first_published']:%Y-%m-%d}, last {t['last_published']:%Y-%m-%d}")
+    for title, key in (("Views per month (last 12)", "views_per_month"),
+                       ("Median duration by category", "duration_by_category"),
+                       ("Engagement by definition", "engagement_by_definition"),
+                       ("Engagement by caption", "engagement_by_caption"),
+                       ("Top tags", "top_tags")):
+        frame = s[key].tail(12) if key == "views_per_month" else s[key]
+        print(f"\n{title}:\n{frame.to_string(index=False)}")
+
+def run_prewarm(handles: List[str]) -> None:
+    """
+    Foreground prewarmer: keep every handle's snapshot fresh until interrupted.
+    """
+    from src.services.prewarm import Prewarmer
+
+    warmer = Prewarmer(handles)
+    print(f"Prewarming {len(handles)} channels, one refresh at most every {warmer.min_gap_s:.0f}s; Ctrl+C to stop")
+    try:
+        while True:
+            handle = warmer.run_once()
+            if handle is not None:
+                status = warmer.last_error.get(handle, "ok")
+                print(f"{time.strftime('%H:%M:%S')} {handle}: {status}")
+            time.sleep(max(0.5, min(60.0, warmer.next_run() - time.time())))
+    except KeyboardInterrupt:
+        pass
+
+def run_search(args) -> None:
+    """
+    Answer a keyword/tag lookup from the local search index (no API calls).
+    With --reindex, the cached snapshots of --handle/--handles-file are indexed first.
+    """
+    import pandas as pd
+    from src.services.search import index_cached, search_videos
+
+    handles = read_handles(args.handles_file) if args.handles_file else [args.handle] if args.handle else []
+    if args.reindex:
+        print(f"Indexed {index_cached(handles)} videos from {len(handles)} cached channels")
+    if not args.search and not args.tag:
+        return
+    t0 = time.perf_counter()
+    # --handle narrows the search to that channel
+    hits = search_videos(args.search or "", tags=args.tag or (), handle=args.handle, limit=args.limit)
+    elapsed_ms = 1000 * (time.perf_counter() - t0)
+    if hits.empty:
+        print(f"No matches ({elapsed_ms:.1f} ms)")
+        return
+    with pd.option_context("display.max_colwidth", 80, "display.width", 200):
+        print(hits.to_string(index=False))
+    print(f"{len(hits)} matches in {elapsed_ms:.1f} ms")
+
+def run_comments(args) -> None:
+    """
+    Harvest top-level comments of each channel into its append-only comment store.
+    """
+    from src.services.comments import harvest_comments
+
+    handles = read_handles(args.handles_file) if args.handles_file else [args.handle]
+    fmt = args.format
+    # gzip for the text formats; Parquet keeps its own (snappy) codec unless asked
+    compression = None if args.compress == "none" else args.compress or (None if fmt == "parquet" else "gzip")
+    kwargs = {"root": args.out_dir} if args.out_dir else {}
+    for h in handles:
+        run = harvest_comments(
+            h, since=args.since, max_per_video=args.max_per_video, max_workers=args.max_workers,
+            fmt=fmt, compression=compression, full=args.full, **kwargs,
+        )
+        print(f"{h}: {run.comments} new comments from {run.videos} videos ({run.skipped} unchanged, "
+              f"{run.unavailable} unavailable, {run.failed} failed) in {run.seconds:.2f}s"
+              + (f" -> {run.path}" if run.path else ""))
+        if run.error:
+            print(f"{h}: stopped early: {run.error}")
+            break
+
+def comments_main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli.main comments",
+        description="Harvest top-level comment threads into an append-only store per channel "
+                    "(new part file per run; refreshes only page videos with new comments)",
+    )
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--handle", help="Channel handle, e.g., @CoComelon")
+    src.add_argument("--handles-file", help="File with one channel handle per line")
+    parser.add_argument("--out-dir", help="Store root (default: cache/comments); one directory per channel")
+    parser.add_argument("--format", choices=["csv", "jsonl", "parquet"], default="jsonl",
+                        help="Part file format (default: jsonl)")
+    parser.add_argument("--compress", choices=["gzip", "zstd", "none"],
+                        help="Part file compression (default: gzip; Parquet: snappy)")
+    parser.add_argument("--since", metavar="DATE",
+                        help="Only comments published after this date/time (UTC unless an offset is given)")
+    parser.add_argument("--max-per-video", type=int, default=None,
+                        help="Cap on new comment threads per video (newest first)")
+    parser.add_argument("--max-workers", type=int, default=None,
+                        help="Videos paged concurrently (default: settings.max_workers)")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore stored watermarks and page every video again")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print a per-stage timing and counter breakdown when done")
+    args = parser.parse_args(argv)
+    if args.since:
+        import pandas as pd
+
+        try:
+            pd.Timestamp(args.since)
+        except ValueError as e:
+            parser.error(f"--since: {e}")
+
+    metrics.reset()
+    t0 = time.perf_counter()
+    try:
+        run_comments(args)
+    finally:
+        if args.profile:
+            print(metrics.report(wall_s=time.perf_counter() - t0))
+
+def run_batch(args) -> None:
+    import pandas as pd
+    from src.data.io import export_suffix, sort_newest_first
+    from src.services.videos import fetch_channels_df
+    from src.youtube_api.client import get_scheduler, get_transport
+    from src.youtube_api.scheduler import BATCH, request_priority
+
+    handles = read_handles(args.handles_file)
+    if not handles:
+        print(f"No handles found in {args.handles_file}")
+        return
+    if args.prewarm:
+        run_prewarm(handles)
+        return
+    if args.stream:
+        with request_priority(BATCH):
+            run_stream(args, handles)
+        return
+
+    t0 = time.perf_counter()
+    # Background crawl: yields API tokens to interactive (Streamlit) requests
+    with request_priority(BATCH):
+        frames, runs = fetch_channels_df(handles, max_workers=args.max_workers, columns=_with_sort_key(args.columns))
+    elapsed = time.perf_counter() - t0
+
+    if args.out_dir and not args.partition_by:
+        os.makedirs(args.out_dir, exist_ok=True)
+        suffix = export_suffix(*_export_opts(args))
+        for h, df in frames.items():
+            if not df.empty:
+                _export(sort_newest_first(df), args, os.path.join(args.out_dir, _out_name(h, suffix)))
+        where = "per-channel files to " + args.out_dir
+    else:
+        parts = [df.assign(handle=h) for h, df in frames.items() if not df.empty]
+        combined = sort_newest_first(pd.concat(parts, ignore_index=True)) if parts else pd.DataFrame()
+        where = _export(combined, args, args.out, "handle")
+
+    print(f"{'handle':<32} {'source':<8} {'videos':>8} {'seconds':>9} {'videos/s':>10}")
+    for r in runs:
+        print(f"{r.handle:<32} {r.source:<8} {r.videos:>8} {r.seconds:>9.2f} {r.videos_per_s:>10.1f}"
+              + (f"  {r.error}" if r.error else ""))
+    total = sum(r.videos for r in runs)
+    stats = get_transport().stats.snapshot()
+    print(f"Total: {total} videos from {len(runs)} channels in {elapsed:.2f}s "
+          f"({total / elapsed if elapsed else 0:.1f} videos/s, {stats['requests']} requests)")
+    quota = get_scheduler().budget.snapshot()
+    print(f"Quota: {quota['total_used']}/{quota['daily_units']} units {quota['used']}")
+    etags = get_transport().etags
+    if etags is not None:
+        e = etags.snapshot()
+        print(f"Conditional requests: {e['not_modified']} not modified, {e['modified']} changed, "
+              f"{e['unconditional']} unconditional (hit rate {e['hit_rate']:.0%})")
+    print(f"Wrote {where}")
+    if args.summary:
+        for r in runs:
+            if r.source != "error":
+                print_summary(r.handle)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Fetch YouTube channel videos to CSV",
+                                     epilog="Comment harvesting: python -m src.cli.main comments --help")
+    src = parser.add_mutually_exclusive_group()
+    src.add_argument("--handle", help="Channel handle, e.g., @CoComelon")
+    src.add_argument("--handles-file", help="Batch mode: file with one channel handle per line")
+    parser.add_argument("--out", default="videos.csv",
+                        help="Output path (combined output in batch mode); the extension picks the format "
+                             "and compression, e.g. videos.csv, videos.jsonl.gz, videos.parquet")
+    parser.add_argument("--out-dir", help="Batch mode: write one file per channel into this directory")
+    parser.add_argument("--max-workers", type=int, default=None,
+                        help="Global cap on concurrent API requests (default: settings.max_workers)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write output chunk by chunk with bounded memory (skips the cache)")
+    parser.add_argument("--format", choices=["csv", "jsonl", "parquet"],
+                        help="Output format (default: from the --out extension; parquet needs pyarrow)")
+    parser.add_argument("--compress", choices=["gzip", "zstd"],
+                        help="Compress CSV/JSONL output, or pick the Parquet codec (default: from a .gz/.zst "
+                             "--out suffix; zstd CSV/JSONL needs the zstandard package)")
+    parser.add_argument("--partition-by", choices=["channel", "month"],
+                        help="With --out-dir: write a directory per channel or publish month "
+                             "(DIR/month=2024-01/videos.csv, ...)")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Streaming mode: rows per written chunk (default: 1000)")
+    parser.add_argument("--columns", type=_column_list, metavar="COL,COL,...",
+                        help="Only fetch and write these columns, e.g. video_id,published_at,view_count "
+                             "(the API is asked for just the parts/fields behind them)")
+    parser.add_argument("--summary", action="store_true",
+                        help="Print pre-aggregated channel dashboards after fetching")
+    parser.add_argument("--prewarm", action="store_true",
+                        help="With --handles-file: keep those channels' cache fresh until interrupted")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print a per-stage timing and counter breakdown when done")
+    parser.add_argument("--metrics-file", help="Write Prometheus text-format metrics to this path when done")
+    parser.add_argument("--search", metavar="QUERY",
+                        help="Look up cached videos whose title/description contains every word (no fetch)")
+    parser.add_argument("--tag", action="append",
+                        help="Look up cached videos with this exact tag (repeatable; combines with --search)")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum number of search results")
+    parser.add_argument("--reindex", action="store_true",
+                        help="Index the cached snapshots of --handle/--handles-file for search (no fetch)")
+    daemon = parser.add_argument_group("daemon mode")
+    daemon.add_argument("--serve", action="store_true",
+                        help="Run the fetch daemon in the foreground (with --handles-file: also keep those warm)")
+    daemon.add_argument("--use-daemon", action="store_true",
+                        help="Send this run to the daemon (implied when YT_DAEMON is set); runs locally if none")
+    daemon.add_argument("--stop-daemon", action="store_true", help="Ask the running daemon to exit")
+    daemon.add_argument("--daemon", metavar="ADDRESS", help="unix:/path or host:port "
+                        "(default: $YT_DAEMON, else unix:cache/ytfetch.sock)")
+    return parser
 
 def main():
-    parser = argparse.ArgumentParser(description="Fetch YouTube channel videos to CSV")
-    parser.add_argument("--handle", required=True, help="Channel handle, e.g., @CoComelon")
-    parser.add_argument("--out", default="videos.csv", help="Output CSV path")
+    if sys.argv[1:2] == ["comments"]:
+        comments_main(sys.argv[2:])
+        return
+    parser = build_parser()
     args = parser.parse_args()
+    lookup = bool(args.search or args.tag or args.reindex)
+    if not (args.handle or args.handles_file or lookup or args.serve or args.stop_daemon):
+        parser.error("one of the arguments --handle --handles-file --search --tag --reindex --serve is required")
+    if args.prewarm and not args.handles_file:
+        parser.error("--prewarm needs --handles-file")
+    if args.partition_by and not args.out_dir:
+        parser.error("--partition-by needs --out-dir")
+
+    from src.cli import client
+
+    address = args.daemon or client.DEFAULT_ADDRESS
+    if args.serve:
+        from src.cli.daemon import serve
+
+        serve(address, watch=read_handles(args.handles_file) if args.handles_file else ())
+        return
+    if args.stop_daemon:
+        try:
+            client.call("/shutdown", {}, address=address, timeout=10)
+            print(f"Stopped the daemon on {address}")
+        except OSError:
+            print(f"No daemon on {address}")
+        return
+    if (args.use_daemon or os.getenv("YT_DAEMON")) and not args.prewarm:
+        try:
+            sys.exit(client.run_remote(args, address=address))
+        except OSError as e:
+            print(f"Daemon unavailable on {address} ({e}); running locally", file=sys.stderr)
+
+    if args.columns:
+        from src.data.io import source_columns
+
+        try:
+            source_columns(args.columns)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.max_workers:
+        from src.youtube_api.client import get_transport
+
+        # Process-wide, so only here: a daemon serves other clients with the same transport
+        get_transport().set_max_in_flight(args.max_workers)
+
+    metrics.reset()
+    t0 = time.perf_counter()
+    try:
+        run(args)
+    finally:
+        if args.profile:
+            print(metrics.report(wall_s=time.perf_counter() - t0))
+        if args.metrics_file:
+            metrics.write_textfile(args.metrics_file)
+
+def run(args) -> None:
+    from src.data.io import sort_newest_first
+    from src.services.videos import fetch_channel_df
+
+    if args.search or args.tag or args.reindex:
+        run_search(args)
+        return
+    if args.handles_file:
+        run_batch(args)
+        return
+    if args.stream:
+        run_stream(args, [args.handle])
+        return
 
-    df = fetch_channel_df(args.handle)
+    df = fetch_channel_df(args.handle, columns=_with_sort_key(args.columns))
     if df.empty:
         print("No videos found or failed to fetch.")
         return
-    df = df.sort_values("published_at", ascending=False).reset_index(drop=True)
-    save_csv(df, args.out)
-    print(f"Wrote {len(df)} rows to {args.out}")
+    df = sort_newest_first(df)
+    extra = ["handle"] if args.partition_by == "channel" else []
+    if extra:
+        df = df.assign(handle=args.handle)
+    print(f"Wrote {len(df)} rows to {_export(df, args, args.out, *extra)}")
+    if args.summary:
+        print_summary(args.handle)
 
 if __name__ == "__main__":
     main()
@@ -1,14 +1,55 @@
 # src/config/settings.py
 import os
-import streamlit as st
+import sys
 from dataclasses import dataclass
+from typing import Dict
+
+def _secrets_files() -> Dict[str, object]:
+    # The files Streamlit reads (global, then project-level overrides), parsed directly so
+    # that CLI runs never import streamlit (~0.5 s of startup)
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11: Streamlit secrets only apply inside the app
+        return {}
+    out: Dict[str, object] = {}
+    for path in (os.path.expanduser("~/.streamlit/secrets.toml"), os.path.join(os.getcwd(), ".streamlit", "secrets.toml")):
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                out.update(tomllib.load(f))
+    return out
+
+def _secret(name: str, default: str = "") -> str:
+    """
+    Streamlit secret (st.secrets inside the app, the secrets.toml files elsewhere),
+    falling back to the environment.
+    """
+    st = sys.modules.get("streamlit")
+    if st is not None:
+        return st.secrets.get(name, os.getenv(name, default))
+    return str(_secrets_files().get(name, os.getenv(name, default)))
 
 @dataclass(frozen=True)
 class Settings:
-    yt_api_key: str = st.secrets.get("YT_API_KEY", os.getenv("YT_API_KEY", ""))
-    base_url: str = "https://www.googleapis.com/youtube/v3"
+    yt_api_key: str = _secret("YT_API_KEY")
+    base_url: str = os.getenv("YT_BASE_URL", "https://www.googleapis.com/youtube/v3")
     timeout_s: int = 30
     batch_size: int = 50
+    max_workers: int = 8  # concurrent videos.list requests per crawl
+    http_pool_size: int = 16  # keep-alive connections shared by all client threads
+    hot_window: int = 50  # most recent videos whose statistics are re-fetched on refresh
+    requests_per_s: float = 50.0  # token-bucket refill rate shared by all API calls
+    burst: int = 50  # token-bucket capacity
+    # Local quota budget, counted per process and not persisted (the CLI, daemon and app
+    # each spend their own); set YT_DAILY_QUOTA_UNITS to the project's real quota
+    daily_quota_units: int = int(os.getenv("YT_DAILY_QUOTA_UNITS", "10000"))
+    max_retries: int = 5  # for 429/5xx/rate-limit 403s and connection errors
+    etag_cache: bool = True  # send If-None-Match and serve 304s from the local ETag store
+    etag_max_bytes: int = 256 * 2**20
+    history: bool = True  # append per-video statistics to cache/history.sqlite on every refresh
+    search_index: bool = True  # keep cache/search.sqlite (titles, descriptions, tags) in step with refreshes
+    crawl_checkpoints: bool = True  # journal full crawls to cache/journals/ so a failed crawl resumes where it stopped
+    # Channels kept fresh by the background prewarmer (comma-separated handles)
+    watchlist: tuple = tuple(h.strip() for h in os.getenv("YT_WATCHLIST", "").split(",") if h.strip())
 
 settings = Settings()
 
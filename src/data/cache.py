@@ -1,22 +1,233 @@
+import contextlib
 import json
 import os
+import threading
 import time
-from typing import Any, Optional
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, TypeVar
 
-DEFAULT_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "cache")
+import pandas as pd
+from src.metrics import metrics
+from .columnar import read_frame, write_frame
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+T = TypeVar("T")
+
+DEFAULT_DIR = os.getenv("YT_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "cache"))
 DEFAULT_TTL_SECONDS = 3600  # 1 hour
+MEMORY_MAX_BYTES = 256 * 2**20  # in-process LRU tier, sized by on-disk bytes of its entries
+DISK_MAX_BYTES = 2 * 2**30  # least-recently-used files are evicted beyond this
+_CACHE_SUFFIXES = (".json", ".ycol")
+_STALE_TMP_SECONDS = 3600
 
 def _ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
-def _safe_key(key: str) -> str:
-    # Make a filesystem-safe file name from a cache key (e.g., '@CoComelon')
+def safe_key(key: str) -> str:
+    """
+    Filesystem-safe file or directory name for a key (e.g., '@CoComelon' -> '_CoComelon').
+    """
     return "".join(c if c.isalnum() or c in ("-", "_") else "_" for c in key)
 
 def _cache_path(cache_dir: str, key: str) -> str:
-    fname = f"{_safe_key(key)}.json"
+    fname = f"{safe_key(key)}.json"
     return os.path.join(cache_dir, fname)
 
+def _frame_path(cache_dir: str, key: str) -> str:
+    fname = f"{safe_key(key)}.ycol"
+    return os.path.join(cache_dir, fname)
+
+def _signature(st: os.stat_result) -> Tuple[int, int, int]:
+    # Writers publish via rename, so a rewrite always changes the inode
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+class _MemoryTier:
+    """
+    Process-wide LRU of decoded cache files, keyed by path.
+    Entries are validated against the file's (inode, mtime, size) on every lookup, so a
+    write from another process or session is picked up without re-reading
+    unchanged files. Values are shared between callers: treat them as read-only.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int, int], int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str, st: os.stat_result) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != _signature(st):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, path: str, st: os.stat_result, value: Any) -> None:
+        with self._lock:
+            self._pop(path)
+            if st.st_size > self.max_bytes:
+                return
+            self._entries[path] = (_signature(st), st.st_size, value)
+            self._bytes += st.st_size
+            while self._bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def _pop(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def discard(self, path: str) -> None:
+        with self._lock:
+            self._pop(path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+_memory = _MemoryTier(MEMORY_MAX_BYTES)
+
+def memory_stats() -> Dict[str, int]:
+    return {"hits": _memory.hits, "misses": _memory.misses,
+            "entries": len(_memory._entries), "bytes": _memory._bytes}
+
+@contextlib.contextmanager
+def _locked(path: str) -> Iterator[None]:
+    # Cross-process exclusive lock on a sidecar file; readers never need it
+    # because writers only ever publish complete files via rename.
+    with open(f"{path}.lock", "a+b") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+def _try_lock(path: str) -> Optional[Any]:
+    # Non-blocking _locked for long holds: the open lock file (release with _unlock),
+    # or None while another process or thread holds it
+    lock_path = f"{path}.lock"
+    fh = open(lock_path, "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+        # The holder may have removed the file (see _unlock) after we opened it
+        if os.fstat(fh.fileno()).st_ino != os.stat(lock_path).st_ino:
+            raise OSError("lock file replaced")
+    except OSError:
+        fh.close()
+        return None
+    return fh
+
+def _unlock(fh: Any, remove: bool = False) -> None:
+    # remove: also delete the lock file, for locks on files that are going away
+    if remove:
+        try:
+            os.remove(fh.name)
+        except OSError:
+            pass
+    try:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        fh.close()
+
+def _atomic_write(path: str, write: Callable[[str], None]) -> None:
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def _touch(path: str, st: os.stat_result) -> None:
+    # Record the read in atime (mtime untouched) for disk LRU; works on noatime mounts too
+    try:
+        os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+    except OSError:
+        pass
+
+def _remove(path: str) -> None:
+    _memory.discard(path)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _evict(cache_dir: str, max_bytes: int, keep: str = "") -> None:
+    """
+    Delete least-recently-used cache files until the directory fits in max_bytes.
+    Also sweeps temp files left behind by crashed writers.
+    """
+    files = []
+    total = 0
+    now = time.time()
+    with os.scandir(cache_dir) as it:
+        for e in it:
+            if not e.is_file():
+                continue
+            st = e.stat()
+            if e.name.endswith(".tmp") and now - st.st_mtime > _STALE_TMP_SECONDS:
+                _remove(e.path)
+            elif e.name.endswith(_CACHE_SUFFIXES):
+                files.append((st.st_atime_ns, st.st_size, e.path))
+                total += st.st_size
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        if os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        _remove(path)
+        total -= size
+
+def get_cache_entry(
+    key: str,
+    cache_dir: str = DEFAULT_DIR,
+) -> Optional[Tuple[float, Any]]:
+    """
+    Return (saved_at, payload) for a cached key regardless of its age, else None.
+    Lets callers reuse an expired snapshot as the base for an incremental refresh.
+    """
+    path = _cache_path(cache_dir, key)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    blob = _memory.get(path, st)
+    if blob is None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                blob = json.load(f)
+        except Exception:
+            return None
+        _memory.put(path, st, blob)
+    _touch(path, st)
+    return blob.get("saved_at", 0), blob.get("payload", None)
+
 def get_cache(
     key: str,
     cache_dir: str = DEFAULT_DIR,
@@ -26,44 +237,158 @@ def get_cache(
     Return cached JSON if present and not expired, else None.
     { "saved_at": epoch_seconds, "payload": <any JSON-serializable> }
     """
-    path = _cache_path(cache_dir, key)
-    if not os.path.exists(path):
+    entry = get_cache_entry(key, cache_dir)
+    if entry is None:
         return None
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            blob = json.load(f)
-        saved_at = blob.get("saved_at", 0)
-        if time.time() - saved_at > ttl_seconds:
-            return None
-        return blob.get("payload", None)
-    except Exception:
+    saved_at, payload = entry
+    if time.time() - saved_at > ttl_seconds:
         return None
+    return payload
 
 def set_cache(
     key: str,
     payload: Any,
     cache_dir: str = DEFAULT_DIR,
+    max_bytes: int = DISK_MAX_BYTES,
 ) -> None:
     _ensure_dir(cache_dir)
     path = _cache_path(cache_dir, key)
     blob = {"saved_at": int(time.time()), "payload": payload}
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(blob, f, ensure_ascii=False)
+
+    def write(tmp: str) -> None:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(blob, f, ensure_ascii=False)
+
+    with _locked(path):
+        _atomic_write(path, write)
+        _memory.discard(path)
+    _evict(cache_dir, max_bytes, keep=path)
+
+def get_frame_entry(
+    key: str,
+    cache_dir: str = DEFAULT_DIR,
+    use_mmap: bool = True,
+) -> Optional[Tuple[float, pd.DataFrame, Dict[str, Any]]]:
+    """
+    Return (saved_at, df, meta) for a cached DataFrame regardless of its age, else None.
+    Frames live in the columnar .ycol format (see columnar.py); numeric columns of the
+    returned frame are read-only views over a memory map when use_mmap is set.
+    Falls back to a legacy JSON records entry so existing caches keep working.
+    """
+    with metrics.stage("cache_read"):
+        entry, tier = _read_frame_entry(key, cache_dir, use_mmap)
+    metrics.add("cache_lookups", tier=tier)
+    return entry
+
+def _read_frame_entry(
+    key: str,
+    cache_dir: str,
+    use_mmap: bool,
+) -> Tuple[Optional[Tuple[float, pd.DataFrame, Dict[str, Any]]], str]:
+    path = _frame_path(cache_dir, key)
+    try:
+        st = os.stat(path)
+    except OSError:
+        st = None
+    if st is not None:
+        hit, tier = _memory.get(path, st), "memory"
+        if hit is None:
+            try:
+                df, meta = read_frame(path, use_mmap=use_mmap)
+            except Exception:
+                return None, "error"
+            hit, tier = (meta.get("saved_at", 0), df, meta), "disk"
+            _memory.put(path, st, hit)
+        _touch(path, st)
+        return hit, tier
+    entry = get_cache_entry(key, cache_dir)
+    if entry is None or not isinstance(entry[1], list) or not entry[1]:
+        return None, "miss"
+    return (entry[0], pd.DataFrame(entry[1]), {}), "legacy"
+
+def get_frame(
+    key: str,
+    cache_dir: str = DEFAULT_DIR,
+    ttl_seconds: int = DEFAULT_TTL_SECONDS,
+) -> Optional[pd.DataFrame]:
+    """
+    Return the cached DataFrame if present and not expired, else None.
+    """
+    entry = get_frame_entry(key, cache_dir)
+    if entry is None or time.time() - entry[0] > ttl_seconds:
+        return None
+    return entry[1]
+
+def set_frame(
+    key: str,
+    df: pd.DataFrame,
+    cache_dir: str = DEFAULT_DIR,
+    meta: Optional[Dict[str, Any]] = None,
+    max_bytes: int = DISK_MAX_BYTES,
+) -> int:
+    """
+    Store df (plus meta) as the frame for `key`; returns the saved_at stamp that
+    get_frame_entry will report for it.
+    """
+    _ensure_dir(cache_dir)
+    path = _frame_path(cache_dir, key)
+    saved_at = int(time.time())
+    # Write aside and rename: readers may hold a memory map of the old file
+    with metrics.stage("cache_write"), _locked(path):
+        _atomic_write(path, lambda tmp: write_frame(df, tmp, meta={**(meta or {}), "saved_at": saved_at}))
+        _memory.discard(path)
+    legacy = _cache_path(cache_dir, key)
+    if os.path.exists(legacy):
+        _remove(legacy)
+    _evict(cache_dir, max_bytes, keep=path)
+    return saved_at
 
 def clear_cache(key: str, cache_dir: str = DEFAULT_DIR) -> None:
-    path = _cache_path(cache_dir, key)
-    if os.path.exists(path):
-        try:
-            os.remove(path)
-        except OSError:
-            pass
+    for path in (_cache_path(cache_dir, key), _frame_path(cache_dir, key)):
+        if os.path.exists(path):
+            _remove(path)
 
 def clear_all(cache_dir: str = DEFAULT_DIR) -> None:
     if not os.path.isdir(cache_dir):
         return
     for name in os.listdir(cache_dir):
-        if name.endswith(".json"):
-            try:
-                os.remove(os.path.join(cache_dir, name))
-            except OSError:
-                pass
+        if name.endswith(_CACHE_SUFFIXES + (".lock",)):
+            _remove(os.path.join(cache_dir, name))
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into one execution: the first
+    caller runs fn, everyone arriving while it is in flight waits and receives
+    the same result (or exception).
+    """
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result: Any = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, "SingleFlight._Call"] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = SingleFlight._Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
@@ -0,0 +1,194 @@
+"""
+Columnar binary frame format used by the on-disk DataFrame cache.
+
+Layout (little-endian):
+    b"YTCOL1\\0\\0"               8-byte magic
+    uint32 header_len            length of the JSON header
+    header (utf-8 JSON)          nrows, per-column kind/dtype/buffer offsets, user meta
+    padding to 64 bytes
+    column buffers               each 64-byte aligned, raw numpy arrays
+
+Numeric, boolean, datetime and categorical columns are stored as typed arrays
+(plus a validity mask where nulls exist) and are rebuilt with np.frombuffer over
+a read-only memory map, so a cache hit does not copy them. String columns are
+stored as one utf-8 blob with character offsets, so decoding is a single
+bytes.decode() followed by slicing.
+"""
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"YTCOL1\0\0"
+ALIGN = 64
+
+def _pad(n: int) -> int:
+    return (-n) % ALIGN
+
+class _Writer:
+    def __init__(self):
+        self.buffers: List[bytes] = []
+        self.offset = 0
+
+    def add(self, arr: np.ndarray) -> List[Any]:
+        raw = np.ascontiguousarray(arr).tobytes()
+        ref = [self.offset, len(raw), arr.dtype.str]
+        self.buffers.append(raw)
+        self.buffers.append(b"\0" * _pad(len(raw)))
+        self.offset += len(raw) + _pad(len(raw))
+        return ref
+
+def _encode_strings(w: _Writer, values: pd.Series) -> Dict[str, Any]:
+    mask = values.isna().to_numpy()
+    strs = ["" if m else str(v) for v, m in zip(values.tolist(), mask)]
+    offsets = np.zeros(len(strs) + 1, dtype="<i8")
+    np.cumsum([len(s) for s in strs], out=offsets[1:])
+    spec = {
+        "offsets": w.add(offsets),
+        "data": w.add(np.frombuffer("".join(strs).encode("utf-8"), dtype="u1")),
+    }
+    if mask.any():
+        spec["mask"] = w.add(mask)
+    return spec
+
+def _encode_column(w: _Writer, s: pd.Series) -> Dict[str, Any]:
+    dtype = s.dtype
+    col: Dict[str, Any] = {"dtype": str(dtype)}
+    if isinstance(dtype, pd.CategoricalDtype):
+        col["kind"] = "category"
+        col["categories"] = [str(c) for c in dtype.categories]
+        col["ordered"] = bool(dtype.ordered)
+        col["codes"] = w.add(s.cat.codes.to_numpy().astype("<i4"))
+    elif isinstance(dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_dtype(dtype):
+        col["kind"] = "datetime"
+        col["tz"] = str(dtype.tz) if isinstance(dtype, pd.DatetimeTZDtype) else None
+        # Stored as UTC wall time in the column's own resolution; NaT survives as int64 min
+        naive = s.dt.tz_convert("UTC").dt.tz_localize(None) if col["tz"] else s
+        col["values"] = w.add(naive.to_numpy())
+    elif isinstance(dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_integer_dtype(dtype):
+        col["kind"] = "masked_int"
+        mask = s.isna().to_numpy()
+        col["values"] = w.add(s.fillna(0).to_numpy(dtype.numpy_dtype))
+        col["mask"] = w.add(mask)
+    elif pd.api.types.is_bool_dtype(dtype) and not isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        col["kind"] = "numpy"
+        col["values"] = w.add(s.to_numpy())
+    elif pd.api.types.is_numeric_dtype(dtype) and not isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        col["kind"] = "numpy"
+        col["values"] = w.add(s.to_numpy())
+    elif pd.api.types.is_string_dtype(dtype) or pd.api.types.is_object_dtype(dtype):
+        non_null = s.dropna()
+        if all(isinstance(v, str) for v in non_null.tolist()):
+            col["kind"] = "string"
+        else:
+            # Mixed objects (e.g. ints with None from JSON records): keep exact values as JSON text
+            col["kind"] = "json"
+            s = s.map(lambda v: None if v is None or (isinstance(v, float) and np.isnan(v)) else json.dumps(v))
+        col.update(_encode_strings(w, s))
+    else:
+        raise TypeError(f"Unsupported column dtype for columnar cache: {dtype}")
+    return col
+
+def write_frame(df: pd.DataFrame, path: str, meta: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Serialize df to the columnar format at path. `meta` is stored verbatim in the header.
+    """
+    w = _Writer()
+    columns = []
+    for name in df.columns:
+        spec = _encode_column(w, df[name])
+        spec["name"] = str(name)
+        columns.append(spec)
+    header = json.dumps(
+        {"nrows": int(len(df)), "columns": columns, "meta": meta or {}},
+        ensure_ascii=False,
+    ).encode("utf-8")
+    prefix = MAGIC + struct.pack("<I", len(header)) + header
+    prefix += b"\0" * _pad(len(prefix))
+    with open(path, "wb") as f:
+        f.write(prefix)
+        for buf in w.buffers:
+            f.write(buf)
+
+def _view(buf, base: int, ref: List[Any]) -> np.ndarray:
+    offset, nbytes, dtype = ref
+    dt = np.dtype(dtype)
+    return np.frombuffer(buf, dtype=dt, count=nbytes // dt.itemsize, offset=base + offset)
+
+def _decode_strings(buf, base: int, col: Dict[str, Any]) -> List[Optional[str]]:
+    offsets = _view(buf, base, col["offsets"]).tolist()
+    text = _view(buf, base, col["data"]).tobytes().decode("utf-8")
+    out: List[Optional[str]] = [text[a:b] for a, b in zip(offsets, offsets[1:])]
+    if "mask" in col:
+        for i in np.flatnonzero(_view(buf, base, col["mask"])):
+            out[i] = None
+    return out
+
+def _decode_column(buf, base: int, col: Dict[str, Any]):
+    kind = col["kind"]
+    if kind == "numpy":
+        return _view(buf, base, col["values"])
+    if kind == "masked_int":
+        values = _view(buf, base, col["values"])
+        mask = _view(buf, base, col["mask"])
+        return pd.arrays.IntegerArray(values, mask)
+    if kind == "category":
+        dtype = pd.CategoricalDtype(col["categories"], ordered=col["ordered"])
+        return pd.Categorical.from_codes(_view(buf, base, col["codes"]), dtype=dtype)
+    if kind == "datetime":
+        idx = pd.DatetimeIndex(_view(buf, base, col["values"]))
+        return idx.tz_localize("UTC").tz_convert(col["tz"]) if col["tz"] else idx
+    if kind == "string":
+        values = _decode_strings(buf, base, col)
+        if col["dtype"] == "object":
+            return np.array(values, dtype=object)
+        return pd.array(values, dtype=col["dtype"])
+    if kind == "json":
+        return np.array(
+            [None if v is None else json.loads(v) for v in _decode_strings(buf, base, col)],
+            dtype=object,
+        )
+    raise ValueError(f"Unknown column kind: {kind}")
+
+def read_header(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        head = f.read(len(MAGIC) + 4)
+        if head[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a columnar cache file: {path}")
+        (hlen,) = struct.unpack("<I", head[len(MAGIC):])
+        return json.loads(f.read(hlen).decode("utf-8"))
+
+def read_frame(
+    path: str,
+    columns: Optional[List[str]] = None,
+    use_mmap: bool = True,
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Load a frame written by write_frame, returning (df, meta).
+    With use_mmap=True numeric columns are zero-copy views over a read-only mapping.
+    `columns` restricts decoding to a subset of columns.
+    """
+    with open(path, "rb") as f:
+        if use_mmap and os.fstat(f.fileno()).st_size > 0:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buf = f.read()
+    if bytes(buf[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"Not a columnar cache file: {path}")
+    (hlen,) = struct.unpack_from("<I", buf, len(MAGIC))
+    start = len(MAGIC) + 4
+    header = json.loads(bytes(buf[start:start + hlen]).decode("utf-8"))
+    base = start + hlen
+    base += _pad(base)
+
+    wanted = set(columns) if columns is not None else None
+    data: Dict[str, Any] = {}
+    for col in header["columns"]:
+        if wanted is None or col["name"] in wanted:
+            data[col["name"]] = _decode_column(buf, base, col)
+    df = pd.DataFrame(data, index=pd.RangeIndex(header["nrows"]), copy=False)
+    return df, header.get("meta", {})
@@ -0,0 +1,95 @@
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.youtube_api.parsers import COMMENT_FIELDS
+from .cache import DEFAULT_DIR, _atomic_write, _locked, safe_key
+from .io import ChunkWriter, export_format, export_suffix
+
+COMMENTS_DIR = os.path.join(DEFAULT_DIR, "comments")
+_STATE_FILE = "state.json"
+_COUNTS = ("like_count", "reply_count")
+
+class CommentStore:
+    """
+    Append-only comment storage for one channel under root/<handle>/. Each harvest
+    streams into a new part file (part-<time_ns>.jsonl.gz, ...) and older parts
+    are never rewritten. state.json holds a watermark per video: the newest comment
+    time stored ("newest") and the video's commentCount when it was harvested
+    ("count"), so refreshes can skip unchanged videos and stop paging at known
+    comments. A comment stored by two harvests (e.g. after a full re-harvest) is
+    in two parts; load() keeps its latest copy.
+    """
+    def __init__(self, handle: str, root: str = COMMENTS_DIR):
+        self.handle = handle
+        self.dir = os.path.join(root, safe_key(handle))
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.dir, _STATE_FILE)
+
+    def watermarks(self) -> Dict[str, Dict]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("videos", {})
+        except FileNotFoundError:
+            return {}
+
+    def update_watermarks(self, marks: Dict[str, Dict]) -> None:
+        """
+        Merge per-video {"newest", "count"} marks into state.json; a video's newest
+        time only ever moves forward.
+        """
+        if not marks:
+            return
+        os.makedirs(self.dir, exist_ok=True)
+        with _locked(self.state_path):
+            # Re-read under the lock to keep marks written by a concurrent harvest
+            videos = self.watermarks()
+            for vid, mark in marks.items():
+                newest = max(filter(None, (mark.get("newest"), videos.get(vid, {}).get("newest"))), default=None)
+                videos[vid] = {"newest": newest, "count": mark.get("count")}
+            payload = json.dumps({"handle": self.handle, "updated_at": time.time(), "videos": videos})
+            _atomic_write(self.state_path, lambda tmp: _write_text(tmp, payload))
+
+    def new_part(self, fmt: str = "jsonl", compression: Optional[str] = "gzip") -> ChunkWriter:
+        os.makedirs(self.dir, exist_ok=True)
+        path = os.path.join(self.dir, f"part-{time.time_ns()}{export_suffix(fmt, compression)}")
+        return ChunkWriter(path, fmt, compression)
+
+    def parts(self) -> List[str]:
+        if not os.path.isdir(self.dir):
+            return []
+        # Same-width nanosecond stamps, so name order is write order
+        return [os.path.join(self.dir, n) for n in sorted(os.listdir(self.dir)) if n.startswith("part-")]
+
+    def load(self) -> pd.DataFrame:
+        """
+        Every stored comment, newest first, one row per comment_id.
+        """
+        frames = [f for f in map(_read_part, self.parts()) if not f.empty]
+        if not frames:
+            return pd.DataFrame({f: pd.Series(dtype="Int64" if f in _COUNTS else object) for f in COMMENT_FIELDS})
+        df = pd.concat(frames, ignore_index=True).drop_duplicates("comment_id", keep="last")
+        return df.sort_values("published_at", ascending=False, kind="stable").reset_index(drop=True)
+
+def _write_text(path: str, text: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def _read_part(path: str) -> pd.DataFrame:
+    if os.path.getsize(path) == 0:
+        return pd.DataFrame()
+    fmt, compression = export_format(path)
+    if fmt == "parquet":
+        df = pd.read_parquet(path)
+    elif fmt == "jsonl":
+        df = pd.read_json(path, lines=True, dtype=False, convert_dates=False, compression=compression)
+    else:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[""], compression=compression)
+    for name in _COUNTS:
+        df[name] = pd.to_numeric(df[name], errors="coerce").astype("Int64")
+    return df
@@ -0,0 +1,168 @@
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+STAT_COLUMNS = ("view_count", "like_count", "comment_count")
+_SQL_COLUMNS = {"view_count": "views", "like_count": "likes", "comment_count": "comments"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stats (
+    video_id TEXT NOT NULL, ts INTEGER NOT NULL,
+    views INTEGER, likes INTEGER, comments INTEGER,
+    PRIMARY KEY (video_id, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS latest (
+    video_id TEXT PRIMARY KEY, channel TEXT NOT NULL, ts INTEGER NOT NULL,
+    views INTEGER, likes INTEGER, comments INTEGER
+);
+CREATE INDEX IF NOT EXISTS latest_channel ON latest (channel);
+CREATE TABLE IF NOT EXISTS refreshes (
+    channel TEXT NOT NULL, ts INTEGER NOT NULL, videos INTEGER NOT NULL, changed INTEGER NOT NULL,
+    PRIMARY KEY (channel, ts)
+) WITHOUT ROWID;
+"""
+
+def _value(v) -> Optional[int]:
+    return None if pd.isna(v) else int(v)
+
+class HistoryStore:
+    """
+    Append-only time series of per-video statistics in a SQLite file.
+    Delta-encoded: a refresh only writes rows for videos whose counts changed, and a
+    video's value at time t is its last row at or before t. Every refresh is logged in
+    `refreshes`, so unchanged values are known to still hold at that time.
+    `stats` is clustered on (video_id, ts), so point-in-time lookups are index seeks
+    and queries never scan the full history.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def record(self, channel: str, df: pd.DataFrame, ts: Optional[int] = None) -> int:
+        """
+        Record one refresh of a channel's videos (video_id + count columns).
+        Returns the number of rows written to the time series.
+        """
+        ts = int(time.time() if ts is None else ts)
+        if df.empty:
+            return 0
+        frame = df[["video_id", *STAT_COLUMNS]]
+        rows = [
+            (vid, _value(v), _value(l), _value(c))
+            for vid, v, l, c in frame.itertuples(index=False, name=None)
+        ]
+        with self._lock:
+            known = {
+                r[0]: r[1:]
+                for r in self._db.execute(
+                    "SELECT video_id, views, likes, comments FROM latest WHERE channel = ?", (channel,)
+                )
+            }
+            changed = [r for r in rows if known.get(r[0]) != r[1:]]
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO stats (video_id, ts, views, likes, comments) VALUES (?, ?, ?, ?, ?)",
+                    [(vid, ts, v, l, c) for vid, v, l, c in changed],
+                )
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO latest (video_id, channel, ts, views, likes, comments)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [(vid, channel, ts, v, l, c) for vid, v, l, c in changed],
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO refreshes (channel, ts, videos, changed) VALUES (?, ?, ?, ?)",
+                    (channel, ts, len(rows), len(changed)),
+                )
+        return len(changed)
+
+    def series(self, video_id: str) -> pd.DataFrame:
+        """
+        Recorded changes for one video: ts (UTC), view/like/comment counts.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT ts, views, likes, comments FROM stats WHERE video_id = ? ORDER BY ts", (video_id,)
+            ).fetchall()
+        out = pd.DataFrame(rows, columns=["ts", *STAT_COLUMNS])
+        out["ts"] = pd.to_datetime(out["ts"], unit="s", utc=True)
+        for col in STAT_COLUMNS:
+            out[col] = out[col].astype("Int64")
+        return out
+
+    def refreshes(self, channel: str) -> List[Tuple[int, int, int]]:
+        with self._lock:
+            return self._db.execute(
+                "SELECT ts, videos, changed FROM refreshes WHERE channel = ? ORDER BY ts", (channel,)
+            ).fetchall()
+
+    def growth(
+        self,
+        since: int,
+        until: Optional[int] = None,
+        channel: Optional[str] = None,
+        metric: str = "view_count",
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Per-video change of every count between the last refresh at or before `since`
+        and the last refresh at or before `until` (default: now), per channel.
+        Rows are ordered by the change in `metric`, largest first, optionally capped at
+        `limit` inside SQL. Videos first seen after `since` are left out.
+        Columns: channel, video_id, t0, t1, <count>_0, <count>_1, <count>_delta,
+        <count>_per_day.
+        """
+        until = int(time.time() if until is None else until)
+        order = _SQL_COLUMNS[metric]
+        pick = ", ".join(f"s0.{c} AS {c}_0, s1.{c} AS {c}_1" for c in _SQL_COLUMNS.values())
+        sql = f"""
+            WITH win AS (
+                SELECT channel,
+                       MAX(CASE WHEN ts <= :since THEN ts END) AS t0,
+                       MAX(CASE WHEN ts <= :until THEN ts END) AS t1
+                FROM refreshes {"WHERE channel = :channel" if channel is not None else ""}
+                GROUP BY channel
+            )
+            SELECT l.channel, l.video_id, w.t0, w.t1, {pick}
+            FROM win w
+            JOIN latest l ON l.channel = w.channel
+            JOIN stats s0 ON s0.video_id = l.video_id AND s0.ts =
+                (SELECT MAX(ts) FROM stats WHERE video_id = l.video_id AND ts <= w.t0)
+            JOIN stats s1 ON s1.video_id = l.video_id AND s1.ts =
+                (SELECT MAX(ts) FROM stats WHERE video_id = l.video_id AND ts <= w.t1)
+            WHERE w.t0 IS NOT NULL AND w.t1 > w.t0
+            ORDER BY COALESCE(s1.{order} - s0.{order}, 0) DESC
+            {"LIMIT :limit" if limit is not None else ""}
+        """
+        params: Dict[str, object] = {"since": int(since), "until": until, "channel": channel, "limit": limit}
+        with self._lock:
+            cur = self._db.execute(sql, params)
+            names = [d[0] for d in cur.description]
+            rows = cur.fetchall()
+        out = pd.DataFrame(rows, columns=names)
+        days = (out["t1"] - out["t0"]) / 86400.0
+        for col, sql_col in _SQL_COLUMNS.items():
+            first = out.pop(f"{sql_col}_0").astype("Int64")
+            last = out.pop(f"{sql_col}_1").astype("Int64")
+            out[f"{col}_0"] = first
+            out[f"{col}_1"] = last
+            out[f"{col}_delta"] = last - first
+            out[f"{col}_per_day"] = (out[f"{col}_delta"].astype("float64") / days).astype("float64")
+        for col in ("t0", "t1"):
+            out[col] = pd.to_datetime(out[col], unit="s", utc=True)
+        return out
+
+    def channels(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT DISTINCT channel FROM refreshes ORDER BY channel")]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
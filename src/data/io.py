@@ -1,15 +1,495 @@
+import gzip
+import importlib.util
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
 import pandas as pd
-from typing import List
 from src.youtube_api.models import Video
+from src.youtube_api.parsers import COMMENT_FIELDS, VIDEO_FIELDS, parse_comment_columns, parse_video_columns
+from src.metrics import metrics
+from .cache import safe_key
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for zstd-compressed CSV/JSONL
+    zstandard = None
+
+COUNT_COLUMNS = ["view_count", "like_count", "comment_count"]
+CATEGORY_COLUMNS = ["category_id", "definition", "caption"]
+DERIVED_COLUMNS = [
+    "duration_s", "published_ts", "like_view_ratio", "comment_view_ratio", "days_since_publish",
+]
+# Fetched columns each derived column is computed from
+DERIVED_INPUTS = {
+    "duration_s": ("duration",),
+    "published_ts": ("published_at",),
+    "like_view_ratio": ("like_count", "view_count"),
+    "comment_view_ratio": ("comment_count", "view_count"),
+    "days_since_publish": ("published_at",),
+}
+# Always fetched: row identity, and the order that incremental refresh and sorting rely on
+KEY_COLUMNS = ("video_id", "published_at")
+
+# ISO 8601 durations as returned by contentDetails.duration, e.g. P1DT2H3M4S, PT45S
+_DURATION_RE = r"^P(?:(?P<d>\d+)D)?(?:T(?:(?P<h>\d+)H)?(?:(?P<m>\d+)M)?(?:(?P<s>\d+)S)?)?$"
 
 def _row(v: Video) -> dict:
-    d = v.__dict__.copy()
-    if isinstance(d.get("tags"), list):
+    d = {f: getattr(v, f) for f in VIDEO_FIELDS}
+    if isinstance(d["tags"], (list, tuple)):
         d["tags"] = ";".join(d["tags"])
     return d
 
 def videos_to_df(videos: List[Video]) -> pd.DataFrame:
-    return pd.DataFrame([_row(v) for v in videos])
+    return add_derived_columns(pd.DataFrame([_row(v) for v in videos]))
+
+def _duration_seconds(durations: pd.Series) -> pd.Series:
+    parts = durations.astype(object).where(durations.notna(), "").astype(str).str.extract(_DURATION_RE)
+    parts = parts.apply(pd.to_numeric, errors="coerce").astype("Int64")
+    secs = parts["d"].fillna(0) * 86400 + parts["h"].fillna(0) * 3600 \
+        + parts["m"].fillna(0) * 60 + parts["s"].fillna(0)
+    # Unparseable/missing durations stay <NA> rather than 0
+    return secs.where(parts.notna().any(axis=1)).astype("Int64")
+
+def _ratio(num: pd.Series, den: pd.Series) -> pd.Series:
+    num = pd.to_numeric(num, errors="coerce").astype("float64")
+    den = pd.to_numeric(den, errors="coerce").astype("float64")
+    return (num / den.where(den > 0)).astype("float64")
+
+def source_columns(columns: Optional[Iterable[str]] = None) -> Tuple[str, ...]:
+    """
+    The fetched columns (in VIDEO_FIELDS order) needed to produce `columns`, which may
+    name derived columns; KEY_COLUMNS are always included. None means every column.
+    """
+    if columns is None:
+        return VIDEO_FIELDS
+    wanted = set(KEY_COLUMNS)
+    unknown = []
+    for col in columns:
+        if col in VIDEO_FIELDS:
+            wanted.add(col)
+        elif col in DERIVED_INPUTS:
+            wanted.update(DERIVED_INPUTS[col])
+        else:
+            unknown.append(col)
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}; "
+                         f"choose from {', '.join(VIDEO_FIELDS + tuple(DERIVED_COLUMNS))}")
+    return tuple(f for f in VIDEO_FIELDS if f in wanted)
+
+def derivable_columns(fields: Iterable[str]) -> List[str]:
+    held = set(fields)
+    return [c for c in DERIVED_COLUMNS if set(DERIVED_INPUTS[c]) <= held]
+
+def add_derived_columns(df: pd.DataFrame, now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Append vectorized derived metrics computed once at ingest and kept in the cache:
+    duration_s (Int64 seconds), published_ts (tz-aware UTC), like_view_ratio,
+    comment_view_ratio and days_since_publish (float, relative to `now`).
+    On a projected frame, only the metrics whose inputs are present are added.
+    """
+    if df.empty and not len(df.columns):
+        return df
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    derive = set(derivable_columns(df.columns))
+    with metrics.stage("derived"):
+        out = df.copy()
+        if "duration_s" in derive:
+            out["duration_s"] = _duration_seconds(out["duration"])
+        if "published_ts" in derive:
+            out["published_ts"] = pd.to_datetime(out["published_at"], utc=True, errors="coerce")
+        if "like_view_ratio" in derive:
+            out["like_view_ratio"] = _ratio(out["like_count"], out["view_count"])
+        if "comment_view_ratio" in derive:
+            out["comment_view_ratio"] = _ratio(out["comment_count"], out["view_count"])
+        if "days_since_publish" in derive:
+            out["days_since_publish"] = ((now - out["published_ts"]) / pd.Timedelta(days=1)).astype("float64")
+    return out
+
+def empty_videos_df(fields: Sequence[str] = VIDEO_FIELDS) -> pd.DataFrame:
+    return pd.DataFrame(columns=list(fields) + derivable_columns(fields))
+
+def sort_newest_first(df: pd.DataFrame) -> pd.DataFrame:
+    # published_ts sorts chronologically; fall back to the ISO string for older frames
+    key = "published_ts" if "published_ts" in df else "published_at"
+    return df.sort_values(key, ascending=False).reset_index(drop=True)
+
+def _int_array(raw: list) -> pd.api.extensions.ExtensionArray:
+    # API counts arrive as decimal strings; convert the whole column in one numpy call
+    mask = np.fromiter((v is None for v in raw), dtype=bool, count=len(raw))
+    try:
+        values = np.array(["0" if v is None else v for v in raw], dtype=str).astype(np.int64)
+    except (ValueError, TypeError):
+        return pd.to_numeric(pd.Series(raw, dtype=object), errors="coerce").astype("Int64").array
+    return pd.arrays.IntegerArray(values, mask)
+
+def _join_tags(tags: List[Optional[list]]) -> List[Optional[str]]:
+    return [";".join(t) if isinstance(t, list) else t for t in tags]
+
+def normalize_video_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast count columns to nullable Int64 and low-cardinality columns to categorical.
+    Used after merges/concats, which fall back to object dtype.
+    """
+    out = df.copy()
+    for col in COUNT_COLUMNS:
+        if col in out:
+            out[col] = pd.to_numeric(out[col], errors="coerce").astype("Int64")
+    for col in CATEGORY_COLUMNS:
+        if col in out:
+            out[col] = out[col].astype(object).astype("category")
+    return out
+
+def items_to_df(items: List[Dict], fields: Sequence[str] = VIDEO_FIELDS) -> pd.DataFrame:
+    """
+    Build the videos DataFrame straight from raw videos.list items via column arrays:
+    nullable Int64 counts, categorical category_id/definition/caption, ';'-joined tags.
+    Same columns and values as videos_to_df(parse_video_items(items)) without the
+    intermediate Video objects and row dicts. `fields` projects to a subset of
+    VIDEO_FIELDS (plus the derived columns computable from it).
+    """
+    with metrics.stage("parse"):
+        cols = parse_video_columns(items, fields)
+    metrics.add("rows_parsed", len(items))
+    with metrics.stage("dataframe"):
+        data: Dict[str, object] = {}
+        for name, values in cols.items():
+            if name in COUNT_COLUMNS:
+                data[name] = _int_array(values)
+            elif name in CATEGORY_COLUMNS:
+                data[name] = pd.Categorical(values)
+            elif name == "tags":
+                data[name] = _join_tags(values)
+            else:
+                data[name] = values
+        df = pd.DataFrame(data)
+        # Matches the Video path: a missing viewCount means 0 views
+        if "view_count" in df:
+            df["view_count"] = df["view_count"].fillna(0)
+    return add_derived_columns(df)
+
+def comments_to_df(items: List[Dict]) -> pd.DataFrame:
+    """
+    Comments DataFrame (COMMENT_FIELDS) from raw commentThreads.list items, with
+    nullable Int64 like/reply counts.
+    """
+    with metrics.stage("parse"):
+        cols = parse_comment_columns(items)
+    with metrics.stage("dataframe"):
+        for name in ("like_count", "reply_count"):
+            cols[name] = pd.array(cols[name], dtype="Int64")
+        return pd.DataFrame(cols, columns=list(COMMENT_FIELDS))
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+STREAM_FORMATS = EXPORT_FORMATS
+COMPRESSIONS = ("gzip", "zstd")
+PARTITIONS = ("channel", "month")
+EXPORT_CHUNK_ROWS = 10_000  # rows per encoded chunk when exporting a whole frame
+EXPORT_WORKERS = min(4, os.cpu_count() or 1)
+GZIP_LEVEL = 3  # about twice as fast as zlib's default 6 for a few percent larger files
+_COMPRESSION_SUFFIXES = {".gz": "gzip", ".gzip": "gzip", ".zst": "zstd", ".zstd": "zstd"}
+_FORMAT_SUFFIXES = {"csv": ".csv", "jsonl": ".jsonl", "parquet": ".parquet"}
+
+def export_format(path: str) -> Tuple[str, Optional[str]]:
+    """
+    (format, compression) implied by a file name, e.g. "x.jsonl.gz" -> ("jsonl", "gzip").
+    .jsonl/.ndjson -> jsonl, .parquet/.pq -> parquet, anything else -> csv.
+    """
+    name, compression = path.lower(), None
+    for suffix, codec in _COMPRESSION_SUFFIXES.items():
+        if name.endswith(suffix):
+            name, compression = name[:-len(suffix)], codec
+            break
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl", compression
+    if name.endswith((".parquet", ".pq")):
+        return "parquet", compression
+    return "csv", compression
+
+def stream_format(path: str) -> str:
+    return export_format(path)[0]
+
+def export_suffix(fmt: str, compression: Optional[str] = None) -> str:
+    # Parquet compresses inside the file, so its name carries no codec suffix
+    if fmt == "parquet" or compression is None:
+        return _FORMAT_SUFFIXES[fmt]
+    return _FORMAT_SUFFIXES[fmt] + (".gz" if compression == "gzip" else ".zst")
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet export needs pyarrow (pip install pyarrow)") from None
+    return pyarrow, pyarrow.parquet
+
+def _csv_timestamps(df: pd.DataFrame) -> pd.DataFrame:
+    # to_csv formats tz-aware timestamps one object at a time; for whole-second UTC
+    # values (all API timestamps) the vectorized naive format plus the offset is the
+    # same text, an order of magnitude faster
+    out = df
+    for col in df.columns:
+        ts = df[col]
+        if isinstance(ts.dtype, pd.DatetimeTZDtype) and str(ts.dt.tz) == "UTC":
+            naive = ts.dt.tz_localize(None)
+            if ((naive.dt.microsecond == 0) & (naive.dt.nanosecond == 0) | naive.isna()).all():
+                # strftime, not astype(str): that drops the time when every value is midnight
+                text = naive.dt.strftime("%Y-%m-%d %H:%M:%S+00:00")
+                out = out.assign(**{col: text.where(ts.notna(), None)})
+    return out
+
+def _encode_text(df: pd.DataFrame, fmt: str, header: bool, gzip_level: Optional[int]) -> bytes:
+    if fmt == "csv":
+        text = _csv_timestamps(df).to_csv(index=False, header=header)
+    else:
+        text = df.to_json(orient="records", lines=True, date_format="iso", force_ascii=False)
+        if text and not text.endswith("\n"):
+            text += "\n"
+    data = text.encode("utf-8")
+    # Each chunk is its own gzip member; concatenated members are one valid .gz
+    # stream, so chunks compress in parallel (zlib releases the GIL)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0) if gzip_level is not None else data
+
+def _arrow_schema(schema):
+    # Fix the file schema from the first chunk, loosely enough for later chunks to cast
+    # into it: all-null columns become strings and dictionary indices int32
+    pa, _ = _pyarrow()
+    fields = []
+    for f in schema:
+        t = f.type
+        if pa.types.is_null(t):
+            t = pa.string()
+        elif pa.types.is_dictionary(t):
+            t = pa.dictionary(pa.int32(), pa.string() if pa.types.is_null(t.value_type) else t.value_type)
+        fields.append(pa.field(f.name, t))
+    return pa.schema(fields, metadata=schema.metadata)
+
+class ChunkWriter:
+    """
+    Append DataFrame chunks to one CSV, JSONL or Parquet file as they arrive.
+    `target` is a path (format and compression default to what its name implies,
+    see export_format) or a binary file object. CSV/JSONL can be gzip- or
+    zstd-compressed; Parquet uses `compression` as its column codec (default snappy).
+
+    Chunks are encoded (and gzip-compressed) on a thread pool, at most 2 x workers
+    at a time, and written in order; zstd compresses with libzstd's own threads.
+    The CSV header is written with the first chunk only; every chunk must carry the
+    same columns. Use as a context manager.
+    """
+    def __init__(
+        self,
+        target,
+        fmt: Optional[str] = None,
+        compression: Optional[str] = None,
+        workers: Optional[int] = None,
+        level: Optional[int] = None,
+        pool: Optional[ThreadPoolExecutor] = None,
+    ):
+        path = target if isinstance(target, str) else getattr(target, "name", None)
+        implied = export_format(path) if isinstance(path, str) else ("csv", None)
+        self.path = path
+        self.fmt = fmt or implied[0]
+        self.compression = compression or implied[1]
+        if self.fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {self.fmt}")
+        if self.compression is not None and self.compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported compression: {self.compression}")
+        if self.compression == "zstd" and self.fmt != "parquet" and zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package (pip install zstandard)")
+        if self.fmt == "parquet":
+            _pyarrow()
+        self.rows = 0
+        self._columns: Optional[List[str]] = None
+        self._level = level
+        self._parquet = None
+        self._schema = None
+        workers = workers or EXPORT_WORKERS
+        self._window = 2 * workers
+        self._pending: deque = deque()
+        self._own_pool = pool is None
+        self._pool = pool or ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export")
+        self._own_fh = isinstance(target, str)
+        self._fh = open(target, "wb") if self._own_fh else target
+        self._out = self._fh
+        if self.compression == "zstd" and self.fmt != "parquet":
+            self._out = zstandard.ZstdCompressor(level=level or 3, threads=-1).stream_writer(
+                self._fh, closefd=False)
+
+    def write(self, df: pd.DataFrame) -> None:
+        first = self._columns is None
+        if first:
+            self._columns = list(df.columns)
+        elif list(df.columns) != self._columns:
+            df = df.reindex(columns=self._columns)
+        # An empty first chunk still sets the CSV header / Parquet schema
+        if df.empty and not first:
+            return
+        if self.fmt == "parquet":
+            pa, _ = _pyarrow()
+            job = self._pool.submit(pa.Table.from_pandas, df, preserve_index=False)
+        else:
+            gzip_level = (self._level or GZIP_LEVEL) if self.compression == "gzip" else None
+            job = self._pool.submit(_encode_text, df, self.fmt, first, gzip_level)
+        self._pending.append(job)
+        self.rows += len(df)
+        while len(self._pending) > self._window:
+            self._drain()
+
+    def _drain(self) -> None:
+        encoded = self._pending.popleft().result()
+        if self.fmt != "parquet":
+            self._out.write(encoded)
+            return
+        if self._parquet is None:
+            _, pq = _pyarrow()
+            self._schema = _arrow_schema(encoded.schema)
+            self._parquet = pq.ParquetWriter(self._fh, self._schema, compression=self.compression or "snappy")
+        self._parquet.write_table(encoded.cast(self._schema))
+
+    def close(self) -> None:
+        try:
+            while self._pending:
+                self._drain()
+        finally:
+            self._finish()
+
+    def _finish(self) -> None:
+        for job in self._pending:
+            job.cancel()
+        self._pending.clear()
+        if self._own_pool:
+            self._pool.shutdown(wait=True)
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._out is not self._fh:
+            self._out.close()  # ends the zstd frame; the file stays open (closefd=False)
+        if self._own_fh:
+            self._fh.close()
+        else:
+            self._fh.flush()
+
+    def __enter__(self) -> "ChunkWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._finish()  # keep whatever was written; don't encode the rest
+
+def partition_values(df: pd.DataFrame, by: str) -> pd.Series:
+    """
+    Partition key per row: "YYYY-MM" of published_at for "month", the channel handle
+    (without "@", from the `handle` column) for "channel".
+    """
+    if by == "month":
+        return df["published_at"].astype(str).str[:7].where(lambda m: m.str.len() == 7, "unknown")
+    if by == "channel":
+        if "handle" not in df:
+            raise ValueError("Partitioning by channel needs a 'handle' column")
+        return df["handle"].astype(str).str.lstrip("@")
+    raise ValueError(f"Unsupported partitioning: {by} (choose from {', '.join(PARTITIONS)})")
+
+class PartitionedWriter:
+    """
+    Split DataFrame chunks by channel or publish month into one ChunkWriter per
+    partition, laid out Hive-style: out_dir/month=2024-01/videos.csv.gz. Partition
+    writers are opened on first use and share one encoding pool. With `columns`,
+    only those are written; the key is computed first, so it may come from a
+    column left out (e.g. published_at for "month").
+    """
+    def __init__(
+        self,
+        out_dir: str,
+        by: str,
+        fmt: str = "csv",
+        compression: Optional[str] = None,
+        workers: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+    ):
+        if by not in PARTITIONS:
+            raise ValueError(f"Unsupported partitioning: {by} (choose from {', '.join(PARTITIONS)})")
+        self.out_dir = out_dir
+        self.by = by
+        self.fmt = fmt
+        self.compression = compression
+        self.columns = None if columns is None else list(columns)
+        self.rows = 0
+        self._workers = workers or EXPORT_WORKERS
+        self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="export")
+        self._writers: Dict[str, ChunkWriter] = {}
+
+    @property
+    def paths(self) -> List[str]:
+        return [w.path for w in self._writers.values()]
+
+    def _writer(self, value: str) -> ChunkWriter:
+        w = self._writers.get(value)
+        if w is None:
+            part_dir = os.path.join(self.out_dir, f"{self.by}={safe_key(value)}")
+            os.makedirs(part_dir, exist_ok=True)
+            path = os.path.join(part_dir, "videos" + export_suffix(self.fmt, self.compression))
+            w = self._writers[value] = ChunkWriter(
+                path, self.fmt, self.compression, workers=self._workers, pool=self._pool)
+        return w
+
+    def write(self, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        for value, part in df.groupby(partition_values(df, self.by), sort=False):
+            self._writer(value).write(part if self.columns is None else part[self.columns])
+        self.rows += len(df)
+
+    def close(self) -> None:
+        try:
+            for w in self._writers.values():
+                w.close()
+        finally:
+            self._pool.shutdown(wait=True)
+
+    def __enter__(self) -> "PartitionedWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            for w in self._writers.values():
+                w._finish()
+            self._pool.shutdown(wait=True)
+
+def export_frame(
+    df: pd.DataFrame,
+    target,
+    fmt: Optional[str] = None,
+    compression: Optional[str] = None,
+    partition_by: Optional[str] = None,
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+    workers: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> int:
+    """
+    Write a whole frame through ChunkWriter (or, with partition_by, a PartitionedWriter
+    rooted at the directory `target`) in chunks of `chunk_rows`. Returns rows written.
+    `columns` limits what is written; partition keys are computed before projecting.
+    """
+    if partition_by:
+        writer = PartitionedWriter(target, partition_by, fmt or "csv", compression, workers, columns)
+    else:
+        if columns is not None and not df.empty:
+            df = df[list(columns)]
+        writer = ChunkWriter(target, fmt, compression, workers)
+    with writer:
+        for start in range(0, max(len(df), 1), chunk_rows):
+            writer.write(df.iloc[start:start + chunk_rows])
+    return writer.rows
 
 def save_csv(df: pd.DataFrame, path: str) -> None:
-    df.to_csv(path, index=False)
+    # Always CSV, whatever the name; compression is inferred from a .gz/.zst suffix as
+    # to_csv does. Other formats: export_frame
+    export_frame(df, path, "csv", export_format(path)[1])
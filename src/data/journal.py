@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from .cache import DEFAULT_DIR, _try_lock, _unlock, safe_key
+
+JOURNAL_DIR = os.path.join(DEFAULT_DIR, "journals")
+JOURNAL_MAX_AGE_SECONDS = 24 * 3600  # older checkpoints restart the crawl (and are swept)
+
+class CrawlJournal:
+    """
+    Append-only checkpoint of one full channel crawl, as JSON lines:
+    a header naming what is being crawled, then one record per playlistItems page
+    (its video IDs and the token of the next page) and one per videos.list batch
+    (its items). Each record is flushed as soon as it is written, so a crawl that
+    dies halfway leaves everything it paid for on disk.
+
+    Reopening the same crawl (same header, younger than max_age_s) replays the
+    records: `ids` are the IDs collected so far, `next_token` is where paging
+    resumes (paged_all once the last page is in), and `items` holds the fetched
+    videos by ID. A truncated last record from a crash mid-write is dropped.
+    Not thread-safe: the crawl appends from the thread consuming its batches.
+    `lock` is the held lock file from open_journal; it stays held after close(),
+    until the crawl's result is stored and the journal discarded (or released).
+    """
+    def __init__(
+        self,
+        path: str,
+        header: Dict,
+        max_age_s: float = JOURNAL_MAX_AGE_SECONDS,
+        lock: Optional[Any] = None,
+    ):
+        self.path = path
+        self._lock = lock
+        self.header = dict(header)
+        self.ids: List[str] = []
+        self.items: Dict[str, Dict] = {}
+        self.next_token: Optional[str] = None
+        self.paged_all = False
+        self.resumed = False
+        self._seen = set()
+        if not self._replay(max_age_s):
+            self._reset()
+        self._fh = open(self.path, "a", encoding="utf-8")
+        if not self.resumed:
+            self._append({**self.header, "started_at": time.time()})
+
+    def _replay(self, max_age_s: float) -> bool:
+        try:
+            fh = open(self.path, "r+b")
+        except FileNotFoundError:
+            return False
+        with fh:
+            try:
+                head = json.loads(fh.readline())
+            except ValueError:
+                return False
+            started = head.pop("started_at", 0)
+            if head != self.header or time.time() - started > max_age_s:
+                return False
+            good = fh.tell()
+            for line in iter(fh.readline, b""):
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break
+                if "page" in rec:
+                    self._add_ids(rec["page"])
+                    self.next_token = rec["next"]
+                    self.paged_all = rec["next"] is None
+                else:
+                    self.items.update((it.get("id", ""), it) for it in rec["items"])
+                good = fh.tell()
+            fh.truncate(good)  # appends must not continue a torn record
+        self.resumed = bool(self.ids)
+        return self.resumed
+
+    def _reset(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        open(self.path, "w").close()
+
+    def _append(self, record: Dict) -> None:
+        self._fh.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self._fh.flush()
+
+    def _add_ids(self, ids: Iterable[str]) -> List[str]:
+        # Uploads landing mid-crawl shift later pages, so a page may repeat IDs
+        fresh = [v for v in ids if v not in self._seen]
+        self._seen.update(fresh)
+        self.ids.extend(fresh)
+        return fresh
+
+    def add_page(self, ids: List[str], next_token: Optional[str]) -> List[str]:
+        """
+        Record one playlistItems page; returns its IDs not seen before.
+        """
+        self._append({"page": ids, "next": next_token})
+        self.next_token = next_token
+        self.paged_all = next_token is None
+        return self._add_ids(ids)
+
+    def add_batch(self, items: List[Dict]) -> None:
+        self._append({"items": items})
+        self.items.update((it.get("id", ""), it) for it in items)
+
+    def unfetched_ids(self) -> List[str]:
+        return [v for v in self.ids if v not in self.items]
+
+    def ordered_items(self) -> List[Dict]:
+        # Playlist order, whatever order batches completed in across runs
+        return [self.items[v] for v in self.ids if v in self.items]
+
+    def close(self) -> None:
+        self._fh.close()
+
+    def release(self) -> None:
+        """
+        Close and let other crawls open this journal; it is kept for them to resume.
+        """
+        self.close()
+        if self._lock is not None:
+            _unlock(self._lock)
+            self._lock = None
+
+    def discard(self) -> None:
+        """
+        Delete the journal once the crawl's result is safely stored.
+        """
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        if self._lock is not None:
+            _unlock(self._lock, remove=True)
+            self._lock = None
+
+def open_journal(
+    key: str,
+    header: Dict,
+    journal_dir: str = JOURNAL_DIR,
+    max_age_s: float = JOURNAL_MAX_AGE_SECONDS,
+) -> Optional[CrawlJournal]:
+    """
+    Open (resuming if possible) the crawl journal for `key` (a channel handle) and
+    `header` (what is being crawled: playlist, part, fields). Crawls of the same key
+    with different headers get separate files. Journals left untouched for longer
+    than max_age_s are swept on the way.
+    The journal is held under an exclusive lock until closed. Returns None while
+    another process (or thread) holds it; that caller should crawl unjournaled.
+    """
+    os.makedirs(journal_dir, exist_ok=True)
+    _sweep(journal_dir, max_age_s)
+    digest = hashlib.sha1(json.dumps(header, sort_keys=True).encode("utf-8")).hexdigest()[:10]
+    path = os.path.join(journal_dir, f"{safe_key(key)}-{digest}.jsonl")
+    lock = _try_lock(path)
+    if lock is None:
+        return None
+    try:
+        return CrawlJournal(path, header, max_age_s, lock)
+    except BaseException:
+        _unlock(lock)
+        raise
+
+def _sweep(journal_dir: str, max_age_s: float) -> None:
+    now = time.time()
+    with os.scandir(journal_dir) as it:
+        for e in it:
+            try:
+                if e.name.endswith(".jsonl") and now - e.stat().st_mtime > max_age_s:
+                    os.remove(e.path)
+            except OSError:
+                pass
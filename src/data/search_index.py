@@ -0,0 +1,175 @@
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+# Posting fields
+TITLE, DESCRIPTION, TAG = 0, 1, 2
+FIELDS = {"title": TITLE, "description": DESCRIPTION, "tag": TAG}
+INDEXED_COLUMNS = ("video_id", "title", "description", "tags", "published_at")
+
+_TOKEN_RE = r"[^\W_]{2,}"  # unicode letters/digits, 2+ chars
+_SEP = "\x1f"
+# Queries whose rarest posting list is longer than this walk documents newest-first and
+# probe the postings, stopping at `limit` matches; others start from the rarest list
+SCAN_MIN_POSTINGS = 2000
+STOPWORDS = frozenset(
+    "the and for with you your are this that from our not but all can was have has will "
+    "its it's out into about how what who why when new more".split()
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL, field INTEGER NOT NULL, video_id TEXT NOT NULL,
+    PRIMARY KEY (term, field, video_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS docs (
+    video_id TEXT PRIMARY KEY, channel TEXT NOT NULL, title TEXT,
+    published_at TEXT, text_hash INTEGER NOT NULL, terms TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS docs_channel ON docs (channel);
+CREATE INDEX IF NOT EXISTS docs_published ON docs (published_at);
+"""
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in re.findall(_TOKEN_RE, (text or "").lower()) if t not in STOPWORDS]
+
+def _terms(series: pd.Series) -> pd.Series:
+    # Vectorized tokenisation: one set of unique terms per row
+    tokens = series.astype(object).where(series.notna(), "").astype(str).str.lower().str.findall(_TOKEN_RE)
+    return tokens.map(lambda ts: set(ts) - STOPWORDS)
+
+def _tags(series: pd.Series) -> pd.Series:
+    # Tags are matched exactly (case-insensitive); the frame stores them ';'-joined
+    raw = series.astype(object).where(series.notna(), "").astype(str).str.lower().str.split(";")
+    return raw.map(lambda ts: {t.strip() for t in ts} - {""})
+
+class SearchIndex:
+    """
+    Persistent inverted index over video titles, descriptions and tags (SQLite).
+    Posting lists are (term, field) -> video IDs, clustered on the key so a lookup
+    is one index range scan. Documents remember a hash of their text and their own
+    posting keys, so re-indexing a refreshed channel only rewrites videos whose text
+    changed, deleting their old postings by exact key (no second index on video_id,
+    which would roughly double the cost of every insert).
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def index_channel(self, channel: str, df: pd.DataFrame) -> int:
+        """
+        Bring the index in line with a channel's current frame: new or edited videos are
+        (re)indexed and videos no longer in the frame are dropped. Returns the number of
+        videos whose postings were rewritten.
+        """
+        if df.empty:
+            return 0
+        frame = df[list(INDEXED_COLUMNS)].drop_duplicates("video_id")
+        hashes = pd.util.hash_pandas_object(
+            frame[["title", "description", "tags"]].astype(object), index=False
+        ).astype("int64")
+        with self._lock:
+            known: Dict[str, int] = dict(
+                self._db.execute("SELECT video_id, text_hash FROM docs WHERE channel = ?", (channel,))
+            )
+        current = dict(zip(frame["video_id"], hashes.tolist()))
+        dirty = frame[[known.get(v) != h for v, h in current.items()]]
+        gone = [v for v in known if v not in current]
+
+        # Each document also keeps its own posting keys ("<field>:<term>", unit-separated)
+        keys: Dict[str, List[str]] = {v: [] for v in dirty["video_id"]}
+        postings: List[Tuple[str, int, str]] = []
+        for field, terms in ((TITLE, _terms(dirty["title"])), (DESCRIPTION, _terms(dirty["description"])),
+                             (TAG, _tags(dirty["tags"]))):
+            prefix = f"{field}:"
+            for vid, ts in zip(dirty["video_id"], terms):
+                postings.extend([(t, field, vid) for t in ts])
+                keys[vid].extend([prefix + t for t in ts])
+        postings.sort()  # clustered key order: appends instead of random B-tree inserts
+        with self._lock, self._db:
+            # Includes new IDs, in case a video was indexed under another channel before
+            replaced = list(dirty["video_id"]) + gone
+            stale: List[Tuple[str, int, str]] = []
+            for i in range(0, len(replaced), 500):
+                part = replaced[i:i + 500]
+                for vid, terms in self._db.execute(
+                    f"SELECT video_id, terms FROM docs WHERE video_id IN ({','.join('?' * len(part))})", part
+                ):
+                    stale.extend((t, int(f), vid) for f, _, t in (k.partition(":") for k in terms.split(_SEP) if k))
+            self._db.executemany("DELETE FROM postings WHERE term = ? AND field = ? AND video_id = ?", stale)
+            self._db.executemany("DELETE FROM docs WHERE video_id = ?", [(v,) for v in gone])
+            self._db.executemany("INSERT OR IGNORE INTO postings (term, field, video_id) VALUES (?, ?, ?)", postings)
+            self._db.executemany(
+                "INSERT OR REPLACE INTO docs (video_id, channel, title, published_at, text_hash, terms)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(v, channel, t, p, current[v], _SEP.join(keys[v])) for v, t, p in
+                 zip(dirty["video_id"], dirty["title"].astype(object), dirty["published_at"].astype(object))],
+            )
+        return len(dirty)
+
+    def search(
+        self,
+        terms: Iterable[str] = (),
+        tags: Iterable[str] = (),
+        fields: Iterable[str] = ("title", "description"),
+        channel: Optional[str] = None,
+        limit: int = 50,
+    ) -> pd.DataFrame:
+        """
+        Videos matching every keyword (in any of `fields`) and every exact tag, newest
+        first: video_id, channel, title, published_at.
+        """
+        field_ids = sorted({FIELDS[f] for f in fields})
+        in_fields = f"field IN ({','.join(str(f) for f in field_ids)})"
+        clauses: List[Tuple[str, str]] = [(t, in_fields) for t in dict.fromkeys(t for t in terms if t)]
+        clauses += [(t, f"field = {TAG}") for t in dict.fromkeys(t.strip().lower() for t in tags if t.strip())]
+        columns = ["video_id", "channel", "title", "published_at"]
+        if not clauses:
+            return pd.DataFrame(columns=columns)
+        with self._lock:
+            sizes = [
+                self._db.execute(f"SELECT COUNT(*) FROM postings WHERE term = ? AND {cond}", (term,)).fetchone()[0]
+                for term, cond in clauses
+            ]
+            if min(sizes) == 0:
+                return pd.DataFrame(columns=columns)
+            # Rarest first, so the probes that fail most often run first
+            clauses = [c for _, c in sorted(zip(sizes, clauses), key=lambda x: x[0])]
+            probe = [f"EXISTS (SELECT 1 FROM postings WHERE term = ? AND {cond} AND video_id = d.video_id)"
+                     for _, cond in clauses]
+            params: List[object] = [term for term, _ in clauses]
+            if min(sizes) > SCAN_MIN_POSTINGS:
+                # Common terms: newest documents match early, so this stops after ~limit probes
+                where, order = " AND ".join(probe), "d.published_at DESC"
+            else:
+                term, cond = clauses[0]
+                where = " AND ".join([f"d.video_id IN (SELECT video_id FROM postings WHERE term = ? AND {cond})",
+                                      *probe[1:]])
+                params = [term, *params[1:]]
+                order = "+d.published_at DESC"  # sort the few candidates; don't walk the date index
+            if channel is not None:
+                where += " AND d.channel = ?"
+                params.append(channel)
+            rows = self._db.execute(
+                f"SELECT d.video_id, d.channel, d.title, d.published_at FROM docs d WHERE {where}"
+                f" ORDER BY {order} LIMIT ?", [*params, limit],
+            ).fetchall()
+        return pd.DataFrame(rows, columns=columns)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            docs, channels = self._db.execute("SELECT COUNT(*), COUNT(DISTINCT channel) FROM docs").fetchone()
+            postings = self._db.execute("SELECT COUNT(*) FROM postings").fetchone()[0]
+        return {"videos": docs, "channels": channels, "postings": postings}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,161 @@
+import contextlib
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+# Stage names used by the fetch pipeline, in pipeline order (for reports)
+STAGES = (
+    "resolve",          # handle -> channel/uploads (incl. resolution cache)
+    "channels_list",    # one channels.list call
+    "playlist_page",    # one playlistItems.list call
+    "videos_list",      # one videos.list call
+    "comment_page",     # one commentThreads.list call
+    "rate_limit_wait",  # time blocked on the token bucket
+    "parse",            # raw items -> column lists
+    "dataframe",        # column lists -> typed DataFrame
+    "derived",          # derived metric columns
+    "cache_read",
+    "cache_write",
+)
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+class Metrics:
+    """
+    Process-wide, thread-safe stage timers and counters for the fetch pipeline.
+    Stage time is summed across threads, so concurrent stages (videos_list) can
+    add up to more than the wall time of the call that ran them.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, list] = {}  # name -> [calls, total_s, max_s]
+        self._counters: Dict[Tuple[str, _Labels], float] = {}
+        self.started_at = time.time()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0)
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            s = self._stages.setdefault(name, [0, 0.0, 0.0])
+            s[0] += 1
+            s[1] += seconds
+            s[2] = max(s[2], seconds)
+
+    def add(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def counter(self, name: str, **labels: str) -> float:
+        """
+        Value of one counter; without labels, the sum across all label sets.
+        """
+        with self._lock:
+            if labels:
+                return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+            return sum(v for (n, _), v in self._counters.items() if n == name)
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "stages": {
+                    name: {"calls": c, "seconds": round(t, 6), "max_s": round(m, 6)}
+                    for name, (c, t, m) in self._stages.items()
+                },
+                "counters": {
+                    name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else ""): value
+                    for (name, labels), value in sorted(self._counters.items())
+                },
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+
+    def report(self, wall_s: float = 0.0, snap: Optional[Dict[str, object]] = None) -> str:
+        """
+        Human-readable per-stage breakdown followed by the counters, of the current
+        totals or of a given snapshot()/delta().
+        """
+        snap = self.snapshot() if snap is None else snap
+        stages = snap["stages"]
+        order = [s for s in STAGES if s in stages] + sorted(s for s in stages if s not in STAGES)
+        lines = [f"{'stage':<18} {'calls':>7} {'total s':>10} {'avg ms':>9} {'max ms':>9}"]
+        for name in order:
+            s = stages[name]
+            avg_ms = 1000 * s["seconds"] / s["calls"] if s["calls"] else 0.0
+            lines.append(f"{name:<18} {s['calls']:>7} {s['seconds']:>10.3f} {avg_ms:>9.1f} {1000 * s['max_s']:>9.1f}")
+        if wall_s:
+            lines.append(f"{'wall':<18} {'':>7} {wall_s:>10.3f}   (stage totals are summed across threads)")
+        for name, value in snap["counters"].items():
+            lines.append(f"{name:<48} {value:>12g}")
+        return "\n".join(lines)
+
+    def prometheus(self, prefix: str = "ytfetch") -> str:
+        """
+        Prometheus text exposition (format 0.0.4): stage timers as
+        <prefix>_stage_seconds_total / <prefix>_stage_calls_total with a `stage`
+        label, counters as <prefix>_<name>_total.
+        """
+        with self._lock:
+            stages = {k: list(v) for k, v in self._stages.items()}
+            counters = dict(self._counters)
+        out = [
+            f"# HELP {prefix}_stage_seconds_total Time spent per pipeline stage, summed across threads.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        out += [f'{prefix}_stage_seconds_total{{stage="{n}"}} {s[1]:.6f}' for n, s in sorted(stages.items())]
+        out += [f"# HELP {prefix}_stage_calls_total Completed calls per pipeline stage.",
+                f"# TYPE {prefix}_stage_calls_total counter"]
+        out += [f'{prefix}_stage_calls_total{{stage="{n}"}} {s[0]}' for n, s in sorted(stages.items())]
+        seen = set()
+        for (name, labels), value in sorted(counters.items()):
+            metric = f"{prefix}_{_metric_name(name)}_total"
+            if metric not in seen:
+                seen.add(metric)
+                out.append(f"# TYPE {metric} counter")
+            label_str = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            out.append(f"{metric}{{{label_str}}} {value:g}" if label_str else f"{metric} {value:g}")
+        return "\n".join(out) + "\n"
+
+    def write_textfile(self, path: str, prefix: str = "ytfetch") -> None:
+        """
+        Write the Prometheus exposition atomically, for node_exporter's textfile collector.
+        """
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus(prefix))
+        os.replace(tmp, path)
+
+def delta(before: Dict[str, object], after: Dict[str, object]) -> Dict[str, object]:
+    """
+    Difference of two snapshot()s, e.g. the cost of one fetch in a long-lived process.
+    max_s is the running maximum as of `after`.
+    """
+    stages = {}
+    for name, s in after["stages"].items():
+        b = before["stages"].get(name, {"calls": 0, "seconds": 0.0})
+        if s["calls"] > b["calls"]:
+            stages[name] = {"calls": s["calls"] - b["calls"],
+                            "seconds": round(s["seconds"] - b["seconds"], 6), "max_s": s["max_s"]}
+    counters = {k: v - before["counters"].get(k, 0) for k, v in after["counters"].items()
+                if v != before["counters"].get(k, 0)}
+    return {"stages": stages, "counters": counters}
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+metrics = Metrics()
@@ -0,0 +1,251 @@
+"""
+Pre-aggregated channel analytics, computed at ingest and updated incrementally.
+
+The aggregate state is a small JSON document per channel in its own cache directory
+(cache/analytics/<handle>.json), apart from the frames so it can neither collide with a
+handle's key nor be evicted by frame churn. Everything in it is additive, so a refresh
+only aggregates the new and changed rows:
+  - videos/views/likes/comments per upload month, category, definition and caption
+  - exact duration histograms per category (medians without the rows)
+  - uploads by weekday and hour (UTC), and a histogram of gaps between uploads
+  - per-tag video and view counts
+summarize() turns a state into small DataFrames for dashboards.
+"""
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data.cache import DEFAULT_DIR, get_cache_entry, get_frame_entry, set_cache
+from src.data.io import COUNT_COLUMNS, add_derived_columns
+from src.metrics import metrics
+
+ANALYTICS_VERSION = 1
+ANALYTICS_DIR = os.path.join(DEFAULT_DIR, "analytics")
+# Fetched columns the aggregates are built from; narrower (projected) frames are skipped
+ANALYTICS_COLUMNS = ("video_id", "published_at", *COUNT_COLUMNS, "duration", "category_id", "tags",
+                     "definition", "caption")
+_GROUPS = {"by_category": "category_id", "by_definition": "definition", "by_caption": "caption"}
+_EPOCH = pd.Timestamp(0, tz="UTC")
+
+def _counts(df: pd.DataFrame) -> pd.DataFrame:
+    return df[COUNT_COLUMNS].fillna(0).astype("int64")
+
+def _sums_by(counts: pd.DataFrame, key: pd.Series) -> Dict[str, List[int]]:
+    # {label: [videos, views, likes, comments]}
+    labels = key.astype(object).where(key.notna(), "unknown").astype(str)
+    g = counts.groupby(labels.to_numpy(), sort=False)
+    agg = g.sum()
+    agg.insert(0, "videos", g.size())
+    return {str(k): [int(x) for x in row] for k, row in zip(agg.index, agg.to_numpy())}
+
+def _histogram(values: pd.Series) -> Dict[str, int]:
+    vc = values.dropna().astype("int64").value_counts(sort=False)
+    return {str(k): int(v) for k, v in vc.items()}
+
+def _epoch_seconds(ts: pd.Series) -> np.ndarray:
+    ts = pd.to_datetime(ts, utc=True).dropna()
+    return ((ts - _EPOCH) // pd.Timedelta(seconds=1)).to_numpy(dtype="int64")
+
+def _partial(df: pd.DataFrame) -> Dict:
+    """
+    Additive aggregates of a set of rows (merge with sign -1 to remove them again).
+    """
+    if "published_ts" not in df:
+        df = add_derived_columns(df)
+    counts = _counts(df)
+    ts = pd.to_datetime(df["published_ts"], utc=True)  # no-op unless the frame is empty
+    out: Dict = {
+        "totals": [len(df), *(int(x) for x in counts.sum().to_numpy())],
+        "by_month": _sums_by(counts, ts.dt.strftime("%Y-%m")),
+        "weekday": np.bincount(ts.dt.dayofweek.dropna().astype("int64"), minlength=7).tolist(),
+        "hour": np.bincount(ts.dt.hour.dropna().astype("int64"), minlength=24).tolist(),
+    }
+    for name, col in _GROUPS.items():
+        out[name] = _sums_by(counts, df[col])
+    cats = df["category_id"].astype(object).where(df["category_id"].notna(), "unknown").astype(str)
+    out["duration_by_category"] = {
+        str(cat): _histogram(durations) for cat, durations in df["duration_s"].groupby(cats.to_numpy(), sort=False)
+    }
+    tags = df["tags"].astype(object).where(df["tags"].notna(), "").astype(str).str.split(";")
+    exploded = pd.DataFrame({"tag": tags, "views": counts["view_count"].to_numpy()}).explode("tag")
+    exploded = exploded[exploded["tag"].str.len() > 0]
+    g = exploded.groupby("tag", sort=False)["views"]
+    out["tags"] = {str(t): [int(n), int(v)] for t, n, v in zip(g.size().index, g.size().to_numpy(), g.sum().to_numpy())}
+    return out
+
+def _merge(a, b, sign: int, depth: int = 0):
+    # Lists add elementwise, dicts merge per key; groups that drop to zero are pruned
+    # (below the top level, whose fixed keys always stay)
+    if isinstance(a, list):
+        return [x + sign * y for x, y in zip(a, b)]
+    if not isinstance(a, dict):
+        return a + sign * b
+    out = dict(a)
+    for k, v in b.items():
+        merged = _merge(out.get(k, _zero(v)), v, sign, depth + 1)
+        if depth and _is_zero(merged):
+            out.pop(k, None)
+        else:
+            out[k] = merged
+    return out
+
+def _zero(v):
+    if isinstance(v, list):
+        return [0] * len(v)
+    if isinstance(v, dict):
+        return {}
+    return 0
+
+def _is_zero(v) -> bool:
+    if isinstance(v, list):
+        return not any(v)
+    if isinstance(v, dict):
+        return not v
+    return v == 0
+
+def _extend_cadence(state: Dict, published_ts: pd.Series) -> None:
+    secs = np.sort(_epoch_seconds(published_ts))
+    if not len(secs):
+        return
+    last = state.get("last_published")
+    newer = secs[secs > last] if last is not None else secs
+    if len(newer):
+        chain = np.concatenate([[last], newer]) if last is not None else newer
+        gaps = pd.Series(np.round(np.diff(chain) / 3600.0))
+        state["gap_hours"] = _merge(state.get("gap_hours", {}), _histogram(gaps), 1)
+        state["last_published"] = int(newer[-1])
+    first = state.get("first_published")
+    state["first_published"] = int(secs[0]) if first is None else min(first, int(secs[0]))
+
+def compute(df: pd.DataFrame) -> Dict:
+    """
+    Full aggregate state for a channel frame (vectorized; used on first ingest).
+    """
+    with metrics.stage("analytics"):
+        if "published_ts" not in df:
+            df = add_derived_columns(df)
+        state = {"version": ANALYTICS_VERSION, **_partial(df), "gap_hours": {},
+                 "first_published": None, "last_published": None}
+        _extend_cadence(state, df["published_ts"])
+        return state
+
+def update(state: Optional[Dict], old_df: pd.DataFrame, new_df: pd.DataFrame) -> Dict:
+    """
+    Bring `state` (computed for old_df) up to date with new_df, aggregating only the rows
+    that were added or whose counts changed. Falls back to compute() when there is no
+    usable state or videos disappeared (cadence gaps can't be un-merged).
+    """
+    if not state or state.get("version") != ANALYTICS_VERSION or old_df is None \
+            or state["totals"][0] != old_df["video_id"].nunique():
+        return compute(new_df)
+    with metrics.stage("analytics"):
+        if "published_ts" not in new_df:
+            new_df = add_derived_columns(new_df)
+        old = old_df.drop_duplicates("video_id").set_index("video_id")
+        new = new_df.drop_duplicates("video_id").set_index("video_id")
+        if len(old.index.difference(new.index)):
+            return compute(new_df)
+        added = new.index.difference(old.index)
+        common = new.index.intersection(old.index)
+        before = _counts(old.loc[common]).to_numpy()
+        after = _counts(new.loc[common]).to_numpy()
+        changed = common[(before != after).any(axis=1)] if len(common) else common
+        metrics.add("analytics_rows", len(added) + len(changed))
+        state = _merge(state, _partial(new.loc[added.append(changed)].reset_index()), 1)
+        state = _merge(state, _partial(old.loc[changed].reset_index()), -1)
+        state["version"] = ANALYTICS_VERSION
+        _extend_cadence(state, new.loc[added, "published_ts"])
+        return state
+
+def load_analytics(handle: str) -> Optional[Dict]:
+    entry = get_cache_entry(handle, ANALYTICS_DIR)
+    state = entry[1] if entry is not None else None
+    return state if isinstance(state, dict) and state.get("version") == ANALYTICS_VERSION else None
+
+def update_channel_analytics(
+    handle: str,
+    df: pd.DataFrame,
+    previous: Optional[pd.DataFrame] = None,
+) -> Optional[Dict]:
+    """
+    Update and store a channel's aggregates after a refresh. `previous` is the frame the
+    stored aggregates were computed from (None after a full crawl). Returns None, and
+    stores nothing, for frames projected to fewer than ANALYTICS_COLUMNS.
+    """
+    if not set(ANALYTICS_COLUMNS) <= set(df.columns):
+        return None
+    state = update(load_analytics(handle), previous, df) if previous is not None else compute(df)
+    set_cache(handle, state, cache_dir=ANALYTICS_DIR)
+    return state
+
+def get_channel_analytics(handle: str) -> Optional[Dict]:
+    """
+    Stored aggregates for a channel; computed once from the cached frame if missing.
+    """
+    state = load_analytics(handle)
+    if state is None:
+        entry = get_frame_entry(handle)
+        if entry is None or entry[1].empty or not set(ANALYTICS_COLUMNS) <= set(entry[1].columns):
+            return None
+        state = compute(entry[1])
+        set_cache(handle, state, cache_dir=ANALYTICS_DIR)
+    return state
+
+def _hist_median(hist: Dict[str, int]) -> Optional[float]:
+    if not hist:
+        return None
+    values = np.array(sorted(hist, key=float), dtype="float64")
+    counts = np.array([hist[k] for k in sorted(hist, key=float)], dtype="int64")
+    cum = np.cumsum(counts)
+    total = int(cum[-1])
+    lo = values[np.searchsorted(cum, (total - 1) // 2, side="right")]
+    hi = values[np.searchsorted(cum, total // 2, side="right")]
+    return float((lo + hi) / 2)
+
+def _sums_frame(groups: Dict[str, List[int]], label: str) -> pd.DataFrame:
+    rows = [(k, *v) for k, v in groups.items()]
+    out = pd.DataFrame(rows, columns=[label, "videos", "views", "likes", "comments"])
+    views = out["views"].where(out["views"] > 0)
+    out["like_rate"] = out["likes"] / views
+    out["comment_rate"] = out["comments"] / views
+    return out
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+def summarize(state: Dict, top_tags: int = 20) -> Dict[str, object]:
+    """
+    Dashboard-ready views of an aggregate state: a `totals` dict plus DataFrames
+    (views_per_month, duration_by_category, engagement_by_definition,
+    engagement_by_caption, uploads_by_weekday, top_tags).
+    """
+    videos, views, likes, comments = state["totals"]
+    first, last = state.get("first_published"), state.get("last_published")
+    weeks = (last - first) / (7 * 86400) if first is not None and last is not None and last > first else 0
+    median_gap_h = _hist_median(state.get("gap_hours", {}))
+    totals = {
+        "videos": videos, "views": views, "likes": likes, "comments": comments,
+        "like_rate": likes / views if views else None,
+        "uploads_per_week": videos / weeks if weeks else None,
+        "median_gap_days": median_gap_h / 24 if median_gap_h is not None else None,
+        "first_published": pd.Timestamp(first, unit="s", tz="UTC") if first is not None else None,
+        "last_published": pd.Timestamp(last, unit="s", tz="UTC") if last is not None else None,
+    }
+    per_month = _sums_frame(state["by_month"], "month").sort_values("month").reset_index(drop=True)
+    durations = pd.DataFrame(
+        [(cat, sum(h.values()), _hist_median(h)) for cat, h in state["duration_by_category"].items()],
+        columns=["category_id", "videos", "median_duration_s"],
+    ).sort_values("videos", ascending=False).reset_index(drop=True)
+    tags = pd.DataFrame([(t, n, v) for t, (n, v) in state["tags"].items()], columns=["tag", "videos", "views"])
+    tags = tags.sort_values(["videos", "views"], ascending=False).head(top_tags).reset_index(drop=True)
+    return {
+        "totals": totals,
+        "views_per_month": per_month[["month", "videos", "views", "likes", "comments"]],
+        "duration_by_category": durations,
+        "engagement_by_definition": _sums_frame(state["by_definition"], "definition"),
+        "engagement_by_caption": _sums_frame(state["by_caption"], "caption"),
+        "uploads_by_weekday": pd.DataFrame({"weekday": WEEKDAYS, "videos": state["weekday"]}),
+        "uploads_by_hour": pd.DataFrame({"hour_utc": range(24), "videos": state["hour"]}),
+        "top_tags": tags,
+    }
@@ -0,0 +1,126 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from src.config.settings import settings
+from src.youtube_api.client import ChannelNotFound, get_channel_and_uploads, get_uploads_for_channel_ids
+from src.youtube_api.scheduler import submit_with_context
+from src.data.cache import get_cache, set_cache
+from src.metrics import metrics
+
+RESOLVE_TTL_SECONDS = 30 * 86400  # handle -> channel/uploads mappings almost never change
+NEGATIVE_TTL_SECONDS = 86400  # re-check unknown handles once a day
+_MAP_KEY = "_channel_map"
+# Stored as one JSON map so a bulk lookup is a single (memory-tier) read:
+# {"@Handle": {"channel_id": "UC..", "uploads": "UU..", "saved_at": 1700000000},
+#  "@Missing": {"missing": true, "saved_at": 1700000000}}
+
+_lock = threading.Lock()
+
+def _is_channel_id(ref: str) -> bool:
+    return ref.startswith("UC") and len(ref) == 24
+
+def _load() -> Dict[str, dict]:
+    return get_cache(_MAP_KEY, ttl_seconds=RESOLVE_TTL_SECONDS) or {}
+
+def _fresh(entry: Optional[dict], now: float) -> bool:
+    if not entry:
+        return False
+    ttl = NEGATIVE_TTL_SECONDS if entry.get("missing") else RESOLVE_TTL_SECONDS
+    return now - entry.get("saved_at", 0) <= ttl
+
+def _store(updates: Dict[str, dict]) -> None:
+    if not updates:
+        return
+    with _lock:
+        # Re-read right before writing to keep entries added by other sessions
+        current = dict(_load())
+        current.update(updates)
+        now = time.time()
+        set_cache(_MAP_KEY, {k: v for k, v in current.items() if _fresh(v, now)})
+
+def resolve_channels(
+    refs: List[str],
+    max_workers: Optional[int] = None,
+    errors: Optional[Dict[str, BaseException]] = None,
+) -> Dict[str, Optional[Tuple[str, str]]]:
+    """
+    Map each handle (or UC... channel ID) to (channel_id, uploads_playlist_id), or
+    None when the channel does not exist. Answers come from a long-lived resolution
+    cache first. Channel IDs that miss are resolved with one channels.list call per
+    50 IDs; handles can't be batched by the API (forHandle takes one value), so they
+    are resolved concurrently. Unknown channels are negatively cached.
+    Transport/API failures propagate, unless an `errors` dict is given: then failed
+    refs are recorded there and left out of the result.
+    """
+    with metrics.stage("resolve"):
+        return _resolve_channels(refs, max_workers, errors)
+
+def _resolve_channels(
+    refs: List[str],
+    max_workers: Optional[int],
+    errors: Optional[Dict[str, BaseException]],
+) -> Dict[str, Optional[Tuple[str, str]]]:
+    now = time.time()
+    known = _load()
+    out: Dict[str, Optional[Tuple[str, str]]] = {}
+    handles: List[str] = []
+    ids: List[str] = []
+    for ref in dict.fromkeys(refs):
+        entry = known.get(ref)
+        if _fresh(entry, now):
+            out[ref] = None if entry.get("missing") else (entry["channel_id"], entry["uploads"])
+            metrics.add("resolve_lookups", result="hit")
+        elif _is_channel_id(ref):
+            ids.append(ref)
+        else:
+            handles.append(ref)
+
+    metrics.add("resolve_lookups", len(ids) + len(handles), result="miss")
+    updates: Dict[str, dict] = {}
+    if ids:
+        found = get_uploads_for_channel_ids(ids)
+        for cid in ids:
+            if cid in found:
+                out[cid] = (cid, found[cid])
+                updates[cid] = {"channel_id": cid, "uploads": found[cid], "saved_at": now}
+            else:
+                out[cid] = None
+                updates[cid] = {"missing": True, "saved_at": now}
+
+    if handles:
+        workers = max(1, min(len(handles), max_workers or settings.max_workers))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resolve") as pool:
+            futures = {h: submit_with_context(pool, get_channel_and_uploads, h) for h in handles}
+            try:
+                for h, fut in futures.items():
+                    try:
+                        cid, uploads = fut.result()
+                    except ChannelNotFound:  # not a malformed response or other ValueError
+                        out[h] = None
+                        updates[h] = {"missing": True, "saved_at": now}
+                        continue
+                    except Exception as e:
+                        if errors is None:
+                            raise
+                        errors[h] = e
+                        continue
+                    out[h] = (cid, uploads)
+                    updates[h] = {"channel_id": cid, "uploads": uploads, "saved_at": now}
+            finally:
+                # Keep what did resolve even if another handle raised a transport error
+                _store(updates)
+    else:
+        _store(updates)
+    return {ref: out[ref] for ref in refs if ref in out}
+
+def resolve_channel(handle: str) -> Tuple[str, str]:
+    """
+    Cached drop-in for client.get_channel_and_uploads: (channel_id, uploads_playlist_id).
+    Raises ChannelNotFound (a ValueError) for channels that don't exist (including cached misses).
+    """
+    res = resolve_channels([handle]).get(handle)
+    if res is None:
+        raise ChannelNotFound(f"Channel not found for handle: {handle}")
+    return res
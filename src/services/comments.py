@@ -0,0 +1,243 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Collection, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from src.config.settings import settings
+from src.youtube_api.client import comments_unavailable, fetch_video_items, iter_comment_thread_pages
+from src.youtube_api.parsers import parse_statistics, video_request
+from src.youtube_api.scheduler import BATCH, QuotaExceeded, request_priority, submit_with_context
+from src.data.comment_store import COMMENTS_DIR, CommentStore
+from src.data.io import comments_to_df, sort_newest_first
+from src.services.videos import fetch_channel_df
+from src.metrics import metrics
+
+COMMENT_CHUNK_ROWS = 5000  # comments per written chunk
+
+@dataclass
+class CommentTarget:
+    """
+    One video to harvest: only threads newer than `since`, at most `limit` of them.
+    """
+    video_id: str
+    since: Optional[str] = None
+    limit: Optional[int] = None
+
+@dataclass
+class CommentHarvest:
+    """
+    Outcome of one channel's comment harvest.
+    """
+    handle: str
+    path: Optional[str] = None
+    comments: int = 0
+    videos: int = 0        # videos whose threads were paged to the end (or cap/since)
+    skipped: int = 0       # no comments, or commentCount unchanged since the last harvest
+    unavailable: int = 0   # comments disabled, or the video is gone or private
+    failed: int = 0        # gave up after retries; harvested again next run
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+def _utc_iso(ts: str) -> str:
+    # The API's own timestamp format, so watermarks compare as plain strings
+    t = pd.Timestamp(ts)
+    t = t.tz_localize("UTC") if t.tzinfo is None else t.tz_convert("UTC")
+    return t.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _put(out: queue.Queue, event: tuple, stop: threading.Event) -> bool:
+    # Blocks while the consumer is behind; gives up once the harvest is abandoned
+    while not stop.is_set():
+        try:
+            out.put(event, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _pump(target: CommentTarget, out: queue.Queue, stop: threading.Event) -> None:
+    newest = None
+    try:
+        with request_priority(BATCH):
+            for items in iter_comment_thread_pages(target.video_id, target.since, target.limit):
+                if stop.is_set():
+                    return
+                if newest is None:
+                    newest = items[0]["snippet"]["topLevelComment"]["snippet"].get("publishedAt")
+                if not _put(out, ("page", target.video_id, items), stop):
+                    return
+    except Exception as e:
+        kind = "unavailable" if comments_unavailable(e) else "error"
+        _put(out, (kind, target.video_id, e), stop)
+        return
+    _put(out, ("done", target.video_id, newest), stop)
+
+def iter_comment_pages(
+    targets: Sequence[CommentTarget],
+    max_workers: Optional[int] = None,
+) -> Iterator[Tuple[str, str, object]]:
+    """
+    Page the comment threads of many videos concurrently, at BATCH priority and
+    against the shared rate limit and quota budget. Yields events as they arrive:
+    ("page", video_id, items) for each page, then exactly one of ("done",
+    video_id, newest publishedAt or None), ("unavailable", video_id, exc) or
+    ("error", video_id, exc) per video. A video's pages come in order and before
+    its final event. At most 2 x max_workers pages wait to be consumed; workers
+    block beyond that, so memory stays bounded however many comments there are.
+    QuotaExceeded stops the harvest and is raised.
+    """
+    workers = max(1, max_workers or settings.max_workers)
+    out: queue.Queue = queue.Queue(maxsize=2 * workers)
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="comments") as pool:
+        futures = [submit_with_context(pool, _pump, t, out, stop) for t in targets]
+        try:
+            left = len(futures)
+            while left:
+                event = out.get()
+                if event[0] != "page":
+                    left -= 1
+                    if isinstance(event[2], QuotaExceeded):
+                        raise event[2]
+                yield event
+        finally:
+            # Failed or abandoned: stop the workers and don't start the remaining videos
+            stop.set()
+            for fut in futures:
+                fut.cancel()
+
+def _count(value) -> Optional[int]:
+    return None if pd.isna(value) else int(value)
+
+def fresh_comment_counts(
+    video_ids: Sequence[str],
+    max_workers: Optional[int] = None,
+) -> Tuple[Dict[str, Optional[int]], Dict[str, BaseException]]:
+    """
+    Current commentCount per video, via videos.list asking for just that field
+    (one quota unit per 50 videos), at BATCH priority. Snapshot counts go stale
+    outside the hot window, so planning a harvest on them would skip videos with
+    new comments. Returns the counts and the IDs whose batch failed; IDs in
+    neither are gone or private.
+    """
+    part, mask = video_request(["comment_count"])
+    errors: Dict[str, BaseException] = {}
+    with request_priority(BATCH):
+        items = fetch_video_items(video_ids, max_workers=max_workers, part=part, fields=mask, errors=errors)
+    return {vid: stats[2] for vid, stats in parse_statistics(items).items()}, errors
+
+def plan_targets(
+    videos: pd.DataFrame,
+    marks: Dict[str, Dict],
+    since: Optional[str] = None,
+    max_per_video: Optional[int] = None,
+    unknown: Collection[str] = (),
+) -> Tuple[List[CommentTarget], int]:
+    """
+    Videos worth paging, newest first, and how many were skipped: those with no
+    comments and those whose commentCount hasn't changed since their watermark.
+    `videos` should carry current counts (see fresh_comment_counts); videos in
+    `unknown`, whose count could not be fetched, are always paged. Each target
+    only asks for threads newer than both `since` and its watermark.
+    """
+    targets: List[CommentTarget] = []
+    skipped = 0
+    for vid, count in zip(videos["video_id"], videos["comment_count"]):
+        count = _count(count)
+        mark = marks.get(vid)
+        if vid not in unknown and (count == 0 or (mark is not None and mark.get("count") == count)):
+            skipped += 1
+            continue
+        floor = max(filter(None, (since, mark and mark.get("newest"))), default=None)
+        targets.append(CommentTarget(vid, floor, max_per_video))
+    return targets, skipped
+
+def harvest_comments(
+    handle: str,
+    since: Optional[str] = None,
+    max_per_video: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    fmt: str = "jsonl",
+    compression: Optional[str] = "gzip",
+    root: str = COMMENTS_DIR,
+    full: bool = False,
+    chunk_rows: int = COMMENT_CHUNK_ROWS,
+) -> CommentHarvest:
+    """
+    Harvest a channel's top-level comments into its CommentStore. Video IDs come
+    from the (cached) channel snapshot and their comment counts fresh from
+    videos.list; see plan_targets for which videos are paged. `full` ignores the stored watermarks. Comments are
+    written in chunks of `chunk_rows` to a new part file as pages arrive.
+    Watermarks advance only for videos whose comments all reached the file, so a
+    harvest that fails (or runs out of quota, reported in .error) loses nothing:
+    the next run picks up the rest.
+    """
+    t0 = time.perf_counter()
+    run = CommentHarvest(handle=handle)
+    videos = fetch_channel_df(handle, columns=["video_id", "published_at"])
+    if videos.empty:
+        run.seconds = time.perf_counter() - t0
+        return run
+    videos = sort_newest_first(videos)
+    counts, failed = fresh_comment_counts(videos["video_id"].tolist(), max_workers)
+    quota = next((e for e in failed.values() if isinstance(e, QuotaExceeded)), None)
+    if quota is not None:
+        run.error = str(quota)
+        run.seconds = time.perf_counter() - t0
+        return run
+    # Known to the snapshot but no longer listed: deleted or made private since
+    listed = videos["video_id"].isin(counts) | videos["video_id"].isin(failed)
+    run.unavailable = int((~listed).sum())
+    videos = videos[listed].assign(comment_count=videos["video_id"].map(counts))
+    store = CommentStore(handle, root)
+    marks = {} if full else store.watermarks()
+    targets, run.skipped = plan_targets(videos, marks, _utc_iso(since) if since else None, max_per_video, failed.keys())
+    metrics.add("comment_videos_skipped", run.skipped)
+    if not targets:
+        run.seconds = time.perf_counter() - t0
+        return run
+
+    writer = store.new_part(fmt, compression)
+    done: Dict[str, Dict] = {}
+    buf: List[Dict] = []
+    try:
+        for kind, vid, payload in iter_comment_pages(targets, max_workers):
+            if kind == "page":
+                buf.extend(payload)
+                if len(buf) >= chunk_rows:
+                    writer.write(comments_to_df(buf))
+                    buf = []
+                continue
+            if kind == "error":
+                run.failed += 1
+                metrics.add("comment_errors")
+                continue
+            if kind == "done":
+                run.videos += 1
+            else:
+                run.unavailable += 1
+            done[vid] = {"newest": payload if kind == "done" else None, "count": counts.get(vid)}
+    except QuotaExceeded as e:
+        run.error = str(e)
+    finally:
+        # Everything consumed so far is on disk before any watermark moves
+        if buf:
+            writer.write(comments_to_df(buf))
+        writer.close()
+        if not writer.rows:
+            os.remove(writer.path)
+        store.update_watermarks(done)
+    run.comments = writer.rows
+    run.path = writer.path if writer.rows else None
+    metrics.add("comments_harvested", run.comments)
+    run.seconds = time.perf_counter() - t0
+    return run
+
+def load_comments(handle: str, root: str = COMMENTS_DIR) -> pd.DataFrame:
+    """
+    Every harvested comment of a channel, newest first, one row per comment.
+    """
+    return CommentStore(handle, root).load()
@@ -0,0 +1,60 @@
+import os
+import threading
+import time
+from typing import Optional
+
+import pandas as pd
+
+from src.config.settings import settings
+from src.data.cache import DEFAULT_DIR
+from src.data.history import STAT_COLUMNS, HistoryStore
+
+_store: Optional[HistoryStore] = None
+_store_lock = threading.Lock()
+
+def get_history() -> HistoryStore:
+    """
+    Return the process-wide statistics history (cache/history.sqlite), opening it on first use.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                os.makedirs(DEFAULT_DIR, exist_ok=True)
+                _store = HistoryStore(os.path.join(DEFAULT_DIR, "history.sqlite"))
+    return _store
+
+def record_snapshot(handle: str, df: pd.DataFrame) -> int:
+    """
+    Append a freshly fetched channel frame to the history (changed rows only).
+    Projected frames without all the count columns are skipped.
+    """
+    if not settings.history or df.empty or not set(STAT_COLUMNS) <= set(df.columns):
+        return 0
+    return get_history().record(handle, df)
+
+def video_history(video_id: str) -> pd.DataFrame:
+    return get_history().series(video_id)
+
+def channel_growth(handle: str, days: float = 7, metric: str = "view_count") -> pd.DataFrame:
+    """
+    Per-video growth of a channel's counts over roughly the last `days` days, measured
+    between the refreshes closest to (at or before) each end of the window; largest
+    `metric` change first. Includes <count>_delta and <count>_per_day columns.
+    """
+    now = time.time()
+    return get_history().growth(since=int(now - days * 86400), until=int(now), channel=handle, metric=metric)
+
+def top_movers(
+    n: int = 10,
+    days: float = 7,
+    metric: str = "view_count",
+    handle: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    The `n` videos whose `metric` grew most over the last `days` days, across all
+    recorded channels unless `handle` is given. Ranked and limited inside SQLite.
+    """
+    now = time.time()
+    return get_history().growth(since=int(now - days * 86400), until=int(now),
+                                channel=handle, metric=metric, limit=n)
@@ -0,0 +1,101 @@
+import heapq
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.data.cache import get_frame_entry
+from src.metrics import metrics
+from src.services.videos import CACHE_TTL_SECONDS, refresh_channel
+from src.youtube_api.client import get_scheduler
+from src.youtube_api.scheduler import BATCH, QuotaExceeded, request_priority
+
+REFRESH_AT = 0.8  # refresh once a snapshot reaches this fraction of CACHE_TTL_SECONDS
+RETRY_AFTER_SECONDS = 300  # after a failed refresh
+QUOTA_RESERVE_UNITS = 500  # leave this much of the daily budget for interactive use
+
+class Prewarmer:
+    """
+    Keeps a watchlist of channels fresh ahead of demand on a background thread.
+    Each channel is refreshed (incrementally) shortly before its snapshot expires.
+    Refreshes are spaced at least `min_gap_s` apart (default: the refresh period
+    divided by the watchlist size), so a watchlist that went cold together is warmed
+    gradually and quota use stays smooth instead of spiking every TTL.
+    """
+    def __init__(
+        self,
+        handles: Iterable[str],
+        refresh_at: float = REFRESH_AT,
+        min_gap_s: Optional[float] = None,
+        quota_reserve: int = QUOTA_RESERVE_UNITS,
+        clock: Callable[[], float] = time.time,
+        refresh: Callable[[str], object] = refresh_channel,
+    ):
+        self.handles: List[str] = list(dict.fromkeys(handles))
+        self.period_s = CACHE_TTL_SECONDS * refresh_at
+        self.min_gap_s = self.period_s / max(1, len(self.handles)) if min_gap_s is None else min_gap_s
+        self.quota_reserve = quota_reserve
+        self._clock = clock
+        self._refresh = refresh
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_run = float("-inf")
+        now = clock()
+        self._queue: List[Tuple[float, str]] = [(self._due_from_cache(h, now), h) for h in self.handles]
+        heapq.heapify(self._queue)
+        self.last_error: Dict[str, str] = {}
+
+    def _due_from_cache(self, handle: str, now: float) -> float:
+        entry = get_frame_entry(handle)
+        return now if entry is None else min(now + self.period_s, entry[0] + self.period_s)
+
+    def next_run(self) -> float:
+        """
+        Earliest time the next refresh may start (due time, bounded by min_gap_s).
+        """
+        if not self._queue:
+            return float("inf")
+        return max(self._queue[0][0], self._last_run + self.min_gap_s)
+
+    def run_once(self) -> Optional[str]:
+        """
+        Refresh the most overdue channel if its turn has come; returns its handle.
+        """
+        now = self._clock()
+        if not self._queue or self.next_run() > now:
+            return None
+        if get_scheduler().budget.remaining() < self.quota_reserve:
+            # Keep the rest of today's quota for interactive users; look again later
+            _, handle = heapq.heappop(self._queue)
+            heapq.heappush(self._queue, (now + RETRY_AFTER_SECONDS, handle))
+            metrics.add("prewarm", result="quota_reserve")
+            return None
+        _, handle = heapq.heappop(self._queue)
+        self._last_run = now
+        try:
+            with request_priority(BATCH):
+                self._refresh(handle)
+        except Exception as e:
+            self.last_error[handle] = str(e)
+            heapq.heappush(self._queue, (now + RETRY_AFTER_SECONDS, handle))
+            metrics.add("prewarm", result="quota_exceeded" if isinstance(e, QuotaExceeded) else "error")
+            return handle
+        self.last_error.pop(handle, None)
+        heapq.heappush(self._queue, (self._clock() + self.period_s, handle))
+        metrics.add("prewarm", result="ok")
+        return handle
+
+    def run_forever(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(max(0.5, min(60.0, self.next_run() - self._clock())))
+
+    def start(self) -> "Prewarmer":
+        if self._thread is None and self.handles:
+            self._thread = threading.Thread(target=self.run_forever, name="prewarm", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
@@ -0,0 +1,68 @@
+import os
+import threading
+from typing import Iterable, Optional, Sequence
+
+import pandas as pd
+
+from src.config.settings import settings
+from src.data.cache import DEFAULT_DIR, get_frame_entry
+from src.data.search_index import INDEXED_COLUMNS, SearchIndex, tokenize
+from src.metrics import metrics
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+def get_index() -> SearchIndex:
+    """
+    Return the process-wide search index (cache/search.sqlite), opening it on first use.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                os.makedirs(DEFAULT_DIR, exist_ok=True)
+                _index = SearchIndex(os.path.join(DEFAULT_DIR, "search.sqlite"))
+    return _index
+
+def index_channel(handle: str, df: pd.DataFrame) -> int:
+    """
+    Fold a freshly fetched channel frame into the search index (new and edited videos only).
+    Projected frames without the indexed text columns are skipped.
+    """
+    if not settings.search_index or df.empty or not set(INDEXED_COLUMNS) <= set(df.columns):
+        return 0
+    with metrics.stage("index"):
+        changed = get_index().index_channel(handle, df)
+    metrics.add("indexed_videos", changed)
+    return changed
+
+def index_cached(handles: Iterable[str]) -> int:
+    """
+    Index the cached snapshots of `handles` without calling the API (e.g. channels
+    cached before the index existed). Returns the number of videos (re)indexed.
+    """
+    total = 0
+    for h in handles:
+        entry = get_frame_entry(h)
+        if entry is not None and set(INDEXED_COLUMNS) <= set(entry[1].columns):
+            total += get_index().index_channel(h, entry[1])
+    return total
+
+def search_videos(
+    query: str = "",
+    tags: Sequence[str] = (),
+    handle: Optional[str] = None,
+    in_descriptions: bool = True,
+    limit: int = 50,
+) -> pd.DataFrame:
+    """
+    Cached videos whose title (and description, unless in_descriptions=False) contains
+    every word of `query` and which carry every tag in `tags`, newest first.
+    Columns: video_id, channel, title, published_at.
+    """
+    fields = ("title", "description") if in_descriptions else ("title",)
+    with metrics.stage("search"):
+        return get_index().search(tokenize(query), tags, fields=fields, channel=handle, limit=limit)
+
+def videos_by_tag(tag: str, handle: Optional[str] = None, limit: int = 50) -> pd.DataFrame:
+    return search_videos(tags=[tag], handle=handle, limit=limit)
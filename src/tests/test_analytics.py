@@ -0,0 +1,58 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from src.data.io import items_to_df
+from src.services import analytics
+from src.services.analytics import compute, summarize, update
+
+def _item(i, published, views, category="10", duration="PT1M", definition="hd", tags=("kids",)):
+    return {
+        "id": f"v{i}",
+        "snippet": {"title": f"T{i}", "publishedAt": published, "categoryId": category, "tags": list(tags)},
+        "statistics": {"viewCount": str(views), "likeCount": str(views // 10), "commentCount": "1"},
+        "contentDetails": {"duration": duration, "definition": definition, "caption": "false"},
+    }
+
+ITEMS = [
+    _item(1, "2024-01-01T10:00:00Z", 100, duration="PT30S"),
+    _item(2, "2024-01-08T10:00:00Z", 300, duration="PT90S", tags=("kids", "songs")),
+    _item(3, "2024-02-05T10:00:00Z", 500, category="24", duration="PT10M", definition="sd", tags=()),
+]
+
+def _canonical(state):
+    return json.dumps(state, sort_keys=True)
+
+def test_summary_from_aggregates():
+    s = summarize(compute(items_to_df(ITEMS)))
+    assert s["totals"]["videos"] == 3 and s["totals"]["views"] == 900
+    assert s["views_per_month"][["month", "videos", "views"]].values.tolist() == [["2024-01", 2, 400], ["2024-02", 1, 500]]
+    durations = s["duration_by_category"].set_index("category_id")["median_duration_s"]
+    assert durations["10"] == 60.0 and durations["24"] == 600.0
+    assert s["top_tags"].values.tolist()[0] == ["kids", 2, 400]
+    assert s["engagement_by_definition"].set_index("definition").loc["sd", "like_rate"] == pytest.approx(0.1)
+    assert s["uploads_by_weekday"].set_index("weekday").loc["Mon", "videos"] == 3
+    assert s["totals"]["median_gap_days"] == pytest.approx(17.5)
+
+def test_incremental_update_matches_full_recompute():
+    old = items_to_df(ITEMS)
+    state = compute(old)
+    # One new upload plus refreshed statistics for one known video
+    refreshed = [_item(4, "2024-03-04T10:00:00Z", 50, tags=("new",)), *ITEMS]
+    refreshed[2] = _item(2, "2024-01-08T10:00:00Z", 1000, duration="PT90S", tags=("kids", "songs"))
+    new = items_to_df(refreshed)
+    assert _canonical(update(state, old, new)) == _canonical(compute(new))
+
+def test_update_falls_back_to_recompute_when_videos_disappear():
+    old = items_to_df(ITEMS)
+    new = items_to_df(ITEMS[:2])
+    assert _canonical(update(compute(old), old, new)) == _canonical(compute(new))
+
+def test_state_is_stored_apart_from_channel_frames(tmp_path, monkeypatch):
+    monkeypatch.setattr(analytics, "ANALYTICS_DIR", str(tmp_path))
+    state = analytics.update_channel_analytics("@Demo", items_to_df(ITEMS))
+    # Its own directory: no key shared with a handle's frame, no eviction by frame churn
+    assert os.listdir(tmp_path) and all(n.startswith("_Demo.") for n in os.listdir(tmp_path))
+    assert _canonical(analytics.load_analytics("@Demo")) == _canonical(state)
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from src.data.cache import (
+    SingleFlight,
+    get_cache,
+    get_cache_entry,
+    set_cache,
+    clear_cache,
+    get_frame,
+    get_frame_entry,
+    set_frame,
+)
+from src.data.columnar import read_frame, write_frame
+
+def _typed_df() -> pd.DataFrame:
+    return pd.DataFrame({
+        "video_id": ["v1", "v2", "v3"],
+        "view_count": np.array([10, 20, 30], dtype="int64"),
+        "like_count": pd.array([1, None, 3], dtype="Int64"),
+        "ratio": [0.5, np.nan, 0.25],
+        "definition": pd.Categorical(["hd", "sd", "hd"]),
+        "published_ts": pd.to_datetime(["2023-01-01T00:00:00Z", None, "2023-03-01T12:30:00Z"]),
+        "description": ["café", None, "日本"],
+    })
+
+def test_columnar_round_trip_preserves_dtypes(tmp_path):
+    df = _typed_df()
+    path = str(tmp_path / "frame.ycol")
+    write_frame(df, path, meta={"columns": list(df.columns)})
+
+    out, meta = read_frame(path)
+    assert_frame_equal(out, df)
+    assert meta["columns"] == list(df.columns)
+    # Numeric columns come straight off the read-only memory map, not a copy
+    assert not out["view_count"].to_numpy().flags.writeable
+
+    subset, _ = read_frame(path, columns=["video_id", "like_count"], use_mmap=False)
+    assert list(subset.columns) == ["video_id", "like_count"]
+    assert_frame_equal(subset, df[["video_id", "like_count"]])
+
+def test_frame_cache_ttl_and_legacy_json_fallback(tmp_path):
+    cache_dir = str(tmp_path)
+    legacy_rows = [{"video_id": "old", "view_count": 1}]
+    set_cache("@Demo", legacy_rows, cache_dir=cache_dir)
+
+    # Legacy JSON records are still readable as a frame
+    saved_at, df, _ = get_frame_entry("@Demo", cache_dir=cache_dir)
+    assert df["video_id"].tolist() == ["old"]
+
+    set_frame("@Demo", _typed_df(), cache_dir=cache_dir)
+    assert get_cache("@Demo", cache_dir=cache_dir) is None  # legacy file replaced
+    assert_frame_equal(get_frame("@Demo", cache_dir=cache_dir), _typed_df())
+    assert get_frame("@Demo", cache_dir=cache_dir, ttl_seconds=-1) is None
+
+    clear_cache("@Demo", cache_dir=cache_dir)
+    assert get_frame_entry("@Demo", cache_dir=cache_dir) is None
+
+def test_json_cache_api_unchanged(tmp_path):
+    set_cache("k", {"a": [1, 2]}, cache_dir=str(tmp_path))
+    assert get_cache("k", cache_dir=str(tmp_path)) == {"a": [1, 2]}
+    blob = json.loads((tmp_path / "k.json").read_text(encoding="utf-8"))
+    assert blob["saved_at"] <= time.time()
+
+def test_memory_tier_serves_repeat_reads_and_sees_rewrites(tmp_path):
+    set_cache("k", [1], cache_dir=str(tmp_path))
+    with patch("src.data.cache.json.load", wraps=json.load) as load:
+        assert get_cache("k", cache_dir=str(tmp_path)) == [1]
+        assert get_cache("k", cache_dir=str(tmp_path)) == [1]
+        assert load.call_count == 1  # second read came from memory
+        set_cache("k", [2], cache_dir=str(tmp_path))
+        assert get_cache("k", cache_dir=str(tmp_path)) == [2]
+        assert load.call_count == 2
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache_dir = str(tmp_path)
+    payload = "x" * 1000
+    set_cache("a", payload, cache_dir=cache_dir)
+    set_cache("b", payload, cache_dir=cache_dir)
+    # Backdate both, then read "a" so "b" becomes least recently used
+    for name in ("a.json", "b.json"):
+        os.utime(tmp_path / name, (time.time() - 100, time.time() - 100))
+    get_cache_entry("a", cache_dir=cache_dir)
+    set_cache("c", payload, cache_dir=cache_dir, max_bytes=2500)
+
+    assert sorted(p.name for p in tmp_path.glob("*.json")) == ["a.json", "c.json"]
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_single_flight_collapses_concurrent_calls():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def crawl():
+        calls.append(1)
+        started.set()
+        release.wait(timeout=5)
+        return "df"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("@h", crawl)))
+    leader.start()
+    started.wait(timeout=5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do("@h", crawl))) for _ in range(9)]
+    for t in followers:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in [leader] + followers:
+        t.join(timeout=5)
+    assert results == ["df"] * 10
+    assert len(calls) == 1
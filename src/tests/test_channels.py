@@ -0,0 +1,72 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.services.channels import resolve_channel, resolve_channels
+from src.youtube_api.client import ChannelNotFound
+
+CHANNEL_IDS = [f"UC{i:022d}" for i in range(3)]
+
+@pytest.fixture
+def store():
+    """
+    In-memory stand-in for the JSON cache so tests never touch cache/.
+    """
+    blobs = {}
+    with patch("src.services.channels.get_cache", side_effect=lambda k, ttl_seconds: blobs.get(k)), \
+         patch("src.services.channels.set_cache", side_effect=lambda k, v: blobs.__setitem__(k, v)), \
+         patch("src.services.channels.get_channel_and_uploads") as p_handle, \
+         patch("src.services.channels.get_uploads_for_channel_ids") as p_ids:
+
+        def by_handle(h):
+            if h == "@missing":
+                raise ChannelNotFound(f"Channel not found for handle: {h}")
+            return f"UC_{h}", f"UU_{h}"
+
+        p_handle.side_effect = by_handle
+        p_ids.side_effect = lambda ids: {cid: "UU" + cid[2:] for cid in ids if cid != CHANNEL_IDS[2]}
+        yield {"blobs": blobs, "by_handle": p_handle, "by_ids": p_ids}
+
+def test_bulk_resolution_and_long_lived_cache(store):
+    refs = ["@a", "@b", "@missing"] + CHANNEL_IDS
+    first = resolve_channels(refs)
+    assert first["@a"] == ("UC_@a", "UU_@a")
+    assert first["@missing"] is None
+    assert first[CHANNEL_IDS[0]] == (CHANNEL_IDS[0], "UU" + CHANNEL_IDS[0][2:])
+    assert first[CHANNEL_IDS[2]] is None
+    # Channel IDs share one bulk channels.list call; handles go one by one
+    store["by_ids"].assert_called_once_with(CHANNEL_IDS)
+    assert store["by_handle"].call_count == 3
+
+    # Second lookup (including negative entries) is served entirely from cache
+    assert resolve_channels(refs) == first
+    assert store["by_handle"].call_count == 3
+    store["by_ids"].assert_called_once()
+    with pytest.raises(ValueError):
+        resolve_channel("@missing")
+
+def test_negative_entries_expire_before_positive_ones(store):
+    resolve_channels(["@a", "@missing"])
+    day_and_a_bit = 86400 + 60
+    for entry in store["blobs"]["_channel_map"].values():
+        entry["saved_at"] -= day_and_a_bit
+    resolve_channels(["@a", "@missing"])
+    # Only the unknown handle is re-checked
+    assert [c.args[0] for c in store["by_handle"].call_args_list] == ["@a", "@missing", "@missing"]
+
+def test_transport_errors_are_collected_not_cached(store):
+    store["by_handle"].side_effect = RuntimeError("boom")
+    errors = {}
+    assert resolve_channels(["@flaky"], errors=errors) == {}
+    assert isinstance(errors["@flaky"], RuntimeError)
+    assert "@flaky" not in store["blobs"].get("_channel_map", {})
+    with pytest.raises(RuntimeError):
+        resolve_channel("@flaky")
+
+def test_malformed_responses_are_not_cached_as_missing(store):
+    # requests' JSONDecodeError is a ValueError too; it must not read as "no such channel"
+    store["by_handle"].side_effect = ValueError("Expecting value: line 1 column 1")
+    errors = {}
+    assert resolve_channels(["@glitch"], errors=errors) == {}
+    assert "@glitch" in errors and "@glitch" not in store["blobs"].get("_channel_map", {})
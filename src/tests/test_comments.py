@@ -0,0 +1,44 @@
+import pandas as pd
+
+from src.data.comment_store import CommentStore
+from src.data.io import comments_to_df
+from src.services.comments import plan_targets
+
+def _thread(vid, n, ts):
+    return {"id": f"{vid}c{n}", "snippet": {"videoId": vid, "totalReplyCount": n, "topLevelComment": {
+        "snippet": {"authorDisplayName": "a", "textDisplay": "hi, there", "likeCount": n, "publishedAt": ts}}}}
+
+def test_store_appends_parts_and_keeps_the_latest_copy(tmp_path):
+    store = CommentStore("@a", str(tmp_path))
+    for fmt, threads in (("jsonl", [_thread("v1", 1, "2024-01-01T00:00:00Z")]),
+                         ("csv", [_thread("v1", 1, "2024-01-01T00:00:00Z"), _thread("v2", 2, "2024-02-01T00:00:00Z")])):
+        with store.new_part(fmt) as w:
+            w.write(comments_to_df(threads))
+    assert len(store.parts()) == 2
+    df = store.load()
+    assert df["comment_id"].tolist() == ["v2c2", "v1c1"]
+    assert df["like_count"].tolist() == [2, 1] and df["author_channel_id"].isna().all()
+
+def test_watermarks_only_move_forward(tmp_path):
+    store = CommentStore("@a", str(tmp_path))
+    store.update_watermarks({"v1": {"newest": "2024-02-01T00:00:00Z", "count": 5}})
+    store.update_watermarks({"v1": {"newest": None, "count": 6}, "v2": {"newest": None, "count": None}})
+    assert store.watermarks() == {"v1": {"newest": "2024-02-01T00:00:00Z", "count": 6},
+                                  "v2": {"newest": None, "count": None}}
+
+def test_plan_targets_skips_unchanged_videos():
+    videos = pd.DataFrame({"video_id": ["v1", "v2", "v3", "v4"],
+                           "comment_count": pd.array([5, 0, 7, None], dtype="Int64")})
+    marks = {"v1": {"newest": "2024-02-01T00:00:00Z", "count": 5},
+             "v3": {"newest": "2024-02-01T00:00:00Z", "count": 6}}
+    targets, skipped = plan_targets(videos, marks, since="2024-01-01T00:00:00Z", max_per_video=10)
+    assert skipped == 2
+    assert [(t.video_id, t.since, t.limit) for t in targets] == [
+        ("v3", "2024-02-01T00:00:00Z", 10), ("v4", "2024-01-01T00:00:00Z", 10)]
+
+def test_plan_targets_pages_videos_whose_count_is_unknown():
+    videos = pd.DataFrame({"video_id": ["v1"], "comment_count": pd.array([None], dtype="Int64")})
+    marks = {"v1": {"newest": "2024-02-01T00:00:00Z", "count": None}}
+    assert plan_targets(videos, marks)[1] == 1
+    targets, skipped = plan_targets(videos, marks, unknown={"v1"})
+    assert skipped == 0 and [t.since for t in targets] == ["2024-02-01T00:00:00Z"]
@@ -0,0 +1,73 @@
+import argparse
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+from src.cli import client, daemon
+from src.services import search
+
+@pytest.fixture
+def server(monkeypatch):
+    srv = daemon.make_server("127.0.0.1:0")
+    monkeypatch.setattr(sys, "stdout", srv.output)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    host, port = srv.server_address
+    yield f"{host}:{port}"
+    srv.shutdown()
+    srv.server_close()
+
+def _args(**kw):
+    base = {"handle": None, "handles_file": None, "search": None, "tag": None, "reindex": False,
+            "limit": 50, "profile": False, "metrics_file": None, "out": "videos.csv", "out_dir": None}
+    return argparse.Namespace(**{**base, **kw})
+
+def test_run_remote_returns_the_daemon_output(server, monkeypatch, capsys):
+    calls = []
+
+    def fake_search(query="", tags=(), handle=None, limit=50, **kw):
+        calls.append((query, list(tags), handle, limit))
+        return pd.DataFrame({"video_id": ["v1"], "channel": ["@a"], "title": ["Bus song"],
+                             "published_at": ["2023-01-01T00:00:00Z"]})
+
+    monkeypatch.setattr(search, "search_videos", fake_search)
+    assert client.is_running(server)
+    status = client.run_remote(_args(search="bus", tag=["kids"], limit=5), address=server)
+    assert status == 0
+    assert calls == [("bus", ["kids"], None, 5)]
+    out = capsys.readouterr().out
+    assert "Bus song" in out and "1 matches" in out
+
+def test_errors_are_reported_and_the_daemon_keeps_serving(server, monkeypatch, capsys):
+    def broken(*a, **kw):
+        raise ValueError("index is corrupt")
+
+    monkeypatch.setattr(search, "search_videos", broken)
+    assert client.run_remote(_args(search="bus"), address=server) == 1
+    assert "ValueError: index is corrupt" in capsys.readouterr().out
+    assert client.call("/health", address=server)["requests"] == 1
+
+def test_a_request_cannot_change_the_daemon_wide_request_cap(server, monkeypatch, tmp_path):
+    from src.services import videos
+    from src.youtube_api import client as yt
+    from src.youtube_api.transport import Transport
+
+    monkeypatch.setattr(yt, "_transport", Transport(pool_size=4, timeout_s=5))
+    handles = tmp_path / "handles.txt"
+    handles.write_text("@a\n")
+    monkeypatch.setattr(videos, "fetch_channels_df", lambda handles, max_workers=None, columns=None: ({}, []))
+    cap = yt.get_transport()._in_flight
+    args = _args(handles_file=str(handles), out=str(tmp_path / "videos.csv"), max_workers=1, prewarm=False, stream=False, columns=None,
+                 partition_by=None, format=None, compress=None, summary=False)
+    assert client.run_remote(args, address=server) == 0
+    assert yt.get_transport()._in_flight is cap
+
+def test_unknown_arguments_are_rejected(server, capsys):
+    reply = client.call("/run", {"args": {"search": "bus", "__class__": "x"}}, address=server)
+    assert reply["error"] == "ValueError: unknown arguments: __class__"
+
+def test_tcp_daemon_refuses_non_loopback_addresses():
+    with pytest.raises(SystemExit):
+        daemon.make_server("0.0.0.0:0")
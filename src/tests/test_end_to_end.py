@@ -0,0 +1,111 @@
+import dataclasses
+import pytest
+
+from benchmarks.standin import comment_threads, comments_disabled, start_server
+from src.youtube_api import client
+from src.youtube_api.transport import Transport
+from src.services import videos
+from src.services.comments import harvest_comments, load_comments
+
+@pytest.fixture
+def standin(monkeypatch, tmp_path):
+    server, state, base_url = start_server()
+    monkeypatch.setattr(client, "settings", dataclasses.replace(client.settings, base_url=base_url))
+    # Store-less transport, so the suite never opens cache/etags.sqlite
+    monkeypatch.setattr(client, "_transport", Transport(pool_size=16, timeout_s=30))
+    # Keep the crawl away from the real cache directory
+    frames = {}
+    monkeypatch.setattr(videos, "get_frame_entry", lambda key: frames.get(key))
+    monkeypatch.setattr(videos, "set_frame", lambda key, df, meta=None: frames.__setitem__(key, (0, df, meta or {})) or 0)
+    monkeypatch.setattr(videos, "resolve_channel", client.get_channel_and_uploads)
+    monkeypatch.setattr(videos, "record_snapshot", lambda handle, df: 0)
+    monkeypatch.setattr(videos, "update_channel_analytics", lambda handle, df, previous=None: {})
+    monkeypatch.setattr(videos, "index_channel", lambda handle, df: 0)
+    monkeypatch.setattr(videos, "JOURNAL_DIR", str(tmp_path / "journals"))
+    yield state
+    server.shutdown()
+
+def test_fetch_channel_df_against_standin(standin):
+    df = videos.fetch_channel_df("@synth_120", incremental=False)
+    assert len(df) == 120
+    assert df["video_id"].is_unique
+    assert df["view_count"].notna().all()
+    counts = standin.snapshot()["requests"]
+    # 1 channels.list + 3 playlist pages + 3 videos.list batches
+    assert counts == {"channels": 1, "playlistItems": 3, "videos": 3}
+
+def test_iter_channel_frames_streams_chunks(standin, tmp_path):
+    chunks = list(videos.iter_channel_frames("@synth_120", chunk_size=50))
+    assert [len(c) for c in chunks] == [50, 50, 20]
+    ids = [v for c in chunks for v in c["video_id"]]
+    assert ids == [f"s120v{i:08d}" for i in range(120)]
+
+    from src.data.io import ChunkWriter
+    with ChunkWriter(str(tmp_path / "out.jsonl")) as w:
+        for c in chunks:
+            w.write(c)
+    assert w.rows == 120
+    assert len((tmp_path / "out.jsonl").read_text(encoding="utf-8").splitlines()) == 120
+
+def test_interrupted_crawl_resumes_from_its_journal(standin, monkeypatch, tmp_path):
+    real_batch = client._fetch_video_batch
+    failed = []
+
+    def flaky_batch(chunk, *args):
+        # The fourth batch fails once
+        if chunk[0] == "s300v00000150" and not failed:
+            failed.append(chunk[0])
+            raise ConnectionError("network went away")
+        return real_batch(chunk, *args)
+
+    monkeypatch.setattr(client, "_fetch_video_batch", flaky_batch)
+    with pytest.raises(ConnectionError):
+        videos.fetch_channel_df("@synth_300", incremental=False)
+    assert len(list((tmp_path / "journals").glob("*.jsonl"))) == 1
+
+    before = standin.snapshot()["requests"]
+    df = videos.fetch_channel_df("@synth_300", incremental=False)
+    after = standin.snapshot()["requests"]
+    assert df["video_id"].tolist() == [f"s300v{i:08d}" for i in range(300)]
+    # Batches 1-3 were journaled; only the rest are fetched again
+    assert after["videos"] - before["videos"] == 3
+    assert after["playlistItems"] - before["playlistItems"] < 6
+    assert list((tmp_path / "journals").iterdir()) == []
+
+def test_comment_harvest_streams_to_disk_and_refreshes_incrementally(standin, tmp_path):
+    root = str(tmp_path / "comments")
+    n = 40
+    expected = sum(comment_threads(i, standin) for i in range(n))
+    run = harvest_comments(f"@synth_{n}", root=root, max_workers=4, chunk_rows=500)
+    assert (run.comments, run.failed, run.error) == (expected, 0, None)
+    assert run.unavailable == sum(comments_disabled(i) for i in range(n))
+    df = load_comments(f"@synth_{n}", root=root)
+    assert len(df) == expected and df["comment_id"].is_unique
+    assert str(df["like_count"].dtype) == "Int64"
+
+    pages = standin.snapshot()["requests"]["commentThreads"]
+    again = harvest_comments(f"@synth_{n}", root=root)
+    assert (again.comments, again.videos, again.skipped, again.path) == (0, 0, n, None)
+    assert standin.snapshot()["requests"]["commentThreads"] == pages
+
+    standin.new_comments = 2
+    fresh = harvest_comments(f"@synth_{n}", root=root)
+    with_comments = sum(not comments_disabled(i) for i in range(n))
+    assert (fresh.comments, fresh.videos) == (2 * with_comments, with_comments)
+    # One page per video: paging stops at the first already-stored comment
+    assert standin.snapshot()["requests"]["commentThreads"] - pages == with_comments
+    assert len(load_comments(f"@synth_{n}", root=root)) == expected + 2 * with_comments
+
+def test_comment_harvest_sees_new_comments_beyond_the_hot_window(standin, tmp_path):
+    n = 80  # the snapshot refresh only re-reads counts of the newest 50
+    harvest_comments(f"@synth_{n}", root=str(tmp_path))
+    standin.new_comments = 1
+    fresh = harvest_comments(f"@synth_{n}", root=str(tmp_path))
+    assert fresh.videos == sum(not comments_disabled(i) for i in range(n))
+
+def test_comment_harvest_caps_and_since(standin, tmp_path):
+    run = harvest_comments("@synth_30", root=str(tmp_path), max_per_video=3, since="2024-01-03")
+    df = load_comments("@synth_30", root=str(tmp_path))
+    assert run.comments == len(df) > 0
+    assert df.groupby("video_id").size().max() == 3
+    assert (df["published_at"] > "2024-01-03T00:00:00Z").all()
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from src.data.history import HistoryStore
+
+DAY = 86400
+T0 = 1_700_000_000
+
+def _frame(counts):
+    return pd.DataFrame({
+        "video_id": list(counts),
+        "view_count": pd.array([c[0] for c in counts.values()], dtype="Int64"),
+        "like_count": pd.array([c[1] for c in counts.values()], dtype="Int64"),
+        "comment_count": pd.array([c[2] for c in counts.values()], dtype="Int64"),
+    })
+
+@pytest.fixture
+def store(tmp_path):
+    s = HistoryStore(str(tmp_path / "history.sqlite"))
+    s.record("@a", _frame({"v1": (100, 10, 1), "v2": (50, None, 0)}), ts=T0)
+    # v2 unchanged: only v1 is written
+    s.record("@a", _frame({"v1": (400, 20, 2), "v2": (50, None, 0)}), ts=T0 + DAY)
+    s.record("@a", _frame({"v1": (700, 30, 3), "v2": (250, 5, 0), "v3": (9, 0, 0)}), ts=T0 + 2 * DAY)
+    s.record("@b", _frame({"w1": (1000, 0, 0)}), ts=T0)
+    s.record("@b", _frame({"w1": (1100, 0, 0)}), ts=T0 + 2 * DAY)
+    yield s
+    s.close()
+
+def test_record_is_delta_encoded(store):
+    assert [r[2] for r in store.refreshes("@a")] == [2, 1, 3]
+    v2 = store.series("v2")
+    assert v2["view_count"].tolist() == [50, 250]
+    assert v2["like_count"].isna().tolist() == [True, False]
+    assert v2["ts"].iloc[0] == pd.Timestamp(T0, unit="s", tz="UTC")
+
+def test_growth_uses_values_carried_forward(store):
+    g = store.growth(since=T0 + DAY, until=T0 + 2 * DAY, channel="@a").set_index("video_id")
+    # v2 was unchanged at T0+DAY, so its T0 row still holds; v3 was not seen yet
+    assert set(g.index) == {"v1", "v2"}
+    assert g.loc["v2", "view_count_delta"] == 200
+    assert g.loc["v1", "view_count_per_day"] == pytest.approx(300.0)
+    assert g.index.tolist() == ["v1", "v2"]  # largest view growth first
+
+def test_top_movers_across_channels(store):
+    top = store.growth(since=T0, until=T0 + 2 * DAY, limit=2)
+    assert top["video_id"].tolist() == ["v1", "v2"]
+    assert top["view_count_delta"].tolist() == [600, 200]
+    likes = store.growth(since=T0, until=T0 + 2 * DAY, metric="like_count", limit=1)
+    assert likes["video_id"].tolist() == ["v1"]
+
+def test_point_lookups_use_the_index(store):
+    plan = store._db.execute(
+        "EXPLAIN QUERY PLAN SELECT MAX(ts) FROM stats WHERE video_id = ? AND ts <= ?", ("v1", T0)
+    ).fetchall()
+    assert not any("SCAN" in row[-1] for row in plan)
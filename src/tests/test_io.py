@@ -0,0 +1,171 @@
+import json
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+import pytest
+
+from src.youtube_api.models import Video
+from src.youtube_api.parsers import parse_video_items, video_request
+from src.data.io import (
+    ChunkWriter, add_derived_columns, export_format, export_frame, items_to_df, save_csv, source_columns,
+    videos_to_df,
+)
+
+ITEMS = [
+    {
+        "id": "a",
+        "snippet": {"title": "A", "publishedAt": "2024-01-01T00:00:00Z", "categoryId": "22",
+                    "tags": ["x", "y"], "channelTitle": "Chan", "description": "d"},
+        "statistics": {"viewCount": "12345678901", "likeCount": "7"},
+        "contentDetails": {"duration": "PT1H2M3S", "definition": "hd", "caption": "false"},
+    },
+    {
+        # Hidden stats, no tags, malformed count
+        "id": "b",
+        "snippet": {"title": "B", "publishedAt": "2024-01-02T00:00:00Z", "categoryId": "10"},
+        "statistics": {"commentCount": "n/a"},
+        "contentDetails": {"duration": "PT45S", "definition": "sd", "caption": "true"},
+    },
+]
+
+def test_items_to_df_matches_video_object_path():
+    fast = items_to_df(ITEMS)
+    slow = videos_to_df(parse_video_items(ITEMS))
+    assert list(fast.columns) == list(slow.columns)
+    assert_frame_equal(fast.astype(object).where(fast.notna(), None),
+                       slow.astype(object).where(slow.notna(), None))
+
+def test_parsed_videos_are_slotted_and_share_repeated_strings():
+    # Fresh string objects per item, as in a decoded API response
+    items = json.loads(json.dumps([ITEMS[0], dict(ITEMS[0], id="c")]))
+    a, c = parse_video_items(items)
+    assert not hasattr(a, "__dict__")
+    assert a.channel_title is c.channel_title and a.definition is c.definition
+    assert a.tags == ["x", "y"] and a.tags[0] is c.tags[0]
+    assert a.video_id == "a" and c.video_id == "c"
+
+def test_video_keeps_tags_as_passed():
+    v = Video("a", "t", "p", 1, tags=["x"])
+    assert v.tags == ["x"] and type(v.tags) is list
+    v.tags.append("y")
+    assert Video("a", "t", "p", 1, tags="abc").tags == "abc"
+    assert Video("a", "t", "p", 1, tags=("x",)).tags == ("x",)
+
+def test_items_to_df_column_types():
+    df = items_to_df(ITEMS)
+    assert str(df["view_count"].dtype) == "Int64"
+    assert df["view_count"].tolist() == [12345678901, 0]
+    assert df["like_count"].isna().tolist() == [False, True]
+    assert df["comment_count"].isna().all()
+    for col in ("category_id", "definition", "caption"):
+        assert isinstance(df[col].dtype, pd.CategoricalDtype)
+    assert df["tags"].tolist()[0] == "x;y"
+
+def test_video_request_asks_only_for_needed_parts_and_fields():
+    assert video_request(["video_id", "published_at", "view_count"]) == (
+        "snippet,statistics", "items(id,snippet(publishedAt),statistics(viewCount))")
+    assert video_request(["video_id"]) == ("id", "items(id)")
+
+def test_source_columns_expands_derived_columns():
+    assert source_columns(["like_view_ratio"]) == ("video_id", "published_at", "view_count", "like_count")
+    assert source_columns(["title"]) == ("video_id", "title", "published_at")
+    with pytest.raises(ValueError, match="nope"):
+        source_columns(["title", "nope"])
+
+def test_items_to_df_projected_matches_full_columns():
+    fields = ("video_id", "published_at", "view_count", "like_count")
+    narrow = items_to_df(ITEMS, fields)
+    full = items_to_df(ITEMS)
+    assert "title" not in narrow.columns and "duration_s" not in narrow.columns
+    assert_frame_equal(narrow[list(fields)], full[list(fields)])
+    pd.testing.assert_series_equal(narrow["like_view_ratio"], full["like_view_ratio"])
+
+def test_add_derived_columns():
+    df = pd.DataFrame({
+        "duration": ["PT1H2M3S", "PT45S", "P1DT1S", None, "garbage"],
+        "published_at": ["2024-01-01T00:00:00Z"] * 4 + [""],
+        "view_count": pd.array([100, 0, 10, None, 5], dtype="Int64"),
+        "like_count": pd.array([10, 5, None, 1, 1], dtype="Int64"),
+        "comment_count": pd.array([1, 0, 1, 1, None], dtype="Int64"),
+    })
+    out = add_derived_columns(df, now=pd.Timestamp("2024-01-11T00:00:00Z"))
+    assert out["duration_s"].tolist()[:3] == [3723, 45, 86401]
+    assert out["duration_s"].isna().tolist()[3:] == [True, True]
+    assert str(out["published_ts"].dt.tz) == "UTC"
+    assert out["like_view_ratio"].tolist()[0] == 0.1
+    assert pd.isna(out["like_view_ratio"].iloc[1])  # zero views -> no ratio
+    assert out["days_since_publish"].tolist()[0] == 10.0
+    assert pd.isna(out["days_since_publish"].iloc[4])
+
+def test_chunk_writer_appends_csv_with_one_header(tmp_path):
+    path = tmp_path / "out.csv"
+    with ChunkWriter(str(path)) as w:
+        w.write(items_to_df(ITEMS[:1]))
+        w.write(items_to_df(ITEMS[1:]))
+    assert w.fmt == "csv" and w.rows == 2
+    back = pd.read_csv(path)
+    assert back["video_id"].tolist() == ["a", "b"]
+    assert back["view_count"].tolist() == [12345678901, 0]
+
+def test_chunk_writer_jsonl(tmp_path):
+    import json
+    path = tmp_path / "out.jsonl"
+    with ChunkWriter(str(path)) as w:
+        w.write(items_to_df(ITEMS))
+    rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [r["video_id"] for r in rows] == ["a", "b"]
+    assert rows[1]["like_count"] is None
+
+def test_export_format_follows_the_file_name():
+    assert export_format("v.csv") == ("csv", None)
+    assert export_format("v.ndjson.gz") == ("jsonl", "gzip")
+    assert export_format("v.jsonl.zst") == ("jsonl", "zstd")
+    assert export_format("v.parquet") == ("parquet", None)
+
+def test_export_gzip_csv_matches_to_csv_across_chunks(tmp_path):
+    import gzip
+    df = add_derived_columns(items_to_df(ITEMS * 3))
+    path = tmp_path / "out.csv.gz"
+    # Parallel chunks become separate gzip members; readers see one stream
+    assert export_frame(df, str(path), chunk_rows=2, workers=2) == 6
+    assert gzip.decompress(path.read_bytes()).decode("utf-8") == df.to_csv(index=False)
+
+def test_export_parquet_round_trips_dtypes(tmp_path):
+    pytest.importorskip("pyarrow")
+    df = add_derived_columns(items_to_df(ITEMS * 3))
+    path = tmp_path / "out.parquet"
+    export_frame(df, str(path), chunk_rows=2)
+    back = pd.read_parquet(path)
+    assert back["video_id"].tolist() == df["video_id"].tolist()
+    assert back["view_count"].tolist() == [12345678901, 0] * 3
+    assert back["published_ts"].dt.tz is not None
+
+def test_export_zstd_jsonl(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    path = tmp_path / "out.jsonl.zst"
+    export_frame(items_to_df(ITEMS), str(path))
+    text = zstandard.ZstdDecompressor().stream_reader(path.open("rb")).read().decode("utf-8")
+    assert [json.loads(line)["video_id"] for line in text.splitlines()] == ["a", "b"]
+
+def test_export_partitioned_by_month_and_channel(tmp_path):
+    df = items_to_df(ITEMS).assign(handle=["@x", "@y"])
+    export_frame(df, str(tmp_path / "m"), partition_by="month")
+    assert sorted(p.name for p in (tmp_path / "m").iterdir()) == ["month=2024-01"]
+    export_frame(df, str(tmp_path / "c"), "jsonl", "gzip", partition_by="channel")
+    assert sorted(p.name for p in (tmp_path / "c").iterdir()) == ["channel=x", "channel=y"]
+    assert (tmp_path / "c" / "channel=x" / "videos.jsonl.gz").exists()
+
+def test_month_partitions_can_leave_out_the_key_column(tmp_path):
+    df = items_to_df(ITEMS)
+    export_frame(df, str(tmp_path), partition_by="month", columns=["video_id", "view_count"])
+    out = pd.read_csv(tmp_path / "month=2024-01" / "videos.csv")
+    assert list(out.columns) == ["video_id", "view_count"]
+    assert out["video_id"].tolist() == ["a", "b"]
+
+def test_save_csv_writes_csv_whatever_the_name(tmp_path):
+    df = items_to_df(ITEMS)
+    save_csv(df, str(tmp_path / "out.jsonl"))
+    assert (tmp_path / "out.jsonl").read_text(encoding="utf-8").startswith("video_id,")
+    save_csv(df, str(tmp_path / "out.csv.gz"))
+    assert pd.read_csv(tmp_path / "out.csv.gz")["video_id"].tolist() == ["a", "b"]
@@ -0,0 +1,69 @@
+import os
+
+from src.data.journal import open_journal
+
+HEADER = {"uploads": "UU1", "part": "snippet", "fields": "items(id,snippet(title))"}
+
+def _item(vid):
+    return {"id": vid, "snippet": {"title": vid.upper()}}
+
+def test_reopened_journal_resumes_pages_and_batches(tmp_path):
+    j = open_journal("@a", HEADER, str(tmp_path))
+    assert not j.resumed
+    assert j.add_page(["v1", "v2", "v3"], "tok2") == ["v1", "v2", "v3"]
+    j.add_batch([_item("v1"), _item("v2")])
+    j.release()
+
+    j = open_journal("@a", HEADER, str(tmp_path))
+    assert j.resumed
+    assert (j.next_token, j.paged_all) == ("tok2", False)
+    assert j.unfetched_ids() == ["v3"]
+    # A repeated ID (page boundaries shifted by a new upload) is only reported once
+    assert j.add_page(["v3", "v4"], None) == ["v4"]
+    j.add_batch([_item("v4"), _item("v3")])
+    assert j.paged_all
+    assert [it["id"] for it in j.ordered_items()] == ["v1", "v2", "v3", "v4"]
+    j.discard()
+    assert os.listdir(tmp_path) == []
+
+def test_torn_tail_is_dropped_and_appends_continue(tmp_path):
+    j = open_journal("@a", HEADER, str(tmp_path))
+    j.add_page(["v1", "v2"], "tok2")
+    j.add_batch([_item("v1")])
+    j.release()
+    with open(j.path, "a", encoding="utf-8") as fh:
+        fh.write('{"items":[{"id":"v2","snip')  # crash mid-write
+
+    j = open_journal("@a", HEADER, str(tmp_path))
+    assert j.unfetched_ids() == ["v2"]
+    j.add_batch([_item("v2")])
+    j.release()
+    j = open_journal("@a", HEADER, str(tmp_path))
+    assert [it["id"] for it in j.ordered_items()] == ["v1", "v2"]
+    j.close()
+
+def test_other_crawls_and_old_journals_start_over(tmp_path):
+    j = open_journal("@a", HEADER, str(tmp_path))
+    j.add_page(["v1"], "tok2")
+    j.release()
+
+    narrow = open_journal("@a", {**HEADER, "fields": "items(id)"}, str(tmp_path))
+    assert not narrow.resumed and narrow.path != j.path
+    narrow.release()
+
+    fresh = open_journal("@a", HEADER, str(tmp_path), max_age_s=-1)
+    assert not fresh.resumed
+    fresh.release()
+    assert [n for n in os.listdir(tmp_path) if n.endswith(".jsonl")] == [os.path.basename(j.path)]
+
+def test_a_held_journal_is_not_opened_twice(tmp_path):
+    j = open_journal("@a", HEADER, str(tmp_path))
+    j.add_page(["v1"], "tok2")
+    j.close()
+    # Still held until the crawl's result is stored: a second crawl goes unjournaled
+    assert open_journal("@a", HEADER, str(tmp_path)) is None
+    j.release()
+    again = open_journal("@a", HEADER, str(tmp_path))
+    assert again.resumed
+    again.discard()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,56 @@
+import pandas as pd
+
+from src.metrics import Metrics, delta
+from src.data.io import items_to_df
+
+def test_stage_timers_and_counters():
+    m = Metrics()
+    with m.stage("parse"):
+        pass
+    with m.stage("parse"):
+        pass
+    m.add("requests", endpoint="videos", status="200")
+    m.add("requests", endpoint="videos", status="304")
+    m.add("wire_bytes", 1500, endpoint="videos")
+    snap = m.snapshot()
+    assert snap["stages"]["parse"]["calls"] == 2
+    assert m.counter("requests") == 2
+    assert m.counter("requests", endpoint="videos", status="304") == 1
+    assert snap["counters"]["wire_bytes{endpoint=videos}"] == 1500
+    m.reset()
+    assert m.snapshot() == {"stages": {}, "counters": {}}
+
+def test_delta_isolates_one_run():
+    m = Metrics()
+    m.add("rows_parsed", 10)
+    m.observe("videos_list", 0.5)
+    before = m.snapshot()
+    m.add("rows_parsed", 5)
+    m.observe("videos_list", 0.25)
+    d = delta(before, m.snapshot())
+    assert d["counters"] == {"rows_parsed": 5}
+    assert d["stages"]["videos_list"]["calls"] == 1
+    assert d["stages"]["videos_list"]["seconds"] == 0.25
+
+def test_prometheus_exposition(tmp_path):
+    m = Metrics()
+    m.observe("cache_read", 0.002)
+    m.add("cache_lookups", tier="memory")
+    m.add("quota_units", 3, endpoint="videos")
+    text = m.prometheus()
+    assert '# TYPE ytfetch_stage_seconds_total counter' in text
+    assert 'ytfetch_stage_calls_total{stage="cache_read"} 1' in text
+    assert 'ytfetch_cache_lookups_total{tier="memory"} 1' in text
+    assert 'ytfetch_quota_units_total{endpoint="videos"} 3' in text
+    path = tmp_path / "ytfetch.prom"
+    m.write_textfile(str(path))
+    assert path.read_text(encoding="utf-8") == text
+
+def test_pipeline_records_parse_stages():
+    from src.metrics import metrics
+    before = metrics.snapshot()
+    items_to_df([{"id": "v1", "snippet": {"title": "t", "publishedAt": "2024-01-01T00:00:00Z"},
+                  "statistics": {"viewCount": "3"}, "contentDetails": {"duration": "PT1M"}}])
+    d = delta(before, metrics.snapshot())
+    assert {"parse", "dataframe", "derived"} <= set(d["stages"])
+    assert d["counters"]["rows_parsed"] == 1
@@ -0,0 +1,54 @@
+from unittest.mock import patch
+
+from src.services.prewarm import Prewarmer, RETRY_AFTER_SECONDS
+from src.services.videos import CACHE_TTL_SECONDS
+
+class _Clock:
+    def __init__(self, t: float = 1_000_000.0):
+        self.t = t
+
+    def __call__(self) -> float:
+        return self.t
+
+def _warmer(handles, cached=None, fail=(), **kw):
+    clock = _Clock()
+    refreshed = []
+
+    def refresh(h):
+        if h in fail:
+            raise RuntimeError("boom")
+        refreshed.append(h)
+
+    cached = cached or {}
+    with patch("src.services.prewarm.get_frame_entry", side_effect=lambda h: cached.get(h)):
+        w = Prewarmer(handles, clock=clock, refresh=refresh, **kw)
+    return w, clock, refreshed
+
+def test_cold_watchlist_is_warmed_gradually():
+    w, clock, refreshed = _warmer(["@a", "@b", "@c"])
+    gap = CACHE_TTL_SECONDS * 0.8 / 3
+    assert w.min_gap_s == gap
+    assert w.run_once() == "@a"
+    # Everything is due, but refreshes are spaced out
+    assert w.run_once() is None
+    clock.t += gap
+    assert w.run_once() == "@b"
+    clock.t += gap
+    assert w.run_once() == "@c"
+    assert refreshed == ["@a", "@b", "@c"]
+    # Next round comes one refresh period after each channel's own refresh
+    assert w.next_run() == 1_000_000.0 + CACHE_TTL_SECONDS * 0.8
+
+def test_fresh_snapshots_are_refreshed_before_expiry():
+    now = 1_000_000.0
+    w, clock, refreshed = _warmer(["@a"], cached={"@a": (now - 100, None, {})})
+    assert w.next_run() == now - 100 + CACHE_TTL_SECONDS * 0.8
+    assert w.run_once() is None
+    clock.t = w.next_run()
+    assert w.run_once() == "@a"
+
+def test_failed_refresh_is_retried_later():
+    w, clock, refreshed = _warmer(["@a"], fail={"@a"}, min_gap_s=0)
+    assert w.run_once() == "@a"
+    assert "boom" in w.last_error["@a"]
+    assert w.next_run() == clock.t + RETRY_AFTER_SECONDS
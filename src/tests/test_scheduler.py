@@ -0,0 +1,105 @@
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+import requests
+
+from src.youtube_api.scheduler import (
+    BATCH,
+    INTERACTIVE,
+    QuotaBudget,
+    QuotaExceeded,
+    Scheduler,
+    TokenBucket,
+    request_priority,
+    current_priority,
+    submit_with_context,
+)
+
+def _http_error(status, reason="", retry_after=None):
+    resp = Mock()
+    resp.status_code = status
+    resp.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+    resp.json.return_value = {"error": {"errors": [{"reason": reason}]}} if reason else {}
+    return requests.HTTPError(f"HTTP {status}", response=resp)
+
+def _scheduler(**kw):
+    sleeps = []
+    sched = Scheduler(rate_per_s=1000, burst=1000, daily_units=kw.pop("daily_units", 100),
+                      sleep=sleeps.append, **kw)
+    return sched, sleeps
+
+def test_retries_transient_errors_with_retry_after_and_backoff():
+    sched, sleeps = _scheduler(max_retries=3, backoff_base_s=0.5)
+    fn = Mock(side_effect=[_http_error(503, retry_after="7"), _http_error(500), {"ok": True}])
+    assert sched.execute("videos", fn) == {"ok": True}
+    assert fn.call_count == 3
+    assert sleeps[0] == 7.0                 # Retry-After honoured
+    assert 0 <= sleeps[1] <= 1.0            # jittered base * 2^1
+    assert sched.budget.snapshot()["used"] == {"videos": 3}
+    assert sched.retries == 2
+
+def test_gives_up_after_max_retries_and_on_client_errors():
+    sched, sleeps = _scheduler(max_retries=2)
+    fn = Mock(side_effect=_http_error(429))
+    with pytest.raises(requests.HTTPError):
+        sched.execute("videos", fn)
+    assert fn.call_count == 3
+
+    fn = Mock(side_effect=_http_error(404))
+    with pytest.raises(requests.HTTPError):
+        sched.execute("videos", fn)
+    assert fn.call_count == 1
+
+def test_api_quota_exceeded_is_terminal():
+    sched, sleeps = _scheduler()
+    fn = Mock(side_effect=_http_error(403, reason="quotaExceeded"))
+    with pytest.raises(QuotaExceeded):
+        sched.execute("videos", fn)
+    assert fn.call_count == 1 and not sleeps
+    # Later calls fail fast without hitting the network
+    with pytest.raises(QuotaExceeded):
+        sched.execute("videos", Mock())
+
+def test_local_budget_counts_units_per_endpoint():
+    budget = QuotaBudget(daily_units=102)
+    budget.spend("videos")
+    budget.spend("search")
+    assert budget.snapshot()["used"] == {"videos": 1, "search": 100}
+    assert budget.remaining() == 1
+    with pytest.raises(QuotaExceeded):
+        budget.spend("search")
+
+def test_token_bucket_rate_limits():
+    bucket = TokenBucket(rate_per_s=50, capacity=1)
+    t0 = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # 1 token up front, then 5 more at 50/s
+    assert time.monotonic() - t0 >= 0.09
+
+def test_token_bucket_serves_interactive_before_batch():
+    bucket = TokenBucket(rate_per_s=20, capacity=1)
+    bucket.acquire()  # drain
+    order = []
+
+    def take(prio, name):
+        bucket.acquire(prio)
+        order.append(name)
+
+    batch = [threading.Thread(target=take, args=(BATCH, f"batch{i}")) for i in range(3)]
+    for t in batch:
+        t.start()
+    time.sleep(0.01)
+    interactive = threading.Thread(target=take, args=(INTERACTIVE, "interactive"))
+    interactive.start()
+    for t in batch + [interactive]:
+        t.join(timeout=5)
+    assert order[0] == "interactive"
+
+def test_priority_propagates_into_worker_threads():
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=1) as pool, request_priority(BATCH):
+        assert submit_with_context(pool, current_priority).result() == BATCH
+    assert current_priority() == INTERACTIVE
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from src.data.search_index import SearchIndex, tokenize
+
+def _frame(videos):
+    return pd.DataFrame(
+        [(vid, title, desc, tags, published) for vid, (title, desc, tags, published) in videos.items()],
+        columns=["video_id", "title", "description", "tags", "published_at"],
+    )
+
+A = {
+    "v1": ("Wheels on the Bus", "Sing along with JJ", "kids;Nursery Rhymes", "2023-01-01T00:00:00Z"),
+    "v2": ("Bath Song", "Splash! Sing along in the bath", "kids;bath", "2023-02-01T00:00:00Z"),
+    "v3": ("Café time", "", None, "2023-03-01T00:00:00Z"),
+}
+
+@pytest.fixture
+def index(tmp_path):
+    ix = SearchIndex(str(tmp_path / "search.sqlite"))
+    ix.index_channel("@a", _frame(A))
+    ix.index_channel("@b", _frame({"w1": ("Bus stop", "", "travel", "2023-01-15T00:00:00Z")}))
+    yield ix
+    ix.close()
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    assert tokenize("The Wheels on the BUS, café-time!") == ["wheels", "on", "bus", "café", "time"]
+
+def test_keyword_and_tag_lookups(index):
+    assert index.search(["bus"])["video_id"].tolist() == ["w1", "v1"]
+    assert index.search(["bus"], channel="@a")["video_id"].tolist() == ["v1"]
+    # Every keyword must match; description words count unless excluded
+    assert index.search(["sing", "bath"])["video_id"].tolist() == ["v2"]
+    assert index.search(["splash"], fields=("title",)).empty
+    # Tags match exactly, case-insensitively
+    assert index.search(tags=["nursery rhymes"])["video_id"].tolist() == ["v1"]
+    assert index.search(tags=["nursery"]).empty
+    assert index.search(["song"], tags=["KIDS"])["video_id"].tolist() == ["v2"]
+    assert index.search(["café"])["title"].tolist() == ["Café time"]
+
+def test_reindex_rewrites_only_changed_and_drops_removed(index):
+    edited = dict(A, v2=("Bath Song (remix)",) + A["v2"][1:])
+    del edited["v3"]
+    edited["v4"] = ("Bus song", "", "kids", "2023-04-01T00:00:00Z")
+    assert index.index_channel("@a", _frame(edited)) == 2
+    assert index.search(["remix"])["video_id"].tolist() == ["v2"]
+    assert index.search(["café"]).empty
+    assert index.search(["bus"], tags=["kids"])["video_id"].tolist() == ["v4", "v1"]
+    assert index.stats()["videos"] == 4
+    # Nothing changed: nothing rewritten
+    assert index.index_channel("@a", _frame(edited)) == 0
@@ -1,10 +1,17 @@
+import dataclasses
+import threading
+import time
 import pandas as pd
 import pytest
 from unittest.mock import patch
 from pandas.testing import assert_frame_equal
 
 # System under test
-from src.services.videos import fetch_channel_df
+from src.config.settings import settings
+from src.services import videos
+from src.services.videos import fetch_channel_df, fetch_channels_df, get_channel_snapshot
+from src.data.cache import _memory, get_frame_entry as read_frame_entry, set_frame as set_frame_to_disk
+from src.data.io import DERIVED_COLUMNS, add_derived_columns
 
 # Sample fixtures representing minimal real API shapes after parsing
 CHANNEL_HANDLE = "@CoComelon"
@@ -96,35 +103,65 @@ def _expected_df() -> pd.DataFrame:
     return df.sort_values("published_at", ascending=False).reset_index(drop=True)
 
 @pytest.fixture
-def patches():
+def patches(tmp_path):
     """
     Patch the low-level client functions and caching so tests run isolated from
     network and without relying on local cache files.
     """
-    with patch("src.services.videos.get_channel_and_uploads") as p_get_chan, \
-         patch("src.services.videos.list_upload_video_ids") as p_list_ids, \
+    with patch("src.services.videos.JOURNAL_DIR", str(tmp_path / "journals")), \
+         patch("src.services.videos.iter_upload_pages") as p_pages, \
+         patch("src.services.videos.iter_video_batches") as p_batches, \
+         patch("src.services.videos.resolve_channel") as p_get_chan, \
+         patch("src.services.videos.resolve_channels") as p_resolve_many, \
+         patch("src.services.videos.iter_upload_video_ids") as p_list_ids, \
          patch("src.services.videos.fetch_video_items") as p_fetch_items, \
-         patch("src.services.videos.get_cache") as p_get_cache, \
-         patch("src.services.videos.set_cache") as p_set_cache:
+         patch("src.services.videos.get_frame_entry") as p_get_cache, \
+         patch("src.services.videos.set_frame") as p_set_cache, \
+         patch("src.services.videos.record_snapshot") as p_record, \
+         patch("src.services.videos.update_channel_analytics") as p_analytics, \
+         patch("src.services.videos.index_channel") as p_index:
 
         # Disable cache hits for deterministic behavior
         p_get_cache.return_value = None
+        p_set_cache.return_value = 1_700_000_000
 
         # Mock channel resolve and uploads playlist
         p_get_chan.return_value = ("UCxxxxChannel", UPLOADS_PLAYLIST_ID)
 
-        # Mock playlist enumeration
-        p_list_ids.return_value = VIDEO_IDS
+        def resolve_many(refs, max_workers=None, errors=None):
+            out = {}
+            for ref in refs:
+                try:
+                    out[ref] = p_get_chan(ref)
+                except ValueError:
+                    out[ref] = None
+            return out
+
+        p_resolve_many.side_effect = resolve_many
+
+        # Mock playlist enumeration (lazy iterator in the client)
+        p_list_ids.side_effect = lambda uploads: iter(VIDEO_IDS)
 
         # Mock videos.list items (raw API items before parsing)
         p_fetch_items.return_value = VIDEO_ITEMS
 
+        # The checkpointed crawl pages and batches through the same mocks: one page, one batch
+        p_pages.side_effect = lambda uploads, page_token=None: iter([(list(p_list_ids(uploads)), None)])
+
+        def batches(ids, max_workers=None, part="snippet,statistics,contentDetails", window=None, fields=None):
+            return iter([p_fetch_items(list(ids), part=part, fields=fields)])
+
+        p_batches.side_effect = batches
+
         yield {
-            "get_channel_and_uploads": p_get_chan,
-            "list_upload_video_ids": p_list_ids,
+            "resolve_channel": p_get_chan,
+            "iter_upload_video_ids": p_list_ids,
             "fetch_video_items": p_fetch_items,
-            "get_cache": p_get_cache,
-            "set_cache": p_set_cache,
+            "get_frame_entry": p_get_cache,
+            "set_frame": p_set_cache,
+            "record_snapshot": p_record,
+            "update_channel_analytics": p_analytics,
+            "index_channel": p_index,
         }
 
 def test_fetch_channel_df_happy_path(patches):
@@ -136,22 +173,33 @@ def test_fetch_channel_df_happy_path(patches):
     # Sort and reset index before compare to ignore ordering diff
     df_sorted = df.sort_values("published_at", ascending=False).reset_index(drop=True)
 
-    # Ensure columns match and values equal
-    assert list(df_sorted.columns) == list(exp.columns)
-    assert_frame_equal(df_sorted[exp.columns], exp, check_dtype=False)
+    # Ensure API columns come first, followed by the derived metrics, and values equal
+    assert list(df_sorted.columns) == list(exp.columns) + DERIVED_COLUMNS
+    assert_frame_equal(df_sorted[exp.columns].astype(object), exp.astype(object), check_dtype=False)
+    # Typed columns from the column-builder parse path
+    assert str(df["view_count"].dtype) == "Int64"
+    assert isinstance(df["definition"].dtype, pd.CategoricalDtype)
+    # Derived metrics are computed at ingest
+    by_id = df.set_index("video_id")
+    assert by_id.loc["vid1", "duration_s"] == 130
+    assert by_id.loc["vid2", "published_ts"] == pd.Timestamp("2023-02-02", tz="UTC")
+    assert by_id.loc["vid1", "like_view_ratio"] == pytest.approx(0.05)
+    assert by_id.loc["vid2", "comment_view_ratio"] == pytest.approx(7 / 2000)
+    assert (df["days_since_publish"] > 365).all()
 
     # Ensure client functions were called as expected
-    patches["get_channel_and_uploads"].assert_called_once_with(CHANNEL_HANDLE)
-    patches["list_upload_video_ids"].assert_called_once_with(UPLOADS_PLAYLIST_ID)
+    patches["resolve_channel"].assert_called_once_with(CHANNEL_HANDLE)
+    patches["iter_upload_video_ids"].assert_called_once_with(UPLOADS_PLAYLIST_ID)
 
-    # fetch_video_items should be called with the list of IDs (batched internally by service)
+    # fetch_video_items should be fed the lazy ID stream (batched internally by the client)
     patches["fetch_video_items"].assert_called_once()
     args, _ = patches["fetch_video_items"].call_args
-    assert args[0] == VIDEO_IDS  # first positional arg is the ids list
+    assert list(args[0]) == VIDEO_IDS  # first positional arg is the ids iterable
 
 def test_fetch_channel_df_no_videos(patches):
     # Make playlist empty
-    patches["list_upload_video_ids"].return_value = []
+    patches["iter_upload_video_ids"].side_effect = lambda uploads: iter([])
+    patches["fetch_video_items"].return_value = []
 
     df = fetch_channel_df(CHANNEL_HANDLE)
     # Expect empty DF with the defined columns from services.videos
@@ -159,18 +207,213 @@ def test_fetch_channel_df_no_videos(patches):
         "video_id","title","published_at","view_count",
         "like_count","comment_count","duration","category_id",
         "tags","definition","caption","channel_title","description"
-    ]
+    ] + DERIVED_COLUMNS
     assert list(df.columns) == expected_cols
     assert df.empty
 
 def test_fetch_channel_df_uses_cache_when_available(patches):
     # Make cache return a pre-built table and ensure network is bypassed
-    cached_rows = _expected_df().to_dict(orient="records")
-    patches["get_cache"].return_value = cached_rows
+    patches["get_frame_entry"].return_value = (time.time(), _expected_df(), {})
 
     df = fetch_channel_df(CHANNEL_HANDLE)
     assert not df.empty
     # Should not call network functions if cache hit
-    patches["get_channel_and_uploads"].assert_not_called()
-    patches["list_upload_video_ids"].assert_not_called()
+    patches["resolve_channel"].assert_not_called()
+    patches["iter_upload_video_ids"].assert_not_called()
     patches["fetch_video_items"].assert_not_called()
+
+def test_fetch_channel_df_expired_cache_refreshes_incrementally(patches):
+    # Expired snapshot holds vid1 only; the playlist now starts with vid2 (new) then vid1
+    stale = _expected_df().query("video_id == 'vid1'").reset_index(drop=True)
+    patches["get_frame_entry"].return_value = (time.time() - 10 * 3600, stale, {})
+    patches["iter_upload_video_ids"].side_effect = lambda uploads: iter(["vid2", "vid1", "never_reached"])
+
+    def fake_fetch(ids, max_workers=None, part="snippet,statistics,contentDetails", fields=None):
+        ids = list(ids)
+        if part == "statistics":
+            assert ids == ["vid1"]
+            return [{"id": "vid1", "statistics": {"viewCount": "1500", "likeCount": "60", "commentCount": "6"}}]
+        assert ids == ["vid2"]  # only the new upload gets a full fetch
+        return [VIDEO_ITEMS[1]]
+
+    patches["fetch_video_items"].side_effect = fake_fetch
+
+    df = fetch_channel_df(CHANNEL_HANDLE)
+    assert df["video_id"].tolist() == ["vid2", "vid1"]
+    vid1 = df.set_index("video_id").loc["vid1"]
+    assert (vid1["view_count"], vid1["like_count"], vid1["comment_count"]) == (1500, 60, 6)
+    assert df.set_index("video_id").loc["vid2", "title"] == "Video Two"
+    patches["set_frame"].assert_called_once()
+
+def test_incremental_refresh_records_only_fetched_counts_in_history(patches, monkeypatch):
+    monkeypatch.setattr(videos, "settings", dataclasses.replace(settings, hot_window=1))
+    patches["get_frame_entry"].return_value = (time.time() - 10 * 3600, _expected_df(), {})
+    patches["iter_upload_video_ids"].side_effect = lambda uploads: iter(VIDEO_IDS)
+    hot = []
+
+    def fake_fetch(ids, max_workers=None, part="snippet,statistics,contentDetails", fields=None):
+        hot.extend(ids)
+        return [{"id": vid, "statistics": {"viewCount": "9", "likeCount": "1", "commentCount": "0"}} for vid in ids]
+
+    patches["fetch_video_items"].side_effect = fake_fetch
+
+    df = fetch_channel_df(CHANNEL_HANDLE)
+    assert len(df) == 2 and len(hot) == 1
+    # The video outside the hot window kept old counts: they are not history
+    recorded = patches["record_snapshot"].call_args[0][1]
+    assert recorded["video_id"].tolist() == hot
+
+def test_fetch_channel_df_incremental_false_forces_full_crawl(patches):
+    patches["get_frame_entry"].return_value = (time.time() - 10 * 3600, _expected_df(), {})
+
+    df = fetch_channel_df(CHANNEL_HANDLE, incremental=False)
+    assert len(df) == 2
+    patches["fetch_video_items"].assert_called_once()
+
+def test_stale_while_revalidate_serves_expired_snapshot_and_refreshes(patches):
+    saved_at = time.time() - 2 * 3600
+    patches["get_frame_entry"].return_value = (saved_at, _expected_df(), {})
+    refreshed = threading.Event()
+    patches["set_frame"].side_effect = lambda *a, **kw: refreshed.set()
+
+    snap = get_channel_snapshot(CHANNEL_HANDLE, allow_stale=True)
+    assert snap.stale and snap.saved_at == saved_at
+    assert snap.age_s >= 2 * 3600 - 1
+    assert len(snap.df) == 2
+    # The refresh runs in the background and stores a new snapshot
+    assert refreshed.wait(timeout=5)
+
+def test_stale_snapshot_too_old_is_refreshed_inline(patches):
+    patches["get_frame_entry"].return_value = (time.time() - 30 * 86400, _expected_df(), {})
+    snap = get_channel_snapshot(CHANNEL_HANDLE, allow_stale=True)
+    assert not snap.stale
+    patches["set_frame"].assert_called_once()
+
+def test_inline_refresh_reports_the_stored_saved_at(patches):
+    patches["set_frame"].return_value = 1_700_000_123
+    snap = get_channel_snapshot(CHANNEL_HANDLE)
+    # Same identity a later cache hit on this snapshot would report
+    assert snap.saved_at == 1_700_000_123
+
+def test_fetch_channels_df_packs_ids_across_channels(patches):
+    ids_by_playlist = {
+        "UU_a": [f"a{i}" for i in range(30)],
+        "UU_b": [f"b{i}" for i in range(30)],
+    }
+    patches["resolve_channel"].side_effect = lambda h: ("UC" + h, "UU_" + h.strip("@"))
+
+    def fake_fetch(ids, max_workers=None, part="snippet,statistics,contentDetails", fields=None, errors=None):
+        return [dict(VIDEO_ITEMS[0], id=v) for v in ids]
+
+    patches["fetch_video_items"].side_effect = fake_fetch
+    with patch("src.services.videos.list_upload_video_ids", side_effect=lambda u: ids_by_playlist[u]):
+        frames, runs = fetch_channels_df(["@a", "@b"], max_workers=4)
+
+    # One packed pass: 60 IDs -> full 50-ID batches inside fetch_video_items
+    patches["fetch_video_items"].assert_called_once()
+    assert list(patches["fetch_video_items"].call_args.args[0]) == ids_by_playlist["UU_a"] + ids_by_playlist["UU_b"]
+    assert frames["@a"]["video_id"].tolist() == ids_by_playlist["UU_a"]
+    assert frames["@b"]["video_id"].tolist() == ids_by_playlist["UU_b"]
+    assert [(r.handle, r.source, r.videos) for r in runs] == [("@a", "api", 30), ("@b", "api", 30)]
+    assert patches["set_frame"].call_count == 2
+
+def test_fetch_channels_df_isolates_failures_and_serves_cache(patches):
+    def resolve(h):
+        if h == "@missing":
+            raise ValueError("Channel not found for handle: @missing")
+        return "UC1", "UU1"
+
+    patches["resolve_channel"].side_effect = resolve
+    patches["get_frame_entry"].side_effect = lambda h: (time.time(), _expected_df(), {}) if h == "@cached" else None
+    with patch("src.services.videos.list_upload_video_ids", return_value=VIDEO_IDS):
+        frames, runs = fetch_channels_df(["@cached", "@missing", "@ok"])
+
+    by_handle = {r.handle: r for r in runs}
+    assert by_handle["@cached"].source == "cache"
+    assert by_handle["@missing"].source == "error" and "not found" in by_handle["@missing"].error
+    assert by_handle["@ok"].videos == 2
+    assert set(frames) == {"@cached", "@ok"}
+
+def test_fetch_channels_df_failed_batch_only_fails_its_channels(patches):
+    ids_by_playlist = {"UU_a": ["a0", "a1"], "UU_b": ["b0", "b1"]}
+    patches["resolve_channel"].side_effect = lambda h: ("UC" + h, "UU_" + h.strip("@"))
+
+    def fake_fetch(ids, max_workers=None, part=None, fields=None, errors=None):
+        # The batch holding @b's IDs gave up after retries
+        errors.update({"b0": ConnectionError("reset"), "b1": ConnectionError("reset")})
+        return [dict(VIDEO_ITEMS[0], id=v) for v in ids if v.startswith("a")]
+
+    patches["fetch_video_items"].side_effect = fake_fetch
+    with patch("src.services.videos.list_upload_video_ids", side_effect=lambda u: ids_by_playlist[u]):
+        frames, runs = fetch_channels_df(["@a", "@b"])
+
+    assert [(r.handle, r.source) for r in runs] == [("@a", "api"), ("@b", "error")]
+    assert "reset" in runs[1].error
+    assert list(frames) == ["@a"] and frames["@a"]["video_id"].tolist() == ["a0", "a1"]
+    patches["set_frame"].assert_called_once()
+
+def test_narrow_request_is_served_from_a_wider_cached_snapshot(patches):
+    patches["get_frame_entry"].return_value = (time.time(), _expected_df(), {})
+
+    df = fetch_channel_df(CHANNEL_HANDLE, columns=["video_id", "view_count"])
+    assert list(df.columns) == ["video_id", "view_count"]
+    assert df["view_count"].tolist() == [2000, 1000]
+    patches["fetch_video_items"].assert_not_called()
+
+def test_narrow_crawl_asks_only_for_needed_fields_and_records_them(patches):
+    df = fetch_channel_df(CHANNEL_HANDLE, columns=["view_count"])
+    assert list(df.columns) == ["view_count"]
+    kwargs = patches["fetch_video_items"].call_args.kwargs
+    assert kwargs["part"] == "snippet,statistics"
+    assert kwargs["fields"] == "items(id,snippet(publishedAt),statistics(viewCount))"
+    assert patches["set_frame"].call_args.kwargs["meta"] == {
+        "columns": ["video_id", "published_at", "view_count"]}
+
+def test_wide_request_over_a_narrow_snapshot_recrawls_the_union(patches):
+    narrow = _expected_df()[["video_id", "published_at", "view_count"]]
+    patches["get_frame_entry"].return_value = (
+        time.time(), narrow, {"columns": ["video_id", "published_at", "view_count"]})
+
+    df = fetch_channel_df(CHANNEL_HANDLE, columns=["title"])
+    assert list(df.columns) == ["title"]
+    assert patches["fetch_video_items"].call_args.kwargs["part"] == "snippet,statistics"
+    assert patches["set_frame"].call_args.kwargs["meta"] == {
+        "columns": ["video_id", "title", "published_at", "view_count"]}
+
+def test_joining_a_narrower_crawl_recrawls_the_union(patches, monkeypatch):
+    narrow = _expected_df()[["video_id", "published_at", "view_count"]]
+    keys = []
+
+    class JoinedNarrowFlight:
+        # The first call joins another caller's in-flight narrow crawl
+        def do(self, key, fn):
+            keys.append(key)
+            return (narrow, 1) if len(keys) == 1 else fn()
+
+    monkeypatch.setattr(videos, "_flights", JoinedNarrowFlight())
+    df = fetch_channel_df(CHANNEL_HANDLE, columns=["title"])
+    assert list(df.columns) == ["title"] and len(df) == 2
+    assert keys == [CHANNEL_HANDLE, CHANNEL_HANDLE]  # one flight per handle, whatever the columns
+    # The stored snapshot keeps the narrow crawl's columns as well
+    assert patches["set_frame"].call_args.kwargs["meta"] == {
+        "columns": ["video_id", "title", "published_at", "view_count"]}
+
+def test_edits_to_a_returned_frame_do_not_reach_the_cache(patches):
+    # One shared object, as the in-process memory tier hands out
+    cached = add_derived_columns(_expected_df())
+    patches["get_frame_entry"].return_value = (time.time(), cached, {})
+    first = fetch_channel_df(CHANNEL_HANDLE)
+    first["new"] = 1
+    first.loc[0, "title"] = "edited"
+    again = fetch_channel_df(CHANNEL_HANDLE)
+    assert "new" not in again and again.loc[0, "title"] != "edited"
+
+def test_returned_frames_are_assignable_over_a_memory_mapped_cache(patches, tmp_path):
+    set_frame_to_disk(CHANNEL_HANDLE, add_derived_columns(_expected_df()), cache_dir=str(tmp_path))
+    patches["get_frame_entry"].side_effect = lambda key: read_frame_entry(key, str(tmp_path))
+    df = fetch_channel_df(CHANNEL_HANDLE)
+    views = df["view_count"].tolist()
+    _memory.clear()  # df now shares the mapping with no one, so no copy-on-write
+    df.loc[0, "view_count"] = 5
+    df.loc[1, "published_ts"] = pd.Timestamp("2024-01-01", tz="UTC")
+    assert fetch_channel_df(CHANNEL_HANDLE)["view_count"].tolist() == views != df["view_count"].tolist()
@@ -1,20 +1,34 @@
 import json
+import threading
 from unittest.mock import patch, Mock, ANY
 import pytest
 
 from src.youtube_api.client import (
     get_channel_and_uploads,
+    iter_upload_video_ids,
     list_upload_video_ids,
     fetch_video_items,
 )
+from src.youtube_api import client
+from src.youtube_api.client import get_transport
+from src.youtube_api.etags import EtagStore
+from src.youtube_api.transport import Transport
 from src.config.settings import settings
 
+@pytest.fixture(autouse=True)
+def _no_shared_etags(monkeypatch):
+    # A store-less process-wide transport: no If-None-Match based on local state, and
+    # the real one (which opens cache/etags.sqlite) is never built by the tests
+    monkeypatch.setattr(client, "_transport", Transport(pool_size=4, timeout_s=5))
+
 # Helpers to build fake responses
 def _mock_response(json_body, status=200):
     m = Mock()
     m.status_code = status
     m.json.return_value = json_body
-    # requests.get(...).raise_for_status() should be a no-op for 2xx
+    m.content = json.dumps(json_body).encode("utf-8")
+    m.raw = None  # no urllib3 byte counter; transport falls back to len(content)
+    # session.get(...).raise_for_status() should be a no-op for 2xx
     if status >= 400:
         def _raise():
             from requests import HTTPError
@@ -33,7 +47,7 @@ def test_get_channel_and_uploads_for_handle_success():
             }
         ]
     }
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         mock_get.return_value = _mock_response(fake, 200)
         channel_id, uploads = get_channel_and_uploads("@DemoHandle")
 
@@ -52,7 +66,7 @@ def test_get_channel_and_uploads_for_handle_success():
 
 def test_get_channel_and_uploads_no_items_raises():
     fake = {"items": []}
-    with patch("requests.get") as mock_get:
+    with patch("requests.Session.get") as mock_get:
         mock_get.return_value = _mock_response(fake, 200)
         with pytest.raises(ValueError):
             get_channel_and_uploads("@MissingHandle")
@@ -81,7 +95,7 @@ def test_list_upload_video_ids_paginates():
             assert params["pageToken"] == "TOKEN_2"
             return _mock_response(page2, 200)
 
-    with patch("requests.get", side_effect=side_effect) as mock_get:
+    with patch("requests.Session.get", side_effect=side_effect) as mock_get:
         ids = list_upload_video_ids("UU_demo_uploads")
         assert ids == ["v1", "v2", "v3"]
 
@@ -124,15 +138,22 @@ def test_fetch_video_items_batches_50_ids():
             })
         return _mock_response({"items": items}, 200)
 
-    with patch("requests.get", side_effect=side_effect) as mock_get:
+    with patch("requests.Session.get", side_effect=side_effect) as mock_get:
         items = fetch_video_items(ids)
-        # Ensure the same number of items returned as requested
+        # Ensure the same number of items returned as requested, in request order
         assert len(items) == len(ids)
+        assert [it["id"] for it in items] == ids
         # Ensure requests were made in 3 batches
         assert len(mock_get.call_args_list) == 3
 
+        # Batches run concurrently, so order the recorded calls by their first ID
+        calls = sorted(
+            (c.kwargs["params"] for c in mock_get.call_args_list),
+            key=lambda p: int(p["id"].split(",")[0][3:]),
+        )
+
         # Validate first call params
-        first_params = mock_get.call_args_list[0].kwargs["params"]
+        first_params = calls[0]
         assert first_params["part"] == "snippet,statistics,contentDetails"
         assert first_params["key"] == settings.yt_api_key
         first_batch_ids = first_params["id"].split(",")
@@ -140,7 +161,118 @@ def test_fetch_video_items_batches_50_ids():
         assert first_batch_ids[0] == "vid0"
 
         # Validate last batch size
-        last_params = mock_get.call_args_list[-1].kwargs["params"]
+        last_params = calls[-1]
         last_batch_ids = last_params["id"].split(",")
         assert len(last_batch_ids) == 20
         assert last_batch_ids[-1] == "vid119"
+
+def test_fetch_video_items_records_failed_batches_when_asked():
+    ids = [f"vid{i}" for i in range(120)]
+
+    def side_effect(url, params, timeout):
+        batch = params["id"].split(",")
+        if batch[0] == "vid50":
+            return _mock_response({"error": {}}, 400)  # not retryable
+        return _mock_response({"items": [{"id": v} for v in batch]}, 200)
+
+    failed = {}
+    with patch("requests.Session.get", side_effect=side_effect):
+        items = fetch_video_items(ids, errors=failed)
+    assert [it["id"] for it in items] == ids[:50] + ids[100:]
+    assert sorted(failed, key=lambda v: int(v[3:])) == ids[50:100]
+
+def test_fetch_video_items_pipelines_with_playlist_paging():
+    # videos.list for page 1 must be issued before playlistItems page 2 is requested
+    page1_seen = threading.Event()
+    page1 = {
+        "items": [{"contentDetails": {"videoId": f"a{i}"}} for i in range(50)],
+        "nextPageToken": "TOKEN_2",
+    }
+    page2 = {"items": [{"contentDetails": {"videoId": "b0"}}]}
+
+    def side_effect(url, params, timeout):
+        if url.endswith("/playlistItems"):
+            if "pageToken" not in params:
+                return _mock_response(page1, 200)
+            assert page1_seen.wait(timeout=5), "videos.list was not pipelined"
+            return _mock_response(page2, 200)
+        batch_ids = params["id"].split(",")
+        if batch_ids[0] == "a0":
+            page1_seen.set()
+        return _mock_response({"items": [{"id": v} for v in batch_ids]}, 200)
+
+    with patch("requests.Session.get", side_effect=side_effect):
+        items = fetch_video_items(iter_upload_video_ids("UU_demo_uploads"))
+    assert [it["id"] for it in items] == [f"a{i}" for i in range(50)] + ["b0"]
+
+def test_transport_negotiates_gzip_and_records_stats():
+    transport = Transport(pool_size=4, timeout_s=5)
+    body = {"items": [{"id": "x"}]}
+    with patch("requests.Session.get") as mock_get:
+        mock_get.return_value = _mock_response(body, 200)
+        assert transport.get_json("https://example.test/v3/videos", {"id": "x"}) == body
+        assert transport.get_json("https://example.test/v3/videos", {"id": "y"}) == body
+
+    # One session per thread, reused across calls, advertising gzip + keep-alive
+    session = transport._session()
+    assert session is transport._session()
+    assert session.headers["Accept-Encoding"] == "gzip"
+    assert session.headers["Connection"] == "keep-alive"
+
+    snap = transport.stats.snapshot()
+    assert snap["requests"] == 2
+    assert snap["wire_bytes"] == 2 * len(json.dumps(body).encode("utf-8"))
+    recent = transport.stats.recent()
+    assert [r.path for r in recent] == ["videos", "videos"]
+    assert all(r.latency_s >= 0 for r in recent)
+
+def test_client_shares_one_transport():
+    assert get_transport() is get_transport()
+
+def test_transport_conditional_requests_serve_304_from_store(tmp_path):
+    store = EtagStore(str(tmp_path / "etags.sqlite"))
+    transport = Transport(pool_size=2, timeout_s=5, etags=store)
+    url = "https://example.test/v3/playlistItems"
+    body = {"etag": "abc", "items": [{"contentDetails": {"videoId": "v1"}}]}
+
+    with patch("requests.Session.get") as mock_get:
+        mock_get.return_value = _mock_response(body, 200)
+        assert transport.get_json(url, {"playlistId": "UU1", "key": "k1"}) == body
+        assert "headers" not in mock_get.call_args.kwargs
+
+        not_modified = _mock_response({}, 304)
+        not_modified.content = b""
+        mock_get.return_value = not_modified
+        # Same signature regardless of API key -> conditional request, body served locally
+        assert transport.get_json(url, {"playlistId": "UU1", "key": "k2"}) == body
+        assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": "abc"}
+
+        changed = {"etag": "def", "items": []}
+        mock_get.return_value = _mock_response(changed, 200)
+        assert transport.get_json(url, {"playlistId": "UU1", "key": "k1"}) == changed
+
+    assert store.snapshot() == {"not_modified": 1, "modified": 1, "unconditional": 1, "hit_rate": 0.5}
+    assert store.get(EtagStore.signature("playlistItems", {"playlistId": "UU1"}))[0] == "def"
+    assert transport.stats.recent()[1].wire_bytes == 0
+
+def test_request_stage_excludes_backoff_sleeps(monkeypatch):
+    import time
+    import requests
+    from src.metrics import metrics
+    from src.youtube_api.scheduler import Scheduler
+
+    # A retry with a 0.2 s backoff: the wait belongs to the scheduler, not to videos_list
+    monkeypatch.setattr(client, "_scheduler", Scheduler(1000, 10, 100, sleep=lambda s: time.sleep(0.2)))
+    responses = [requests.ConnectionError("reset"), _mock_response({"items": [{"id": "v1"}]})]
+
+    def side_effect(url, params, timeout):
+        r = responses.pop(0)
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+    metrics.reset()
+    with patch("requests.Session.get", side_effect=side_effect):
+        assert fetch_video_items(["v1"]) == [{"id": "v1"}]
+    stage = metrics.snapshot()["stages"]["videos_list"]
+    assert stage["calls"] == 2 and stage["seconds"] < 0.2
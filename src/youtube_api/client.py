@@ -1,12 +1,78 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import requests
-from typing import Dict, List, Tuple
 from src.config.settings import settings
+from src.data.cache import DEFAULT_DIR
+from src.metrics import metrics
+from .etags import EtagStore
+from .scheduler import Scheduler, _error_reason, submit_with_context
+from .transport import Transport
+
+class ChannelNotFound(ValueError):
+    """
+    Raised when channels.list returns no channel for a handle or ID.
+    """
+
+_transport: Optional[Transport] = None
+_scheduler: Optional[Scheduler] = None
+_transport_lock = threading.Lock()
+
+def _etag_store() -> EtagStore:
+    os.makedirs(DEFAULT_DIR, exist_ok=True)
+    return EtagStore(os.path.join(DEFAULT_DIR, "etags.sqlite"), max_bytes=settings.etag_max_bytes)
+
+def get_transport() -> Transport:
+    """
+    Return the process-wide pooled transport, creating it on first use.
+    transport.stats exposes per-request latency and bytes read;
+    transport.etags.snapshot() the conditional-request hit/miss counters.
+    """
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = Transport(
+                    pool_size=settings.http_pool_size,
+                    timeout_s=settings.timeout_s,
+                    etags=_etag_store() if settings.etag_cache else None,
+                )
+    return _transport
+
+def get_scheduler() -> Scheduler:
+    """
+    Return the process-wide request scheduler (rate limit, quota budget, retries).
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _transport_lock:
+            if _scheduler is None:
+                _scheduler = Scheduler(
+                    rate_per_s=settings.requests_per_s,
+                    burst=settings.burst,
+                    daily_units=settings.daily_quota_units,
+                    max_retries=settings.max_retries,
+                )
+    return _scheduler
+
+# Endpoint -> pipeline stage name in src.metrics
+_STAGES = {"channels": "channels_list", "playlistItems": "playlist_page", "videos": "videos_list",
+           "commentThreads": "comment_page"}
 
 def _get(path: str, params: dict):
     p = {"key": settings.yt_api_key, **params}
-    r = requests.get(f"{settings.base_url}/{path}", params=p, timeout=settings.timeout_s)
-    r.raise_for_status()
-    return r.json()
+    url = f"{settings.base_url}/{path}"
+    stage = _STAGES.get(path, path)
+
+    def call():
+        # Only the request itself: token-bucket waits and backoff sleeps are
+        # reported by the scheduler (rate_limit_wait), not double-counted here
+        with metrics.stage(stage):
+            return get_transport().get_json(url, p)
+
+    return get_scheduler().execute(path, call)
 
 def get_channel_and_uploads(handle: str) -> Tuple[str, str]:
     """
@@ -20,45 +86,213 @@ def get_channel_and_uploads(handle: str) -> Tuple[str, str]:
     })
     items = data.get("items", [])
     if not items:
-        raise ValueError(f"Channel not found for handle: {handle}")
+        raise ChannelNotFound(f"Channel not found for handle: {handle}")
     item = items[0]
     uploads = item["contentDetails"]["relatedPlaylists"]["uploads"]
     return item["id"], uploads
 
-def list_upload_video_ids(uploads_playlist_id: str) -> List[str]:
+def get_uploads_for_channel_ids(channel_ids: List[str]) -> Dict[str, str]:
     """
-    Enumerate all video IDs from uploads playlist via playlistItems.list with pagination.
+    Bulk-resolve channel IDs to uploads playlistIds, up to 50 IDs per channels.list call.
+    IDs the API does not return (deleted/unknown channels) are absent from the result.
+    """
+    out: Dict[str, str] = {}
+    for chunk in _chunks(channel_ids, settings.batch_size):
+        data = _get("channels", {
+            "part": "id,contentDetails",
+            "id": ",".join(chunk),
+            "maxResults": settings.batch_size,
+            "key": settings.yt_api_key
+        })
+        for item in data.get("items", []):
+            out[item["id"]] = item["contentDetails"]["relatedPlaylists"]["uploads"]
+    return out
+
+def iter_upload_pages(
+    uploads_playlist_id: str,
+    page_token: Optional[str] = None,
+) -> Iterator[Tuple[List[str], Optional[str]]]:
+    """
+    Lazily yield (video IDs, nextPageToken) per playlistItems.list page, starting at
+    `page_token` (the first page by default). The token is None on the last page;
+    passing a yielded token back continues the listing after that page.
     """
-    video_ids: List[str] = []
     params = {
         "part": "contentDetails",
         "playlistId": uploads_playlist_id,
         "maxResults": 50,
         "key": settings.yt_api_key
     }
+    if page_token:
+        params["pageToken"] = page_token
     while True:
         data = _get("playlistItems", params)
-        for it in data.get("items", []):
-            video_ids.append(it["contentDetails"]["videoId"])
-        token = data.get("nextPageToken")
+        token = data.get("nextPageToken") or None
+        yield [it["contentDetails"]["videoId"] for it in data.get("items", [])], token
         if not token:
             break
         params["pageToken"] = token
-    return video_ids
 
-def _chunks(xs: List[str], n: int) -> List[List[str]]:
-    return [xs[i:i+n] for i in range(0, len(xs), n)]
+def iter_upload_video_ids(uploads_playlist_id: str) -> Iterator[str]:
+    """
+    Lazily yield video IDs from the uploads playlist, one playlistItems.list page at a time.
+    Consumers see each page as soon as it arrives, before the next page is requested.
+    """
+    for ids, _ in iter_upload_pages(uploads_playlist_id):
+        yield from ids
 
-def fetch_video_items(video_ids: List[str]) -> List[Dict]:
+def list_upload_video_ids(uploads_playlist_id: str) -> List[str]:
+    """
+    Enumerate all video IDs from uploads playlist via playlistItems.list with pagination.
+    """
+    return list(iter_upload_video_ids(uploads_playlist_id))
+
+def _chunks(xs: Iterable[str], n: int) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    for x in xs:
+        chunk.append(x)
+        if len(chunk) == n:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+VIDEO_PARTS = "snippet,statistics,contentDetails"
+
+def _fetch_video_batch(chunk: List[str], part: str = VIDEO_PARTS, fields: Optional[str] = None) -> List[Dict]:
+    params = {
+        "part": part,
+        "id": ",".join(chunk),
+        "key": settings.yt_api_key
+    }
+    if fields:
+        params["fields"] = fields
+    data = _get("videos", params)
+    return data.get("items", [])
+
+def fetch_video_items(
+    video_ids: Iterable[str],
+    max_workers: Optional[int] = None,
+    part: str = VIDEO_PARTS,
+    fields: Optional[str] = None,
+    errors: Optional[Dict[str, BaseException]] = None,
+) -> List[Dict]:
     """
     Retrieve snippet, statistics, and contentDetails for up to 50 IDs per request via videos.list.
+    Batches run concurrently on a bounded thread pool (settings.max_workers) and are submitted
+    as soon as 50 IDs are available, so a lazy iterable such as iter_upload_video_ids()
+    overlaps playlist paging with detail fetching. Items are returned in input order.
+    Pass a narrower `part` (e.g. "statistics") and/or a `fields` partial-response mask
+    (see parsers.video_request) to fetch only some fields.
+    A batch that still fails after retries raises, unless an `errors` dict is given:
+    then each of its IDs is recorded there with the exception and the rest go on.
     """
     out: List[Dict] = []
-    for chunk in _chunks(video_ids, settings.batch_size):
-        data = _get("videos", {
-            "part": "snippet,statistics,contentDetails",
-            "id": ",".join(chunk),
-            "key": settings.yt_api_key
-        })
-        out.extend(data.get("items", []))
+    for batch in iter_video_batches(video_ids, max_workers=max_workers, part=part, fields=fields, errors=errors):
+        out.extend(batch)
     return out
+
+def iter_video_batches(
+    video_ids: Iterable[str],
+    max_workers: Optional[int] = None,
+    part: str = VIDEO_PARTS,
+    window: Optional[int] = None,
+    fields: Optional[str] = None,
+    errors: Optional[Dict[str, BaseException]] = None,
+) -> Iterator[List[Dict]]:
+    """
+    Yield videos.list items one batch (up to 50) at a time, in input order.
+    At most `window` batches (default 2 x max_workers) are in flight or waiting to be
+    consumed, and the ID iterable is only advanced as that window drains, so memory
+    stays bounded however many IDs the input yields.
+    With an `errors` dict, a failed batch records its IDs there and yields [].
+    """
+    workers = max(1, max_workers or settings.max_workers)
+    window = max(workers, window or 2 * workers)
+    pending = deque()
+
+    def result(chunk: List[str], fut) -> List[Dict]:
+        if errors is None:
+            return fut.result()
+        try:
+            return fut.result()
+        except Exception as e:
+            errors.update((vid, e) for vid in chunk)
+            return []
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="videos-list") as pool:
+        try:
+            for chunk in _chunks(video_ids, settings.batch_size):
+                pending.append((chunk, submit_with_context(pool, _fetch_video_batch, chunk, part, fields)))
+                if len(pending) >= window:
+                    yield result(*pending.popleft())
+            while pending:
+                yield result(*pending.popleft())
+        finally:
+            # Failed or abandoned: don't keep spending quota on the remaining batches
+            for _, fut in pending:
+                fut.cancel()
+
+COMMENT_PAGE_SIZE = 100  # commentThreads.list maximum
+# Top-level comment fields the parser reads; nextPageToken must be named explicitly
+COMMENT_FIELDS_MASK = (
+    "nextPageToken,items(id,snippet(videoId,totalReplyCount,topLevelComment/snippet("
+    "authorDisplayName,authorChannelId,textDisplay,likeCount,publishedAt,updatedAt)))"
+)
+# Per-video failures that retrying (or the next video) can't fix
+_COMMENTS_UNAVAILABLE = {"commentsDisabled", "videoNotFound", "forbidden"}
+
+def comments_unavailable(exc: BaseException) -> bool:
+    """
+    True when commentThreads.list refused one video for good: comments disabled,
+    or the video deleted or private.
+    """
+    if not isinstance(exc, requests.HTTPError):
+        return False
+    resp = exc.response
+    return getattr(resp, "status_code", None) in (403, 404) and _error_reason(resp) in _COMMENTS_UNAVAILABLE
+
+def _comment_published(item: Dict) -> str:
+    return (((item.get("snippet") or {}).get("topLevelComment") or {}).get("snippet") or {}).get("publishedAt", "")
+
+def iter_comment_thread_pages(
+    video_id: str,
+    since: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Iterator[List[Dict]]:
+    """
+    Lazily yield one video's top-level comment threads, newest first, one
+    commentThreads.list page at a time. With `since` (an ISO 8601 UTC timestamp as
+    the API formats them) only threads published after it are yielded, and paging
+    stops at the first older one; `limit` caps the number of threads. Either way no
+    page past the ones needed is requested.
+    """
+    params = {
+        "part": "snippet",
+        "videoId": video_id,
+        "order": "time",
+        "textFormat": "plainText",
+        "maxResults": COMMENT_PAGE_SIZE,
+        "fields": COMMENT_FIELDS_MASK,
+        "key": settings.yt_api_key
+    }
+    left = limit
+    while left is None or left > 0:
+        if left is not None:
+            params["maxResults"] = min(COMMENT_PAGE_SIZE, left)
+        data = _get("commentThreads", params)
+        items = data.get("items", [])
+        complete = False
+        if since:
+            fresh = [it for it in items if _comment_published(it) > since]
+            complete = len(fresh) < len(items)
+            items = fresh
+        if left is not None:
+            items = items[:left]
+            left -= len(items)
+        if items:
+            yield items
+        token = data.get("nextPageToken")
+        if complete or not token:
+            break
+        params["pageToken"] = token
@@ -0,0 +1,94 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional, Tuple
+
+class EtagStore:
+    """
+    Persistent ETag + response-body store for conditional list requests.
+    Keyed by request signature (endpoint + params, API key excluded). Bodies are
+    zlib-compressed in a small SQLite file; least-recently-used rows are trimmed
+    once the store grows past max_bytes.
+    """
+    def __init__(self, path: str, max_bytes: int = 256 * 2**20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS etags ("
+            " sig TEXT PRIMARY KEY, etag TEXT NOT NULL, body BLOB NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._db.commit()
+        self._puts = 0
+        self.not_modified = 0   # 304s served from the store
+        self.modified = 0       # conditional requests that returned a new body
+        self.unconditional = 0  # requests with no stored ETag
+
+    @staticmethod
+    def signature(path: str, params: dict) -> str:
+        return path + "?" + "&".join(f"{k}={params[k]}" for k in sorted(params) if k != "key")
+
+    def get(self, sig: str) -> Optional[Tuple[str, bytes]]:
+        with self._lock:
+            row = self._db.execute("SELECT etag, body FROM etags WHERE sig = ?", (sig,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def load_body(self, sig: str, blob: bytes) -> dict:
+        with self._lock:
+            self._db.execute("UPDATE etags SET used_at = ? WHERE sig = ?", (time.time(), sig))
+            self._db.commit()
+            self.not_modified += 1
+        return json.loads(zlib.decompress(blob))
+
+    def put(self, sig: str, etag: str, body: bytes) -> None:
+        blob = zlib.compress(body, 6)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO etags (sig, etag, body, used_at) VALUES (?, ?, ?, ?)",
+                (sig, etag, blob, time.time()),
+            )
+            self._db.commit()
+            self._puts += 1
+            if self._puts % 100 == 0:
+                self._trim()
+
+    def _trim(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(LENGTH(body)), 0) FROM etags").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT sig, LENGTH(body) FROM etags ORDER BY used_at").fetchall()
+        doomed = []
+        for sig, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((sig,))
+            total -= size
+        self._db.executemany("DELETE FROM etags WHERE sig = ?", doomed)
+        self._db.commit()
+
+    def record_miss(self, conditional: bool) -> None:
+        with self._lock:
+            if conditional:
+                self.modified += 1
+            else:
+                self.unconditional += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            conditional = self.not_modified + self.modified
+            return {
+                "not_modified": self.not_modified,
+                "modified": self.modified,
+                "unconditional": self.unconditional,
+                "hit_rate": round(self.not_modified / conditional, 3) if conditional else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM etags")
+            self._db.commit()
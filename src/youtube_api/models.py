@@ -1,8 +1,18 @@
+import sys
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Optional, Sequence
 
-@dataclass
+_intern = sys.intern
+
+@dataclass(slots=True)
 class Video:
+    """
+    One videos.list item. Slotted (no per-instance __dict__), with the low-cardinality
+    string fields (duration, category_id, definition, caption, channel_title) and every
+    tag interned on construction, so hundreds of thousands of Videos from a
+    multi-channel crawl share one copy of each distinct value. A list of tags stays a
+    list. Having no __dict__, instances can't take attributes beyond the fields.
+    """
     video_id: str
     title: str
     published_at: str
@@ -11,8 +21,24 @@ class Video:
     comment_count: Optional[int] = None
     duration: Optional[str] = None         # ISO 8601, e.g., PT2M13S
     category_id: Optional[str] = None
-    tags: Optional[List[str]] = None
+    tags: Optional[Sequence[str]] = None
     definition: Optional[str] = None       # hd/sd
     caption: Optional[str] = None          # true/false
     channel_title: Optional[str] = None
     description: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        # Spelled out rather than looped: this runs once per video
+        if type(self.duration) is str:
+            self.duration = _intern(self.duration)
+        if type(self.category_id) is str:
+            self.category_id = _intern(self.category_id)
+        if type(self.definition) is str:
+            self.definition = _intern(self.definition)
+        if type(self.caption) is str:
+            self.caption = _intern(self.caption)
+        if type(self.channel_title) is str:
+            self.channel_title = _intern(self.channel_title)
+        if type(self.tags) is list and all(type(t) is str for t in self.tags):
+            # Same list type callers passed in; anything else is kept exactly as given
+            self.tags = [_intern(t) for t in self.tags]
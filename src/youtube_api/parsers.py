@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 from .models import Video
 
 def _to_int(x: Optional[str]) -> Optional[int]:
@@ -32,3 +32,133 @@ def parse_video_items(items: List[Dict]) -> List[Video]:
             )
         )
     return rows
+
+def parse_statistics(items: List[Dict]) -> Dict[str, Tuple[int, Optional[int], Optional[int]]]:
+    """
+    Map video_id -> (view_count, like_count, comment_count) from part=statistics items.
+    """
+    out: Dict[str, Tuple[int, Optional[int], Optional[int]]] = {}
+    for it in items:
+        stats = it.get("statistics", {}) or {}
+        out[it.get("id", "")] = (
+            _to_int(stats.get("viewCount")) or 0,
+            _to_int(stats.get("likeCount")),
+            _to_int(stats.get("commentCount")),
+        )
+    return out
+
+VIDEO_FIELDS = (
+    "video_id", "title", "published_at", "view_count", "like_count", "comment_count",
+    "duration", "category_id", "tags", "definition", "caption", "channel_title", "description",
+)
+
+# Where each column comes from in a videos.list item: (part, key); video_id is the item id
+FIELD_SOURCES: Dict[str, Tuple[str, str]] = {
+    "title": ("snippet", "title"),
+    "published_at": ("snippet", "publishedAt"),
+    "view_count": ("statistics", "viewCount"),
+    "like_count": ("statistics", "likeCount"),
+    "comment_count": ("statistics", "commentCount"),
+    "duration": ("contentDetails", "duration"),
+    "category_id": ("snippet", "categoryId"),
+    "tags": ("snippet", "tags"),
+    "definition": ("contentDetails", "definition"),
+    "caption": ("contentDetails", "caption"),
+    "channel_title": ("snippet", "channelTitle"),
+    "description": ("snippet", "description"),
+}
+_PART_ORDER = ("snippet", "statistics", "contentDetails")
+_EMPTY_STRING_FIELDS = ("title", "published_at")  # "" rather than None when missing, like the Video path
+
+def video_request(fields: Iterable[str]) -> Tuple[str, str]:
+    """
+    Smallest videos.list `part` and a `fields` partial-response mask that cover the
+    given columns, e.g. ("video_id", "published_at", "view_count") ->
+    ("snippet,statistics", "items(id,snippet(publishedAt),statistics(viewCount))").
+    The mask also drops what the parts carry but we never read (thumbnails,
+    localizations, etags, ...).
+    """
+    keys: Dict[str, List[str]] = {}
+    for f in fields:
+        if f in FIELD_SOURCES:
+            part, key = FIELD_SOURCES[f]
+            keys.setdefault(part, []).append(key)
+    parts = [p for p in _PART_ORDER if p in keys]
+    mask = ",".join(["id"] + [f"{p}({','.join(keys[p])})" for p in parts])
+    return ",".join(parts) or "id", f"items({mask})"
+
+def parse_video_columns(items: List[Dict], fields: Sequence[str] = VIDEO_FIELDS) -> Dict[str, list]:
+    """
+    Column-builder counterpart of parse_video_items: one pass over raw videos.list
+    items appending straight into per-field lists, with no per-item Video object.
+    Values are left raw (counts as API strings, tags as lists); typing happens
+    column-at-a-time in src.data.io.items_to_df. `fields` restricts the output to
+    a subset of VIDEO_FIELDS.
+    """
+    if tuple(fields) != VIDEO_FIELDS:
+        return _parse_some_columns(items, fields)
+    cols: Dict[str, list] = {f: [] for f in VIDEO_FIELDS}
+    vid, title, pub = cols["video_id"].append, cols["title"].append, cols["published_at"].append
+    views, likes, comments = cols["view_count"].append, cols["like_count"].append, cols["comment_count"].append
+    dur, cat, tags = cols["duration"].append, cols["category_id"].append, cols["tags"].append
+    defn, cap = cols["definition"].append, cols["caption"].append
+    chan, desc = cols["channel_title"].append, cols["description"].append
+    for it in items:
+        snip = it.get("snippet") or {}
+        stats = it.get("statistics") or {}
+        cdet = it.get("contentDetails") or {}
+        vid(it.get("id", ""))
+        title(snip.get("title", ""))
+        pub(snip.get("publishedAt", ""))
+        views(stats.get("viewCount"))
+        likes(stats.get("likeCount"))
+        comments(stats.get("commentCount"))
+        dur(cdet.get("duration"))
+        cat(snip.get("categoryId"))
+        tags(snip.get("tags"))
+        defn(cdet.get("definition"))
+        cap(cdet.get("caption"))
+        chan(snip.get("channelTitle"))
+        desc(snip.get("description"))
+    return cols
+
+def _parse_some_columns(items: List[Dict], fields: Sequence[str]) -> Dict[str, list]:
+    cols: Dict[str, list] = {f: [] for f in fields}
+    specs = [
+        (cols[f].append, *FIELD_SOURCES[f], "" if f in _EMPTY_STRING_FIELDS else None)
+        for f in fields if f != "video_id"
+    ]
+    vid = cols["video_id"].append if "video_id" in cols else None
+    for it in items:
+        if vid is not None:
+            vid(it.get("id", ""))
+        for append, part, key, default in specs:
+            append((it.get(part) or {}).get(key, default))
+    return cols
+
+COMMENT_FIELDS = (
+    "comment_id", "video_id", "author", "author_channel_id", "text",
+    "like_count", "reply_count", "published_at", "updated_at",
+)
+
+def parse_comment_columns(items: List[Dict]) -> Dict[str, list]:
+    """
+    Column builder for commentThreads.list items: one row per top-level comment,
+    with its thread's reply count. Values are left raw; see src.data.io.comments_to_df.
+    """
+    cols: Dict[str, list] = {f: [] for f in COMMENT_FIELDS}
+    cid, vid, author, author_id = (cols[f].append for f in COMMENT_FIELDS[:4])
+    text, likes, replies, pub, upd = (cols[f].append for f in COMMENT_FIELDS[4:])
+    for it in items:
+        snip = it.get("snippet") or {}
+        top = (snip.get("topLevelComment") or {}).get("snippet") or {}
+        cid(it.get("id", ""))
+        vid(snip.get("videoId", ""))
+        author(top.get("authorDisplayName"))
+        author_id((top.get("authorChannelId") or {}).get("value"))
+        text(top.get("textDisplay"))
+        likes(top.get("likeCount"))
+        replies(snip.get("totalReplyCount"))
+        pub(top.get("publishedAt", ""))
+        upd(top.get("updatedAt"))
+    return cols
@@ -0,0 +1,241 @@
+"""
+Quota-aware request scheduler for the YouTube Data API.
+
+Every API call goes through Scheduler.execute, which
+  1) waits for a token from a priority-ordered token bucket (interactive callers
+     are served before background batch crawls),
+  2) charges the endpoint's quota units against a daily budget that resets at
+     midnight Pacific time, like the API's own quota,
+  3) retries 429 / 5xx / rate-limit 403s and connection errors with jittered
+     exponential backoff, honouring Retry-After when the server sends one.
+"""
+import contextlib
+import contextvars
+import heapq
+import itertools
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, Optional, TypeVar
+
+import requests
+
+from src.metrics import metrics
+
+try:
+    from zoneinfo import ZoneInfo
+    _PACIFIC = ZoneInfo("America/Los_Angeles")
+except Exception:  # tzdata missing (e.g. bare Windows installs)
+    _PACIFIC = timezone(timedelta(hours=-8))
+
+T = TypeVar("T")
+
+INTERACTIVE = 0
+BATCH = 10
+
+# Quota cost per list call, from the YouTube Data API quota calculator
+QUOTA_COST: Dict[str, int] = {
+    "channels": 1,
+    "playlistItems": 1,
+    "videos": 1,
+    "commentThreads": 1,
+    "search": 100,
+}
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RETRYABLE_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "backendError"}
+
+_priority: contextvars.ContextVar[int] = contextvars.ContextVar("yt_request_priority", default=INTERACTIVE)
+
+class QuotaExceeded(RuntimeError):
+    """
+    Raised when the daily quota budget is spent, locally or as reported by the API.
+    """
+
+@contextlib.contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """
+    Run the enclosed API calls at `priority` (lower is served first).
+    Worker threads inherit it when tasks are submitted with submit_with_context.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def current_priority() -> int:
+    return _priority.get()
+
+def submit_with_context(pool, fn: Callable[..., T], *args, **kwargs):
+    """
+    pool.submit that carries the caller's contextvars (request priority) into the worker.
+    """
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+class TokenBucket:
+    """
+    Token bucket whose waiters are granted tokens in (priority, arrival) order.
+    """
+    def __init__(self, rate_per_s: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_s
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._cond = threading.Condition()
+        self._waiters: list = []
+        self._seq = itertools.count()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority: int = INTERACTIVE) -> None:
+        with self._cond:
+            me = (priority, next(self._seq))
+            heapq.heappush(self._waiters, me)
+            try:
+                while True:
+                    self._refill()
+                    if self._waiters[0] == me and self._tokens >= 1:
+                        heapq.heappop(self._waiters)
+                        self._tokens -= 1
+                        self._cond.notify_all()
+                        return
+                    wait = (1 - self._tokens) / self.rate if self._tokens < 1 else None
+                    self._cond.wait(timeout=wait)
+            except BaseException:
+                if me in self._waiters:
+                    self._waiters.remove(me)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                raise
+
+class QuotaBudget:
+    """
+    Per-endpoint quota-unit accounting against a daily budget (resets at midnight PT).
+    Counted in memory per process: separate processes (CLI runs, the daemon, the app)
+    each have their own budget. The default comes from settings.daily_quota_units
+    (YT_DAILY_QUOTA_UNITS).
+    """
+    def __init__(self, daily_units: int, costs: Optional[Dict[str, int]] = None):
+        self.daily_units = daily_units
+        self.costs = costs or QUOTA_COST
+        self._lock = threading.Lock()
+        self._day = self._today()
+        self.used: Dict[str, int] = {}
+        self.exhausted = False
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(_PACIFIC).date().isoformat()
+
+    def _roll(self) -> None:
+        day = self._today()
+        if day != self._day:
+            self._day, self.used, self.exhausted = day, {}, False
+
+    @property
+    def total_used(self) -> int:
+        return sum(self.used.values())
+
+    def remaining(self) -> int:
+        with self._lock:
+            self._roll()
+            return 0 if self.exhausted else max(0, self.daily_units - self.total_used)
+
+    def spend(self, endpoint: str) -> int:
+        cost = self.costs.get(endpoint, 1)
+        with self._lock:
+            self._roll()
+            if self.exhausted or self.total_used + cost > self.daily_units:
+                raise QuotaExceeded(
+                    f"Daily quota budget of {self.daily_units} units exhausted "
+                    f"({self.total_used} used); resets at midnight Pacific time."
+                )
+            self.used[endpoint] = self.used.get(endpoint, 0) + cost
+            return cost
+
+    def mark_exhausted(self) -> None:
+        with self._lock:
+            self.exhausted = True
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            self._roll()
+            return {"day": self._day, "daily_units": self.daily_units,
+                    "used": dict(self.used), "total_used": self.total_used}
+
+def _error_reason(resp: Optional[requests.Response]) -> str:
+    # {"error": {"errors": [{"reason": "quotaExceeded", ...}], ...}}
+    try:
+        errors = resp.json().get("error", {}).get("errors", [])
+        return errors[0].get("reason", "") if errors else ""
+    except Exception:
+        return ""
+
+def _retry_after(resp: Optional[requests.Response]) -> Optional[float]:
+    try:
+        value = resp.headers.get("Retry-After")
+        return max(0.0, float(value)) if value is not None else None
+    except Exception:
+        return None
+
+class Scheduler:
+    def __init__(
+        self,
+        rate_per_s: float,
+        burst: int,
+        daily_units: int,
+        max_retries: int = 5,
+        backoff_base_s: float = 1.0,
+        backoff_max_s: float = 60.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.bucket = TokenBucket(rate_per_s, burst)
+        self.budget = QuotaBudget(daily_units)
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.retries = 0
+
+    def _backoff(self, attempt: int, resp: Optional[requests.Response]) -> float:
+        after = _retry_after(resp)
+        if after is not None:
+            return min(after, self.backoff_max_s)
+        # "Full jitter": uniform in [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * (2 ** attempt)))
+
+    def execute(self, endpoint: str, fn: Callable[[], T], priority: Optional[int] = None) -> T:
+        prio = current_priority() if priority is None else priority
+        for attempt in range(self.max_retries + 1):
+            with metrics.stage("rate_limit_wait"):
+                self.bucket.acquire(prio)
+            metrics.add("quota_units", self.budget.spend(endpoint), endpoint=endpoint)
+            resp: Optional[requests.Response] = None
+            try:
+                return fn()
+            except requests.HTTPError as e:
+                resp = e.response
+                status = getattr(resp, "status_code", None)
+                reason = _error_reason(resp)
+                if status == 403 and reason in ("quotaExceeded", "dailyLimitExceeded"):
+                    # The API's daily quota is gone; retrying only burns time until midnight PT
+                    self.budget.mark_exhausted()
+                    raise QuotaExceeded(f"YouTube API quota exceeded on {endpoint}") from e
+                retryable = status in RETRYABLE_STATUS or (status == 403 and reason in RETRYABLE_REASONS)
+                if not retryable or attempt == self.max_retries:
+                    raise
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+            with self._lock:
+                self.retries += 1
+            metrics.add("retries", endpoint=endpoint)
+            self._sleep(self._backoff(attempt, resp))
+        raise AssertionError("unreachable: the final attempt returns or raises")
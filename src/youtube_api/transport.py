@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.metrics import metrics
+from .etags import EtagStore
+
+@dataclass
+class RequestRecord:
+    path: str
+    status: int
+    latency_s: float
+    wire_bytes: int      # bytes read off the socket (compressed when gzip applies)
+    body_bytes: int      # decoded body size
+
+class TransportStats:
+    """
+    Thread-safe per-request latency/byte accounting for a Transport.
+    Keeps running totals plus the most recent `history` request records.
+    """
+    def __init__(self, history: int = 1000):
+        self._lock = threading.Lock()
+        self._recent: Deque[RequestRecord] = deque(maxlen=history)
+        self.requests = 0
+        self.wire_bytes = 0
+        self.body_bytes = 0
+        self.latency_s = 0.0
+
+    def record(self, rec: RequestRecord) -> None:
+        with self._lock:
+            self._recent.append(rec)
+            self.requests += 1
+            self.wire_bytes += rec.wire_bytes
+            self.body_bytes += rec.body_bytes
+            self.latency_s += rec.latency_s
+
+    def recent(self) -> List[RequestRecord]:
+        with self._lock:
+            return list(self._recent)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            n = self.requests
+            return {
+                "requests": n,
+                "wire_bytes": self.wire_bytes,
+                "body_bytes": self.body_bytes,
+                "latency_s": round(self.latency_s, 6),
+                "avg_latency_s": round(self.latency_s / n, 6) if n else 0.0,
+                "compression_ratio": round(self.body_bytes / self.wire_bytes, 3) if self.wire_bytes else 0.0,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._recent.clear()
+            self.requests = self.wire_bytes = self.body_bytes = 0
+            self.latency_s = 0.0
+
+def _wire_bytes(r: requests.Response, body: bytes) -> int:
+    # urllib3 tracks raw bytes consumed from the socket before gzip decoding
+    try:
+        n = int(r.raw.tell())
+    except Exception:
+        n = 0
+    return n or len(body)
+
+class Transport:
+    """
+    Pooled keep-alive HTTP transport with gzip negotiation.
+    All threads share one urllib3 connection pool (so TLS sessions are reused);
+    each thread gets its own requests.Session so cookie/header state is never
+    mutated concurrently.
+    """
+    def __init__(
+        self,
+        pool_size: int = 16,
+        timeout_s: int = 30,
+        history: int = 1000,
+        etags: Optional[EtagStore] = None,
+    ):
+        self.timeout_s = timeout_s
+        self.etags = etags
+        self.stats = TransportStats(history=history)
+        self._in_flight = threading.BoundedSemaphore(pool_size)
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        s: Optional[requests.Session] = getattr(self._local, "session", None)
+        if s is None:
+            s = requests.Session()
+            s.mount("https://", self._adapter)
+            s.mount("http://", self._adapter)
+            s.headers.update({
+                "Accept-Encoding": "gzip",
+                "Connection": "keep-alive",
+                "User-Agent": "yt-channel-analytics (gzip)",
+            })
+            self._local.session = s
+        return s
+
+    def set_max_in_flight(self, n: int) -> None:
+        """
+        Cap concurrent requests across every caller of this transport.
+        Call before issuing requests; in-flight calls keep the old limit.
+        """
+        self._in_flight = threading.BoundedSemaphore(max(1, n))
+
+    def get_json(self, url: str, params: dict, conditional: bool = True) -> dict:
+        """
+        GET url and return the decoded JSON body.
+        With an EtagStore attached (and conditional=True) the request carries
+        If-None-Match for the last ETag seen for the same endpoint + params, and a
+        304 Not Modified is answered from the stored body.
+        """
+        path = url.rsplit("/", 1)[-1]
+        sig = stored = None
+        kwargs = {}
+        if self.etags is not None and conditional:
+            sig = self.etags.signature(path, params)
+            stored = self.etags.get(sig)
+            if stored is not None:
+                kwargs["headers"] = {"If-None-Match": stored[0]}
+        with self._in_flight:
+            t0 = time.perf_counter()
+            r = self._session().get(url=url, params=params, timeout=self.timeout_s, **kwargs)
+            body = r.content
+        rec = RequestRecord(
+            path=path,
+            status=r.status_code,
+            latency_s=time.perf_counter() - t0,
+            wire_bytes=_wire_bytes(r, body),
+            body_bytes=len(body),
+        )
+        self.stats.record(rec)
+        metrics.add("requests", endpoint=path, status=str(rec.status))
+        metrics.add("wire_bytes", rec.wire_bytes, endpoint=path)
+        metrics.add("body_bytes", rec.body_bytes, endpoint=path)
+        if r.status_code == 304 and stored is not None:
+            return self.etags.load_body(sig, stored[1])
+        r.raise_for_status()
+        data = r.json()
+        if sig is not None:
+            self.etags.record_miss(conditional=stored is not None)
+            etag = data.get("etag") if isinstance(data, dict) else None
+            if isinstance(etag, str) and etag:
+                self.etags.put(sig, etag, body)
+        return data
+
+    def close(self) -> None:
+        self._adapter.close()
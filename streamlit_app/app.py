@@ -14,32 +14,182 @@ print("FINDER src:", pkgutil.find_loader("src"))
 print("FINDER src.services:", pkgutil.find_loader("src.services"))
 
 # 2) App imports (now that sys.path includes the project root)
+import io
+import time
+from typing import Optional
+_t0 = time.perf_counter()  # per-rerun render time, shown in debug mode
+import pandas as pd
 import streamlit as st
-from src.services.videos import fetch_channel_df
+from src.services.videos import ChannelSnapshot, get_channel_snapshot
+from src.services.prewarm import Prewarmer
+from src.services.analytics import get_channel_analytics, summarize
+from src.config.settings import settings
+from src.data.io import export_frame, export_suffix, parquet_available, sort_newest_first
+from src.metrics import metrics, delta
 
 # 3) UI
 st.set_page_config(page_title="YouTube Channel Video Analytics", layout="wide")
 st.title("YouTube Channel Video Analytics")
 
+@st.cache_resource
+def _prewarmer() -> Prewarmer:
+    # One per server process, shared by all sessions; a no-op without a watchlist
+    return Prewarmer(settings.watchlist).start()
+
+_prewarmer()
+
+def _age(seconds: float) -> str:
+    if seconds < 90:
+        return f"{seconds:.0f} seconds"
+    if seconds < 90 * 60:
+        return f"{seconds / 60:.0f} minutes"
+    if seconds < 36 * 3600:
+        return f"{seconds / 3600:.1f} hours"
+    return f"{seconds / 86400:.1f} days"
+
 default_handle = "@CoComelon"
 handle = st.text_input("Enter channel handle (e.g., @CoComelon):", value=default_handle)
+show_metrics = st.sidebar.checkbox("Show pipeline metrics", value=False)
+debug = st.sidebar.checkbox("Debug", value=st.query_params.get("debug") == "1")
+
+def render_metrics(d: dict) -> None:
+    # Cost of the last fetch only; the process-wide totals are shared by all sessions
+    st.sidebar.subheader("Last fetch")
+    if d["stages"]:
+        st.sidebar.dataframe(
+            [{"stage": k, "calls": v["calls"], "seconds": round(v["seconds"], 3)} for k, v in d["stages"].items()],
+            use_container_width=True,
+        )
+    st.sidebar.dataframe(
+        [{"counter": k, "value": v} for k, v in d["counters"].items()],
+        use_container_width=True,
+    )
+    st.sidebar.download_button(
+        label="Prometheus metrics",
+        data=metrics.prometheus(),
+        file_name="ytfetch.prom",
+        mime="text/plain",
+    )
+
+PAGE_SIZES = [100, 500, 1000, 5000]
+
+@st.cache_resource(max_entries=32)
+def _sorted_frame(handle: str, saved_at: float, _df: pd.DataFrame) -> pd.DataFrame:
+    # Keyed by snapshot identity: each snapshot is sorted once per process and shared
+    # (read-only) by every session; a refresh changes saved_at and so the key
+    return sort_newest_first(_df)
+
+_MIME = {"csv": "text/csv", "jsonl": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+
+@st.cache_resource(max_entries=8)
+def _export_bytes(handle: str, saved_at: float, fmt: str, compression: Optional[str], _df: pd.DataFrame) -> bytes:
+    # Same chunked, parallel encoder as the CLI export; compressed while it is built
+    buf = io.BytesIO()
+    export_frame(_df, buf, fmt, compression)
+    return buf.getvalue()
 
-if st.button("Fetch Videos"):
-    with st.spinner("Fetching..."):
-        try:
-            df = fetch_channel_df(handle.strip())
-            if df.empty:
-                st.warning("No videos found or failed to fetch.")
+def load_snapshot(handle: str, force: bool) -> ChannelSnapshot:
+    # Session memo: widget reruns (paging, toggles) reuse the last snapshot; a stale one
+    # is re-checked so the background refresh shows up without another click
+    memo = st.session_state.get("snapshot")
+    if not force and memo is not None and memo[0] == handle and not memo[1].stale:
+        return memo[1]
+    snap = get_channel_snapshot(handle, allow_stale=True)
+    st.session_state["snapshot"] = (handle, snap)
+    return snap
+
+def render_table(df: pd.DataFrame) -> None:
+    size = st.selectbox("Rows per page", PAGE_SIZES, index=1, key="page_size")
+    pages = max(1, -(-len(df) // size))
+    if st.session_state.get("page", 1) > pages:
+        st.session_state["page"] = pages
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key="page")
+    start = (int(page) - 1) * size
+    # Only the visible slice is serialized to the browser
+    st.dataframe(df.iloc[start:start + size], use_container_width=True)
+    st.caption(f"Rows {start + 1}-{min(start + size, len(df))} of {len(df)}")
+
+def render_download(handle: str, saved_at: float, df: pd.DataFrame) -> None:
+    formats = ["csv", "jsonl"] + (["parquet"] if parquet_available() else [])
+    cols = st.columns(2)
+    fmt = cols[0].selectbox("Export format", formats, format_func=str.upper)
+    # Parquet is compressed internally; gzip only applies to the text formats
+    gz = fmt != "parquet" and cols[1].checkbox("gzip", value=len(df) > 10_000)
+    compression = "gzip" if gz else None
+    key = (handle, saved_at, fmt, compression)
+    if st.session_state.get("export_for") != key:
+        # Encoding a 20k-row export is the slowest part of a rerun; only do it on request
+        if st.button("Prepare download"):
+            st.session_state["export_for"] = key
+        else:
+            return
+    st.download_button(
+        label=f"Download {fmt.upper()}{' (gzip)' if gz else ''}",
+        data=_export_bytes(handle, saved_at, fmt, compression, df),
+        file_name=f"{handle.strip('@')}_videos{export_suffix(fmt, compression)}",
+        mime="application/gzip" if gz else _MIME[fmt],
+    )
+
+@st.cache_resource(max_entries=32)
+def _summary(handle: str, saved_at: float) -> dict:
+    # Aggregates are maintained at ingest; this only reshapes them for display
+    state = get_channel_analytics(handle)
+    return summarize(state) if state is not None else {}
+
+def render_summary(s: dict) -> None:
+    t = s["totals"]
+    cols = st.columns(4)
+    cols[0].metric("Videos", f"{t['videos']:,}")
+    cols[1].metric("Views", f"{t['views']:,}")
+    cols[2].metric("Uploads / week", f"{t['uploads_per_week']:.2f}" if t["uploads_per_week"] else "-")
+    cols[3].metric("Median gap (days)", f"{t['median_gap_days']:.1f}" if t["median_gap_days"] is not None else "-")
+    tabs = st.tabs(["Views per month", "Duration by category", "Engagement", "Cadence", "Top tags"])
+    with tabs[0]:
+        st.bar_chart(s["views_per_month"].set_index("month")["views"])
+    with tabs[1]:
+        st.dataframe(s["duration_by_category"], use_container_width=True)
+    with tabs[2]:
+        st.dataframe(s["engagement_by_definition"], use_container_width=True)
+        st.dataframe(s["engagement_by_caption"], use_container_width=True)
+    with tabs[3]:
+        st.bar_chart(s["uploads_by_weekday"].set_index("weekday")["videos"])
+        st.bar_chart(s["uploads_by_hour"].set_index("hour_utc")["videos"])
+    with tabs[4]:
+        st.dataframe(s["top_tags"], use_container_width=True)
+
+fetch = st.button("Fetch Videos")
+if fetch:
+    st.session_state["handle"] = handle.strip()
+    st.session_state["page"] = 1
+
+active = st.session_state.get("handle")
+if active:
+    before = metrics.snapshot()
+    try:
+        with st.spinner("Fetching..."):
+            snap = load_snapshot(active, force=fetch)
+        if fetch:
+            st.session_state["fetch_metrics"] = delta(before, metrics.snapshot())
+        if snap.df.empty:
+            st.warning("No videos found or failed to fetch.")
+        else:
+            df = _sorted_frame(active, snap.saved_at, snap.df)
+            st.success(f"Fetched {len(df)} videos.")
+            if snap.stale:
+                st.caption(f"Data is {_age(snap.age_s)} old; refreshing in the background.")
             else:
-                df = df.sort_values("published_at", ascending=False).reset_index(drop=True)
-                st.success(f"Fetched {len(df)} videos.")
-                st.dataframe(df, use_container_width=True)
-                st.download_button(
-                    label="Download CSV",
-                    data=df.to_csv(index=False),
-                    file_name=f"{handle.strip('@')}_videos.csv",
-                    mime="text/csv",
-                )
-        except Exception as e:
-            st.error(f"Error: {e}")
-            st.exception(e)
+                st.caption(f"Data as of {_age(snap.age_s)} ago.")
+            summary = _summary(active, snap.saved_at)
+            if summary:
+                with st.expander("Channel summary", expanded=True):
+                    render_summary(summary)
+            render_table(df)
+            render_download(active, snap.saved_at, df)
+    except Exception as e:
+        st.error(f"Error: {e}")
+        st.exception(e)
+
+if show_metrics and "fetch_metrics" in st.session_state:
+    render_metrics(st.session_state["fetch_metrics"])
+if debug:
+    st.sidebar.caption(f"Rerun rendered in {1000 * (time.perf_counter() - _t0):.0f} ms")